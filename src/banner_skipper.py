@@ -63,8 +63,7 @@ class BannerSkipper:
                 print(f"Pantalla de bienvenida detectada (intento {attempt+1})")
                 
                 # Presionar el botón A para continuar
-                self.gamepad.press_button(GamepadButton.A, duration=0.2)
-                time.sleep(wait_time)
+                self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
                 
                 # Verificar si hemos avanzado
                 new_screen = self.recognizer.recognize_screen()
@@ -115,9 +114,7 @@ class BannerSkipper:
                 else:
                     # Si no encontramos el botón X, intentar con el botón A
                     print("Botón X no encontrado, intentando con botón A...")
-                    self.gamepad.press_button(GamepadButton.A, duration=0.2)
-                
-                time.sleep(wait_time)
+                    self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
                 
                 # Verificar si hemos avanzado
                 new_screen = self.recognizer.recognize_screen()
@@ -70,7 +70,9 @@ class ConfigSystem:
             default_settings = {
                 'active_profile': 'default',
                 'gamepad': {
-                    'type': 'xbox',  # o 'ps4'
+                    'type': 'xbox',  # o 'ps4', o 'recorder' (sin mando: graba los informes)
+                    'trace_file': 'logs/gamepad_trace.jsonl',  # traza del backend 'recorder'
+                    'trace_format': 'jsonl',  # o 'binary'
                     'button_mapping': {
                         'A': 'A',  # Xbox A = PS4 X
                         'B': 'B',  # Xbox B = PS4 O
@@ -91,7 +93,22 @@ class ConfigSystem:
                 'screen_recognition': {
                     'confidence_threshold': 0.7,
                     'max_wait_time': 10.0,  # segundos
-                    'check_interval': 0.5   # segundos
+                    'check_interval': 0.5,  # segundos
+                    'downscale_width': 960,  # ancho del fotograma reducido (0 = desactivado)
+                    'verify_full_resolution': True,
+                    'matcher': 'template',  # o 'signature' (firmas binarias de bordes)
+                    'signature_size': [240, 135],
+                    'signature_threshold': 0.6,
+                    'signature_ocr_threshold': 0.35,
+                    'fft_cache_size': 32,  # espectros de plantilla cacheados (localización por FFT)
+                    'search_window_margin': 24,  # píxeles alrededor de la última posición de cada elemento
+                    'digit_min_confidence': 0.75,  # confianza mínima del atlas de glifos (regiones "numeric")
+                    'text_index_profile': 'screen',  # perfil OCR del índice de texto (find_text_on_screen)
+                    'text_index_min_conf': 40,  # confianza mínima de tesseract para indexar una palabra
+                    'text_index_max_age': 0.25,  # segundos que se reutiliza el fotograma actual para buscar texto
+                    'ocr_max_candidates': 3,  # estados candidatos leídos en paralelo en el OCR fallback
+                    'ocr_workers': 4,  # hilos del pool de OCR fallback
+                    'ocr_max_edit_ratio': 0.2  # fracción de caracteres que pueden diferir del texto esperado
                 },
                 'cursor_navigation': {
                     'move_speed': 5,  # velocidad de movimiento del cursor
@@ -104,6 +121,30 @@ class ConfigSystem:
                     'use_adaptive_speed': True,
                     'use_path_correction': True,
                     'debug_mode': False
+                },
+                'player_list': {
+                    'tap_duration': 0.05,  # duración de una pulsación de cruceta
+                    'tap_interval': 0.12,  # espera tras cada pulsación para que la lista se mueva
+                    'hold_min_rows': 4,  # filas a partir de las que se mantiene pulsada la cruceta
+                    'hold_initial_delay': 0.35,  # segundos hasta que el juego repite la pulsación mantenida
+                    'hold_repeat_interval': 0.1,  # intervalo de repetición de la pulsación mantenida
+                    'settle_time': 0.2,  # espera tras desplazarse antes de capturar
+                    'max_pages': 60,  # páginas máximas a recorrer antes de rendirse
+                    'sort_menu_delay': 0.4,  # espera tras abrir o cerrar el panel "Ordenar"
+                    'selected_brightness': 150,  # brillo medio mínimo de la tarjeta seleccionada
+                    'max_edit_ratio': 0.2,  # fracción de caracteres del nombre que pueden diferir en el OCR
+                    'scroll_max_correction': 2  # filas de error del desplazamiento mantenido que se corrigen
+                },
+                'latency': {
+                    'poll_interval': 0.0,  # pausa entre capturas del monitor (0 = tan rápido como se pueda)
+                    'downscale_width': 320,  # ancho de la imagen con la que se comparan fotogramas
+                    'change_threshold': 4.0,  # diferencia media de gris que cuenta como reacción
+                    'timeout': 1.0,  # segundos sin reacción tras los que la pulsación se descarta
+                    'bin_width': 0.01,  # anchura de las clases del histograma (segundos)
+                    'max_latency': 1.0,  # límite superior del histograma
+                    'recent_window': 20,  # muestras recientes con las que se vigila la degradación
+                    'degradation_factor': 1.5,  # mediana reciente / mediana global a partir de la que se avisa
+                    'report_file': 'logs/latency_report.json'  # informe de --latency
                 }
             }
             
@@ -490,6 +531,33 @@ class ConfigSystem:
         self.profile['custom_settings'][setting_id] = value
         self.save_profile()
     
+    def get_input_delay(self, state: str, button_name: str) -> Optional[float]:
+        """
+        Obtiene el retardo mínimo calibrado tras pulsar un botón en una pantalla.
+        
+        Args:
+            state: Estado de pantalla
+            button_name: Nombre del botón (GamepadButton.name)
+            
+        Returns:
+            Retardo en segundos o None si no se ha calibrado
+        """
+        return (self.profile.get('input_delays') or {}).get(state, {}).get(button_name)
+    
+    def set_input_delay(self, state: str, button_name: str, delay: float) -> None:
+        """
+        Guarda en el perfil activo el retardo mínimo calibrado tras pulsar un botón en una pantalla.
+        
+        Args:
+            state: Estado de pantalla
+            button_name: Nombre del botón (GamepadButton.name)
+            delay: Retardo en segundos
+        """
+        if not self.profile.get('input_delays'):
+            self.profile['input_delays'] = {}
+        self.profile['input_delays'].setdefault(state, {})[button_name] = delay
+        self.save_profile()
+    
     def export_profile(self, name: str, export_file: str) -> bool:
         """
         Exporta un perfil a un archivo.
@@ -147,6 +147,9 @@ class CursorNavigator:
         """
         Mueve el cursor a las coordenadas especificadas.
         
+        Las coordenadas son de pantalla, las mismas que devuelven find_image_on_screen
+        y find_text_on_screen del reconocedor.
+        
         Args:
             x: Coordenada X de destino
             y: Coordenada Y de destino
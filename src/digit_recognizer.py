@@ -0,0 +1,340 @@
+"""
+Reconocedor de dígitos y tokens cortos basado en un atlas de glifos.
+
+Los números (valoraciones, precios, saldo de GP/monedas, cronómetro del partido)
+son la mayor parte de lo que hay que leer, y tesseract es lento y poco fiable con
+la tipografía estilizada del juego. Este módulo construye un atlas de glifos a
+partir de recortes etiquetados de nuestras capturas y clasifica cada componente
+conexo de una región comparándolo con todo el atlas en una sola operación
+vectorizada de NumPy.
+
+Uso desde línea de comandos:
+    python digit_recognizer.py build                      # Construye el atlas desde glyph_samples.json
+    python digit_recognizer.py test <imagen> x y ancho alto  # Lee una región de una imagen
+"""
+
+import os
+import sys
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger('digit_recognizer')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(PROJECT_DIR, "config")
+IMAGES_DIR = os.path.join(PROJECT_DIR, "images")
+GLYPH_ATLAS_FILE = os.path.join(CONFIG_DIR, "glyph_atlas.npz")
+GLYPH_SAMPLES_FILE = os.path.join(CONFIG_DIR, "glyph_samples.json")
+
+# Tamaño (ancho, alto) normalizado de cada glifo
+GLYPH_WIDTH = 16
+GLYPH_HEIGHT = 24
+# Fracción máxima de píxeles distintos para aceptar la clasificación de un glifo
+MAX_GLYPH_DISTANCE = 0.25
+# Área mínima de un componente, relativa al componente más grande de la región
+MIN_COMPONENT_AREA_RATIO = 0.01
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """
+    Binariza una región con Otsu dejando el texto en blanco sobre fondo negro.
+
+    Args:
+        gray: Región en escala de grises
+
+    Returns:
+        Imagen binaria (0/255) con el texto en primer plano
+    """
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # El fondo ocupa la mayor parte de la región: si predomina el blanco, el texto es oscuro
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def segment_glyphs(gray: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+    """
+    Separa una región en glifos normalizados ordenados de izquierda a derecha.
+
+    Los componentes conexos que se solapan horizontalmente (p. ej. los dos puntos de ':')
+    se agrupan en un mismo glifo. Cada glifo se escala según la altura de la línea, de modo
+    que se conservan su tamaño relativo y su posición vertical ('.' frente a '-').
+
+    Args:
+        gray: Región en escala de grises
+
+    Returns:
+        Lista de tuplas (x izquierda, vector de glifo float32 con valores 0/1)
+    """
+    if gray is None or gray.size == 0:
+        return []
+    binary = binarize(gray)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return []
+
+    max_area = stats[1:, cv2.CC_STAT_AREA].max()
+    min_area = max(3, int(max_area * MIN_COMPONENT_AREA_RATIO))
+    components = [i for i in range(1, count) if stats[i, cv2.CC_STAT_AREA] >= min_area]
+    if not components:
+        return []
+    components.sort(key=lambda i: stats[i, cv2.CC_STAT_LEFT])
+
+    # Agrupar componentes solapados horizontalmente
+    groups = []
+    for i in components:
+        left = stats[i, cv2.CC_STAT_LEFT]
+        right = left + stats[i, cv2.CC_STAT_WIDTH]
+        if groups:
+            g_left, g_right, ids = groups[-1]
+            overlap = min(right, g_right) - max(left, g_left)
+            if overlap > 0.5 * min(right - left, g_right - g_left):
+                groups[-1] = (min(left, g_left), max(right, g_right), ids + [i])
+                continue
+        groups.append((left, right, [i]))
+
+    line_top = min(stats[i, cv2.CC_STAT_TOP] for i in components)
+    line_bottom = max(stats[i, cv2.CC_STAT_TOP] + stats[i, cv2.CC_STAT_HEIGHT] for i in components)
+    line_height = max(1, line_bottom - line_top)
+
+    glyphs = []
+    for left, right, ids in groups:
+        mask = np.isin(labels[line_top:line_bottom, left:right], ids).astype(np.uint8) * 255
+        width = int(np.clip(round((right - left) * GLYPH_HEIGHT / line_height), 1, GLYPH_WIDTH))
+        resized = cv2.resize(mask, (width, GLYPH_HEIGHT), interpolation=cv2.INTER_AREA)
+        glyph = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=np.float32)
+        offset = (GLYPH_WIDTH - width) // 2
+        glyph[:, offset:offset + width] = resized > 127
+        glyphs.append((int(left), glyph.ravel()))
+    return glyphs
+
+
+class GlyphAtlas:
+    """
+    Conjunto de glifos etiquetados (vectores binarios) y sus etiquetas.
+    """
+
+    def __init__(self, vectors: np.ndarray = None, labels: List[str] = None):
+        self.vectors = vectors if vectors is not None else np.empty((0, GLYPH_WIDTH * GLYPH_HEIGHT), np.float32)
+        self.labels = list(labels) if labels is not None else []
+        self._sums = self.vectors.sum(axis=1)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def load(cls, atlas_file: str = GLYPH_ATLAS_FILE) -> "GlyphAtlas":
+        """Carga un atlas guardado con save(); devuelve un atlas vacío si no existe."""
+        if not os.path.exists(atlas_file):
+            logger.warning(f"Atlas de glifos '{atlas_file}' no encontrado.")
+            return cls()
+        try:
+            data = np.load(atlas_file)
+            return cls(data['vectors'].astype(np.float32), [str(label) for label in data['labels']])
+        except Exception as e:
+            logger.error(f"Error al cargar el atlas de glifos {atlas_file}: {e}")
+            return cls()
+
+    def save(self, atlas_file: str = GLYPH_ATLAS_FILE) -> None:
+        """Guarda el atlas en formato npz."""
+        os.makedirs(os.path.dirname(atlas_file), exist_ok=True)
+        np.savez_compressed(atlas_file, vectors=self.vectors.astype(np.uint8), labels=np.array(self.labels))
+        logger.info(f"Atlas de glifos guardado en {atlas_file} ({len(self)} glifos)")
+
+    @classmethod
+    def build(cls, samples: List[Dict], images_dir: str = IMAGES_DIR) -> "GlyphAtlas":
+        """
+        Construye un atlas a partir de recortes etiquetados.
+
+        Args:
+            samples: Lista de {'image': archivo, 'region': {left, top, width, height}, 'text': etiqueta}.
+                Si la tipografía parte un carácter en varios glifos (números de las tarjetas), la muestra
+                puede incluir 'glyphs' con la etiqueta de cada glifo; los glifos con etiqueta vacía
+                no aportan texto ("58" -> ["5", "8", ""])
+            images_dir: Directorio de las capturas
+
+        Returns:
+            GlyphAtlas con un glifo por carácter (sin duplicados exactos)
+        """
+        vectors, labels, seen = [], [], set()
+        image_cache = {}
+        for sample in samples:
+            try:
+                image_name, region, text = sample['image'], sample['region'], sample['text']
+            except (KeyError, TypeError):
+                logger.warning(f"Muestra de glifos inválida, saltando: {sample}")
+                continue
+            if image_name not in image_cache:
+                image_cache[image_name] = cv2.imread(os.path.join(images_dir, image_name), cv2.IMREAD_GRAYSCALE)
+            image = image_cache[image_name]
+            if image is None:
+                logger.warning(f"No se pudo cargar la imagen de muestra: {image_name}")
+                continue
+
+            crop = image[region['top']:region['top'] + region['height'],
+                         region['left']:region['left'] + region['width']]
+            characters = sample.get('glyphs') or [c for c in str(text) if not c.isspace()]
+            glyphs = segment_glyphs(crop)
+            if len(glyphs) != len(characters):
+                logger.warning(f"Muestra '{text}' de {image_name}: {len(glyphs)} glifos segmentados "
+                               f"para {len(characters)} caracteres. Saltando.")
+                continue
+            for character, (_, vector) in zip(characters, glyphs):
+                key = (character, vector.tobytes())
+                if key not in seen:
+                    seen.add(key)
+                    vectors.append(vector)
+                    labels.append(character)
+
+        if not vectors:
+            return cls()
+        return cls(np.vstack(vectors).astype(np.float32), labels)
+
+    def classify(self, glyph_vectors: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Clasifica varios glifos a la vez por distancia de Hamming contra todo el atlas.
+
+        Args:
+            glyph_vectors: Array (M, D) de glifos binarios
+
+        Returns:
+            Tupla (etiquetas, distancias normalizadas 0..1) para cada glifo
+        """
+        query_sums = glyph_vectors.sum(axis=1)
+        # |a xor b| = |a| + |b| - 2 a·b para vectores binarios
+        distances = query_sums[:, None] + self._sums[None, :] - 2.0 * glyph_vectors @ self.vectors.T
+        best = np.argmin(distances, axis=1)
+        best_distances = distances[np.arange(len(best)), best] / glyph_vectors.shape[1]
+        return [self.labels[i] for i in best], best_distances
+
+
+class DigitRecognizer:
+    """
+    Lee números y tokens cortos de una región usando un atlas de glifos.
+    """
+
+    def __init__(self, atlas_file: str = GLYPH_ATLAS_FILE, max_distance: float = MAX_GLYPH_DISTANCE):
+        """
+        Inicializa el reconocedor.
+
+        Args:
+            atlas_file: Archivo npz con el atlas de glifos
+            max_distance: Fracción máxima de píxeles distintos para aceptar un glifo
+        """
+        self.atlas_file = atlas_file
+        self.max_distance = max_distance
+        self.atlas = GlyphAtlas.load(atlas_file)
+
+    @property
+    def available(self) -> bool:
+        """Indica si hay un atlas cargado con el que reconocer."""
+        return len(self.atlas) > 0
+
+    def reload(self) -> None:
+        """Recarga el atlas desde disco."""
+        self.atlas = GlyphAtlas.load(self.atlas_file)
+
+    def recognize(self, gray: np.ndarray) -> Tuple[str, float]:
+        """
+        Reconoce el texto de una región.
+
+        Args:
+            gray: Región en escala de grises
+
+        Returns:
+            Tupla (texto, confianza 0..1). Los glifos no reconocidos se devuelven como '?'
+        """
+        if not self.available:
+            return "", 0.0
+        glyphs = segment_glyphs(gray)
+        if not glyphs:
+            return "", 0.0
+        labels, distances = self.atlas.classify(np.vstack([vector for _, vector in glyphs]))
+        text = "".join(label if distance <= self.max_distance else "?"
+                       for label, distance in zip(labels, distances))
+        confidence = float(1.0 - distances.max())
+        return text, confidence
+
+    def recognize_many(self, grays: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Reconoce varias regiones clasificando todos sus glifos en una sola operación.
+
+        Args:
+            grays: Regiones en escala de grises
+
+        Returns:
+            Lista de (texto, confianza) en el mismo orden que las regiones
+        """
+        if not self.available:
+            return [("", 0.0)] * len(grays)
+        segmented = [segment_glyphs(gray) for gray in grays]
+        vectors = [vector for glyphs in segmented for _, vector in glyphs]
+        if not vectors:
+            return [("", 0.0)] * len(grays)
+        labels, distances = self.atlas.classify(np.vstack(vectors))
+
+        results = []
+        start = 0
+        for glyphs in segmented:
+            end = start + len(glyphs)
+            if end == start:
+                results.append(("", 0.0))
+                continue
+            text = "".join(label if distance <= self.max_distance else "?"
+                           for label, distance in zip(labels[start:end], distances[start:end]))
+            results.append((text, float(1.0 - distances[start:end].max())))
+            start = end
+        return results
+
+    def read_number(self, gray: np.ndarray) -> Optional[int]:
+        """
+        Lee un número entero ignorando separadores de miles ('.', ',').
+
+        Args:
+            gray: Región en escala de grises
+
+        Returns:
+            Número leído o None si la región no contiene sólo dígitos reconocibles
+        """
+        text, _ = self.recognize(gray)
+        digits = text.replace(".", "").replace(",", "")
+        return int(digits) if digits.isdigit() else None
+
+
+def build_atlas_from_samples(samples_file: str = GLYPH_SAMPLES_FILE, atlas_file: str = GLYPH_ATLAS_FILE,
+                             images_dir: str = IMAGES_DIR) -> int:
+    """
+    Construye y guarda el atlas a partir del archivo de muestras etiquetadas.
+
+    Returns:
+        Número de glifos del atlas resultante
+    """
+    if not os.path.exists(samples_file):
+        logger.error(f"Archivo de muestras '{samples_file}' no encontrado.")
+        return 0
+    with open(samples_file, "r", encoding="utf-8") as f:
+        samples = json.load(f)
+    atlas = GlyphAtlas.build(samples, images_dir)
+    if len(atlas) == 0:
+        logger.error("No se pudo extraer ningún glifo de las muestras.")
+        return 0
+    atlas.save(atlas_file)
+    return len(atlas)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        total = build_atlas_from_samples()
+        print(f"Atlas construido con {total} glifos: {GLYPH_ATLAS_FILE}")
+    elif len(sys.argv) == 7 and sys.argv[1] == "test":
+        image = cv2.imread(sys.argv[2], cv2.IMREAD_GRAYSCALE)
+        x, y, w, h = (int(v) for v in sys.argv[3:7])
+        text, confidence = DigitRecognizer().recognize(image[y:y + h, x:x + w])
+        print(f"Texto: '{text}' (confianza: {confidence:.3f})")
+    else:
+        print(__doc__)
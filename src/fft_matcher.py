@@ -0,0 +1,141 @@
+"""
+Correlación en el dominio de la frecuencia con espectros de plantilla cacheados.
+
+Para localizar elementos (p. ej. CursorNavigator.move_to_image) hay que buscar
+varias plantillas sobre el mismo fotograma. cv2.matchTemplate recalcula la
+transformada del fotograma en cada llamada; aquí la FFT del fotograma (y sus
+imágenes integrales) se calcula una vez por fotograma y se reutiliza para todas
+las plantillas, cuyos espectros se precalculan y se guardan en una caché LRU.
+
+El resultado es equivalente a TM_CCOEFF_NORMED.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger('fft_matcher')
+
+# Número máximo de espectros de plantilla en caché (cada uno ocupa ~2 MB a 960x540)
+DEFAULT_SPECTRUM_CACHE_SIZE = 32
+# Varianza mínima de una ventana para considerar la correlación normalizada
+_MIN_VARIANCE = 1e-6
+
+
+class FFTMatcher:
+    """
+    Buscador de plantillas por correlación FFT que reutiliza la transformada del
+    fotograma entre búsquedas.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_SPECTRUM_CACHE_SIZE):
+        """
+        Inicializa el buscador.
+
+        Args:
+            cache_size: Número máximo de espectros de plantilla a conservar
+        """
+        self.cache_size = max(1, int(cache_size))
+        self._spectra: "OrderedDict[Tuple[Hashable, Tuple[int, int]], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._frame_key: Optional[Hashable] = None
+        self._frame_data: Optional[Tuple[Any, ...]] = None
+        self.stats = {'frame_transforms': 0, 'template_transforms': 0, 'searches': 0}
+
+    def clear(self) -> None:
+        """Vacía las cachés de espectros y del fotograma."""
+        self._spectra.clear()
+        self._frame_key = None
+        self._frame_data = None
+
+    def _prepare_frame(self, frame_gray: np.ndarray, frame_key: Hashable = None):
+        """
+        Calcula (o reutiliza) la FFT y las imágenes integrales del fotograma.
+
+        Args:
+            frame_gray: Fotograma en escala de grises
+            frame_key: Identificador del fotograma (p. ej. número de secuencia); None desactiva la reutilización
+        """
+        if frame_key is not None and frame_key == self._frame_key and self._frame_data is not None:
+            return self._frame_data
+
+        height, width = frame_gray.shape[:2]
+        padded_shape = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+        frame_f = frame_gray.astype(np.float32)
+        spectrum = np.fft.rfft2(frame_f, s=padded_shape)
+        window_sum, window_sq_sum = cv2.integral2(frame_f, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+        self._frame_key = frame_key
+        self._frame_data = (padded_shape, spectrum, window_sum, window_sq_sum, (height, width))
+        self.stats['frame_transforms'] += 1
+        return self._frame_data
+
+    def _get_template_spectrum(self, template_key: Hashable, template_gray: np.ndarray,
+                               padded_shape: Tuple[int, int]) -> Tuple[np.ndarray, float]:
+        """
+        Devuelve el conjugado del espectro de la plantilla centrada (media cero) y su norma.
+        """
+        cache_key = (template_key, padded_shape)
+        cached = self._spectra.get(cache_key)
+        if cached is not None:
+            self._spectra.move_to_end(cache_key)
+            return cached
+
+        template_f = template_gray.astype(np.float32)
+        centered = template_f - template_f.mean()
+        norm = float(np.sqrt(np.square(centered, dtype=np.float64).sum()))
+        spectrum = np.conj(np.fft.rfft2(centered, s=padded_shape)).astype(np.complex64)
+
+        self._spectra[cache_key] = (spectrum, norm)
+        if len(self._spectra) > self.cache_size:
+            self._spectra.popitem(last=False)
+        self.stats['template_transforms'] += 1
+        return spectrum, norm
+
+    def match(self, frame_gray: np.ndarray, template_gray: np.ndarray, template_key: Hashable,
+              frame_key: Hashable = None) -> Tuple[Optional[Tuple[int, int]], float]:
+        """
+        Busca una plantilla en el fotograma.
+
+        Args:
+            frame_gray: Fotograma en escala de grises
+            template_gray: Plantilla en escala de grises
+            template_key: Identificador estable de la plantilla (clave de la caché de espectros)
+            frame_key: Identificador del fotograma para reutilizar su FFT entre plantillas
+
+        Returns:
+            Tupla (posición (x, y) de la esquina superior izquierda, confianza) o (None, 0.0)
+        """
+        t_height, t_width = template_gray.shape[:2]
+        if t_height > frame_gray.shape[0] or t_width > frame_gray.shape[1]:
+            return None, 0.0
+
+        padded_shape, frame_spectrum, window_sum, window_sq_sum, (height, width) = \
+            self._prepare_frame(frame_gray, frame_key)
+        template_spectrum, template_norm = self._get_template_spectrum(template_key, template_gray, padded_shape)
+        self.stats['searches'] += 1
+        if template_norm == 0.0:
+            return None, 0.0
+
+        out_h = height - t_height + 1
+        out_w = width - t_width + 1
+        # Correlación circular; sin solapamiento para las posiciones válidas porque el relleno >= fotograma
+        correlation = np.fft.irfft2(frame_spectrum * template_spectrum, s=padded_shape)[:out_h, :out_w]
+
+        n_pixels = t_height * t_width
+        sums = (window_sum[t_height:, t_width:] - window_sum[:-t_height, t_width:]
+                - window_sum[t_height:, :-t_width] + window_sum[:-t_height, :-t_width])
+        sq_sums = (window_sq_sum[t_height:, t_width:] - window_sq_sum[:-t_height, t_width:]
+                   - window_sq_sum[t_height:, :-t_width] + window_sq_sum[:-t_height, :-t_width])
+        variance = sq_sums - sums * sums / n_pixels
+
+        denominator = np.sqrt(np.maximum(variance, 0.0)) * template_norm
+        scores = np.zeros_like(correlation)
+        valid = variance > _MIN_VARIANCE
+        np.divide(correlation, denominator, out=scores, where=valid)
+
+        best = int(np.argmax(scores))
+        y, x = divmod(best, out_w)
+        return (x, y), float(scores[y, x])
@@ -0,0 +1,234 @@
+"""
+Fuente de fotogramas con buffers preasignados para eFootball Automation.
+
+Este módulo envuelve la captura de pantalla de mss para que el bucle de
+sondeo no realice asignaciones grandes en régimen estacionario: el buffer
+crudo de la captura se envuelve con np.frombuffer (sin copia) y las
+conversiones de color se escriben en arrays reutilizables entregados por
+un FramePool.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Any
+
+import numpy as np
+import cv2
+import mss
+
+logger = logging.getLogger('frame_source')
+
+# Número de buffers por forma que rota el pool. Con 2, el fotograma anterior
+# sigue siendo válido mientras se captura el siguiente.
+DEFAULT_POOL_SLOTS = 2
+
+
+class FramePool:
+    """
+    Asignador de buffers reutilizables agrupados por forma y tipo.
+
+    Cada combinación (forma, dtype) tiene un anillo de `slots` buffers que se
+    entregan de forma rotatoria. Un buffer entregado sigue siendo válido hasta
+    que se han pedido `slots` buffers más de la misma forma; quien necesite
+    conservarlo más tiempo debe copiarlo.
+    """
+
+    def __init__(self, slots: int = DEFAULT_POOL_SLOTS):
+        """
+        Inicializa el pool.
+
+        Args:
+            slots: Número de buffers que rotan por cada forma
+        """
+        self.slots = max(1, int(slots))
+        self._rings: Dict[Tuple[Tuple[int, ...], str], list] = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        Entrega el siguiente buffer del anillo correspondiente a la forma pedida.
+
+        Args:
+            shape: Forma del array
+            dtype: Tipo de dato del array
+
+        Returns:
+            Array preasignado (contenido no inicializado)
+        """
+        key = (tuple(int(s) for s in shape), np.dtype(dtype).str)
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = [[np.empty(key[0], dtype=dtype) for _ in range(self.slots)], 0]
+                self._rings[key] = ring
+                self.allocations += self.slots
+                logger.debug(f"FramePool: nuevo anillo para {key} ({self.slots} buffers)")
+            buffers, index = ring
+            ring[1] = (index + 1) % len(buffers)
+            return buffers[index]
+
+    def clear(self) -> None:
+        """Libera todos los buffers del pool."""
+        with self._lock:
+            self._rings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Devuelve estadísticas de uso del pool.
+
+        Returns:
+            Diccionario con número de anillos, asignaciones y bytes reservados
+        """
+        with self._lock:
+            total_bytes = sum(buf.nbytes for buffers, _ in self._rings.values() for buf in buffers)
+            return {
+                'rings': len(self._rings),
+                'allocations': self.allocations,
+                'bytes': total_bytes
+            }
+
+
+class Frame:
+    """
+    Fotograma capturado. Los arrays pertenecen al FramePool de la fuente.
+    """
+
+    def __init__(self, seq: int, timestamp: float, region: Dict[str, int],
+                 bgr: np.ndarray, gray: Optional[np.ndarray] = None,
+                 small_gray: Optional[np.ndarray] = None, scale: float = 1.0):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.region = region
+        self.bgr = bgr
+        self.gray = gray
+        # Versión reducida en gris para las primeras pasadas de reconocimiento
+        self.small_gray = small_gray
+        # Factor de escala small_gray / gray (1.0 si no hay reducción)
+        self.scale = scale
+
+    @property
+    def age(self) -> float:
+        """Segundos transcurridos desde la captura."""
+        return time.perf_counter() - self.timestamp
+
+    def crop(self, region: Dict[str, int], gray: bool = True) -> Optional[np.ndarray]:
+        """
+        Devuelve una vista (sin copia) de una región en coordenadas de pantalla.
+
+        Args:
+            region: Región (left, top, width, height) en coordenadas de pantalla
+            gray: Si True, recorta la versión en gris; si no, la BGR
+
+        Returns:
+            Vista del array o None si la región no está contenida en el fotograma
+        """
+        source = self.gray if gray else self.bgr
+        if source is None:
+            return None
+        left = region['left'] - self.region.get('left', 0)
+        top = region['top'] - self.region.get('top', 0)
+        if left < 0 or top < 0 or top + region['height'] > source.shape[0] or left + region['width'] > source.shape[1]:
+            return None
+        return source[top:top + region['height'], left:left + region['width']]
+
+
+class FrameSource:
+    """
+    Captura fotogramas de un monitor o región convirtiendo el color en buffers
+    preasignados.
+    """
+
+    def __init__(self, region: Dict[str, int] = None, pool: FramePool = None, with_gray: bool = True,
+                 downscale_width: int = None):
+        """
+        Inicializa la fuente de fotogramas.
+
+        Args:
+            region: Región por defecto a capturar (formato mss: left, top, width, height)
+            pool: Pool de buffers a utilizar (se crea uno si no se proporciona)
+            with_gray: Si True, cada captura incluye también la versión en escala de grises
+            downscale_width: Ancho de la versión reducida en gris (None o 0 para desactivarla)
+        """
+        self.region = region
+        self.pool = pool if pool is not None else FramePool()
+        self.with_gray = with_gray
+        self.downscale_width = downscale_width
+        self.seq = 0
+        self.current: Optional[Frame] = None
+        # mss mantiene recursos ligados al hilo que lo crea
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _get_sct(self):
+        """Obtiene (o crea) la instancia de mss del hilo actual."""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def grab(self, region: Dict[str, int] = None, with_gray: bool = None) -> Optional[Frame]:
+        """
+        Captura un fotograma.
+
+        Args:
+            region: Región a capturar (por defecto, la región de la fuente)
+            with_gray: Sobrescribe la opción with_gray de la fuente para esta captura
+
+        Returns:
+            Frame con los arrays BGR (y gris) o None si la captura falla
+        """
+        capture_area = region if region is not None else self.region
+        if capture_area is None:
+            logger.error("FrameSource sin región de captura definida")
+            return None
+        if with_gray is None:
+            with_gray = self.with_gray
+
+        try:
+            sct_img = self._get_sct().grab(capture_area)
+        except Exception as e:
+            logger.error(f"Error durante la captura de pantalla: {e}")
+            return None
+
+        height, width = sct_img.height, sct_img.width
+        # Vista sin copia sobre el buffer BGRA devuelto por mss
+        bgra = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(height, width, 4)
+
+        bgr = self.pool.acquire((height, width, 3))
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=bgr)
+
+        gray = None
+        small_gray = None
+        scale = 1.0
+        if with_gray:
+            gray = self.pool.acquire((height, width))
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=gray)
+
+            # La reducción se calcula una sola vez por captura y sólo para la región completa
+            if region is None and self.downscale_width and self.downscale_width < width:
+                small_width = int(self.downscale_width)
+                small_height = max(1, int(round(height * small_width / width)))
+                small_gray = self.pool.acquire((small_height, small_width))
+                cv2.resize(gray, (small_width, small_height), dst=small_gray, interpolation=cv2.INTER_AREA)
+                scale = small_width / width
+
+        with self._lock:
+            self.seq += 1
+            frame = Frame(self.seq, time.perf_counter(), dict(capture_area), bgr, gray, small_gray, scale)
+            # Sólo las capturas de la región completa avanzan el fotograma actual
+            if region is None:
+                self.current = frame
+        return frame
+
+    def close(self) -> None:
+        """Cierra la instancia de mss del hilo actual."""
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            try:
+                sct.close()
+            except Exception:
+                pass
+            self._local.sct = None
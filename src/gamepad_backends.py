@@ -0,0 +1,379 @@
+"""
+Backends del gamepad virtual para eFootball Automation.
+
+El GamepadController mantiene el estado lógico del mando y delega en un backend
+el envío de cada informe:
+
+- VGamepadBackend: mando virtual Xbox 360 / DualShock 4 con vgamepad (sólo
+  Windows, requiere el driver ViGEmBus). vgamepad se importa al crear el backend,
+  no al importar este módulo.
+- RecorderBackend: backend sin dispositivo que registra cada informe con una marca
+  de tiempo de alta resolución (time.perf_counter) en una traza JSONL o binaria.
+  Permite ejecutar los bots y las pruebas de rendimiento de principio a fin en
+  máquinas sin Windows.
+
+El backend se elige con `gamepad.type` en config/settings.yaml ("xbox", "ds4" o
+"recorder").
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger('gamepad_backends')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(PROJECT_DIR, "config", "settings.yaml")
+
+DEFAULT_GAMEPAD_SETTINGS = {
+    'type': 'xbox',                                          # 'xbox', 'ds4' o 'recorder'
+    'trace_file': os.path.join('logs', 'gamepad_trace.jsonl'),  # Relativo al proyecto
+    'trace_format': 'jsonl',                                 # 'jsonl' o 'binary'
+}
+
+# Valores de `gamepad.type` aceptados y el backend que seleccionan
+BACKEND_TYPES = {
+    'xbox': 'xbox', 'xbox360': 'xbox', 'xboxone': 'xbox',
+    'ps4': 'ds4', 'ds4': 'ds4', 'dualshock4': 'ds4', 'playstation': 'ds4',
+    'recorder': 'recorder',
+}
+
+# Botones digitales (valores de GamepadButton) en el orden de los bits de la traza binaria
+BUTTON_NAMES = ('a', 'b', 'x', 'y', 'start', 'back', 'dpad_up', 'dpad_down', 'dpad_left',
+                'dpad_right', 'left_shoulder', 'right_shoulder', 'left_thumb', 'right_thumb')
+DPAD_NAMES = ('dpad_up', 'dpad_down', 'dpad_left', 'dpad_right')
+# Dirección de la cruceta del DualShock 4 según el desplazamiento (x, y) de los botones pulsados
+DS4_DPAD_DIRECTIONS = {
+    (0, 0): 'none', (0, 1): 'north', (1, 1): 'northeast', (1, 0): 'east', (1, -1): 'southeast',
+    (0, -1): 'south', (-1, -1): 'southwest', (-1, 0): 'west', (-1, 1): 'northwest',
+}
+
+# Registro de la traza binaria (se lee con np.fromfile(ruta, dtype=REPORT_DTYPE))
+REPORT_DTYPE = np.dtype([
+    ('t', '<f8'),          # time.perf_counter() del informe
+    ('buttons', '<u4'),    # Bit i = BUTTON_NAMES[i] pulsado
+    ('lx', '<i2'), ('ly', '<i2'), ('rx', '<i2'), ('ry', '<i2'),
+    ('lt', 'u1'), ('rt', 'u1'),
+])
+
+
+def ds4_dpad_direction(pressed) -> str:
+    """
+    Dirección única de la cruceta del DualShock 4 para un conjunto de botones pulsados.
+
+    El DS4 informa de la cruceta como una sola dirección (con diagonales); las
+    direcciones opuestas se anulan.
+
+    Args:
+        pressed: Nombres de los botones pulsados (sólo cuentan los de DPAD_NAMES)
+
+    Returns:
+        'none', 'north', 'northeast', 'east', ... o 'northwest'
+    """
+    x = ('dpad_right' in pressed) - ('dpad_left' in pressed)
+    y = ('dpad_up' in pressed) - ('dpad_down' in pressed)
+    return DS4_DPAD_DIRECTIONS[(x, y)]
+
+
+def load_gamepad_settings() -> Dict:
+    """Carga la sección 'gamepad' de settings.yaml sobre los valores por defecto."""
+    settings = dict(DEFAULT_GAMEPAD_SETTINGS)
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+            for key, value in (data.get('gamepad') or {}).items():
+                if key in settings:
+                    settings[key] = value
+    except Exception as e:
+        logger.error(f"Error al cargar {SETTINGS_FILE}: {e}. Usando valores por defecto.")
+    return settings
+
+
+class GamepadBackend:
+    """
+    Interfaz de un backend de gamepad. Los cambios (set_*) sólo modifican el
+    informe pendiente; update() lo envía.
+
+    Los botones se identifican por el valor de GamepadButton ("a", "dpad_up",
+    "left_shoulder"...), los sticks y gatillos por su lado ("left"/"right").
+    """
+
+    # Nombre de botón -> identificador propio del backend
+    button_mapping: Dict[str, object] = {}
+
+    def set_button(self, name: str, pressed: bool) -> None:
+        raise NotImplementedError
+
+    def set_stick(self, side: str, x_value: int, y_value: int) -> None:
+        raise NotImplementedError
+
+    def set_trigger(self, side: str, value: int) -> None:
+        raise NotImplementedError
+
+    def update(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera el dispositivo o la traza."""
+
+
+class VGamepadBackend(GamepadBackend):
+    """Mando virtual de vgamepad (Xbox 360 o DualShock 4)."""
+
+    def __init__(self, pad: str = 'xbox'):
+        """
+        Crea el mando virtual.
+
+        Args:
+            pad: 'xbox' o 'ds4'
+
+        Raises:
+            ImportError: Si vgamepad no está disponible (sólo funciona en Windows)
+        """
+        try:
+            import vgamepad as vg
+        except ImportError:
+            logger.error("vgamepad no está disponible. Use gamepad.type: recorder en settings.yaml "
+                         "para ejecutar sin mando virtual.")
+            raise
+        self.vg = vg
+        self.pad = pad
+        if pad == 'xbox':
+            self.gamepad = vg.VX360Gamepad()
+            self.button_mapping = {
+                'a': vg.XUSB_BUTTON.XUSB_GAMEPAD_A,
+                'b': vg.XUSB_BUTTON.XUSB_GAMEPAD_B,
+                'x': vg.XUSB_BUTTON.XUSB_GAMEPAD_X,
+                'y': vg.XUSB_BUTTON.XUSB_GAMEPAD_Y,
+                'start': vg.XUSB_BUTTON.XUSB_GAMEPAD_START,
+                'back': vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK,
+                'left_shoulder': vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_SHOULDER,
+                'right_shoulder': vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_SHOULDER,
+                'left_thumb': vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_THUMB,
+                'right_thumb': vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_THUMB,
+                'dpad_up': vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP,
+                'dpad_down': vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN,
+                'dpad_left': vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT,
+                'dpad_right': vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT,
+            }
+        elif pad == 'ds4':
+            self.gamepad = vg.VDS4Gamepad()
+            self.button_mapping = {
+                'a': vg.DS4_BUTTONS.DS4_BUTTON_CROSS,
+                'b': vg.DS4_BUTTONS.DS4_BUTTON_CIRCLE,
+                'x': vg.DS4_BUTTONS.DS4_BUTTON_SQUARE,
+                'y': vg.DS4_BUTTONS.DS4_BUTTON_TRIANGLE,
+                'start': vg.DS4_BUTTONS.DS4_BUTTON_OPTIONS,
+                'back': vg.DS4_BUTTONS.DS4_BUTTON_SHARE,
+                'left_shoulder': vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_LEFT,
+                'right_shoulder': vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_RIGHT,
+                'left_thumb': vg.DS4_BUTTONS.DS4_BUTTON_THUMB_LEFT,
+                'right_thumb': vg.DS4_BUTTONS.DS4_BUTTON_THUMB_RIGHT,
+                'dpad_up': vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_NORTH,
+                'dpad_down': vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_SOUTH,
+                'dpad_left': vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_WEST,
+                'dpad_right': vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_EAST,
+            }
+        else:
+            raise ValueError(f"Tipo de mando vgamepad no soportado: {pad}")
+        self._dpad_pressed = set()   # Botones de la cruceta pulsados (DS4: una sola dirección)
+
+    def set_button(self, name: str, pressed: bool) -> None:
+        mapped_button = self.button_mapping[name]
+        if self.pad == 'ds4' and name in DPAD_NAMES:
+            if pressed:
+                self._dpad_pressed.add(name)
+            else:
+                self._dpad_pressed.discard(name)
+            direction = ds4_dpad_direction(self._dpad_pressed)
+            self.gamepad.directional_pad(
+                direction=getattr(self.vg.DS4_DPAD_DIRECTIONS, f"DS4_BUTTON_DPAD_{direction.upper()}"))
+        elif pressed:
+            self.gamepad.press_button(button=mapped_button)
+        else:
+            self.gamepad.release_button(button=mapped_button)
+
+    def set_stick(self, side: str, x_value: int, y_value: int) -> None:
+        if self.pad == 'xbox':
+            stick = self.gamepad.left_joystick if side == 'left' else self.gamepad.right_joystick
+            stick(x_value=x_value, y_value=y_value)
+        else:
+            stick = self.gamepad.left_joystick_float if side == 'left' else self.gamepad.right_joystick_float
+            stick(x_value=x_value / 32767.0, y_value=y_value / 32767.0)
+
+    def set_trigger(self, side: str, value: int) -> None:
+        if self.pad == 'xbox':
+            trigger = self.gamepad.left_trigger if side == 'left' else self.gamepad.right_trigger
+            trigger(value=value)
+        else:
+            trigger = self.gamepad.left_trigger_float if side == 'left' else self.gamepad.right_trigger_float
+            trigger(value=value / 255.0)
+
+    def update(self) -> None:
+        self.gamepad.update()
+
+    def close(self) -> None:
+        """Deja el mando en reposo."""
+        self._dpad_pressed.clear()
+        self.gamepad.reset()
+        self.gamepad.update()
+
+
+class RecorderBackend(GamepadBackend):
+    """
+    Backend sin dispositivo que registra cada informe enviado.
+
+    Cada informe se guarda con el estado completo del mando y su instante en
+    time.perf_counter(). En formato 'jsonl' se escribe una línea por informe
+    (precedida de una cabecera con la referencia de reloj); en formato 'binary'
+    se escriben registros REPORT_DTYPE de 22 bytes. Sin archivo, los informes se
+    guardan en memoria (atributo `reports`).
+    """
+
+    button_mapping = {name: name for name in BUTTON_NAMES}
+
+    def __init__(self, trace_file: Optional[str] = None, trace_format: str = 'jsonl'):
+        """
+        Inicializa el grabador.
+
+        Args:
+            trace_file: Archivo de traza (None = sólo en memoria)
+            trace_format: 'jsonl' o 'binary'
+        """
+        if trace_format not in ('jsonl', 'binary'):
+            raise ValueError(f"Formato de traza no soportado: {trace_format}")
+        self.trace_file = trace_file
+        self.trace_format = trace_format
+        self.pressed = set()
+        self.sticks = {'left': (0, 0), 'right': (0, 0)}
+        self.triggers = {'left': 0, 'right': 0}
+        self.report_count = 0
+        self.reports: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._file = None
+        if trace_file:
+            os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+            if trace_format == 'jsonl':
+                self._file = open(trace_file, 'w', encoding='utf-8')
+                header = {'format': 'gamepad_trace', 'clock': 'perf_counter',
+                          'perf_counter': time.perf_counter(), 'time': time.time()}
+                self._file.write(json.dumps(header) + "\n")
+            else:
+                self._file = open(trace_file, 'wb')
+            logger.info(f"Grabando informes del gamepad en {trace_file} ({trace_format})")
+
+    def set_button(self, name: str, pressed: bool) -> None:
+        if pressed:
+            self.pressed.add(name)
+        else:
+            self.pressed.discard(name)
+
+    def set_stick(self, side: str, x_value: int, y_value: int) -> None:
+        self.sticks[side] = (int(x_value), int(y_value))
+
+    def set_trigger(self, side: str, value: int) -> None:
+        self.triggers[side] = int(value)
+
+    def button_bits(self) -> int:
+        """Máscara de bits de los botones pulsados (ver BUTTON_NAMES)."""
+        return sum(1 << i for i, name in enumerate(BUTTON_NAMES) if name in self.pressed)
+
+    def update(self) -> None:
+        timestamp = time.perf_counter()
+        report = (timestamp, self.button_bits(), *self.sticks['left'], *self.sticks['right'],
+                  self.triggers['left'], self.triggers['right'])
+        with self._lock:
+            self.report_count += 1
+            if self._file is None:
+                self.reports.append(report)
+            elif self.trace_format == 'jsonl':
+                self._file.write(json.dumps({
+                    't': timestamp,
+                    'buttons': sorted(self.pressed),
+                    'left_stick': self.sticks['left'],
+                    'right_stick': self.sticks['right'],
+                    'triggers': [self.triggers['left'], self.triggers['right']],
+                }) + "\n")
+            else:
+                self._file.write(np.array([report], dtype=REPORT_DTYPE).tobytes())
+
+    def as_array(self) -> np.ndarray:
+        """Informes guardados en memoria como array REPORT_DTYPE."""
+        with self._lock:
+            return np.array(self.reports, dtype=REPORT_DTYPE)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(trace_file: str):
+    """
+    Lee una traza del RecorderBackend.
+
+    Returns:
+        Array REPORT_DTYPE (traza binaria) o lista de diccionarios (traza JSONL, sin cabecera)
+    """
+    if trace_file.endswith('.jsonl'):
+        with open(trace_file, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        return [line for line in lines if 'format' not in line]
+    return np.fromfile(trace_file, dtype=REPORT_DTYPE)
+
+
+def backend_kind(gamepad_type: Optional[str] = None, settings: Dict = None) -> str:
+    """
+    Backend que corresponde a `gamepad_type` o, si no se indica, a `gamepad.type` de settings.yaml.
+
+    Args:
+        gamepad_type: Tipo de mando ('xbox', 'xbox360', 'ds4', 'recorder'...)
+        settings: Sección 'gamepad' ya cargada (por defecto se lee settings.yaml)
+
+    Returns:
+        'xbox', 'ds4' o 'recorder'
+    """
+    settings = settings or load_gamepad_settings()
+    requested = str(gamepad_type or settings['type'] or 'xbox').lower()
+    kind = BACKEND_TYPES.get(requested)
+    if kind is None:
+        logger.warning(f"Tipo de gamepad no reconocido: {requested}. Usando Xbox 360.")
+        kind = 'xbox'
+    return kind
+
+
+def create_backend(gamepad_type: Optional[str] = None, settings: Dict = None,
+                   instance_name: Optional[str] = None) -> GamepadBackend:
+    """
+    Crea el backend indicado por `gamepad_type` o, si no se indica, por `gamepad.type` de settings.yaml.
+
+    Args:
+        gamepad_type: Tipo de mando ('xbox', 'xbox360', 'ds4', 'recorder'...)
+        settings: Sección 'gamepad' ya cargada (por defecto se lee settings.yaml)
+        instance_name: Nombre de la instancia del juego (ver instance_manager); se añade a
+            la traza del backend de grabación para que cada instancia escriba la suya
+
+    Returns:
+        GamepadBackend
+    """
+    settings = settings or load_gamepad_settings()
+    kind = backend_kind(gamepad_type, settings)
+    if kind == 'recorder':
+        trace_file = settings.get('trace_file')
+        if trace_file and not os.path.isabs(trace_file):
+            trace_file = os.path.join(PROJECT_DIR, trace_file)
+        if trace_file and instance_name:
+            base, ext = os.path.splitext(trace_file)
+            trace_file = f"{base}_{instance_name}{ext}"
+        if trace_file and settings['trace_format'] == 'binary':
+            trace_file = os.path.splitext(trace_file)[0] + '.bin'
+        return RecorderBackend(trace_file, settings['trace_format'])
+    return VGamepadBackend(kind)
@@ -4,18 +4,35 @@ Módulo de control de gamepad para la automatización de eFootball
 Este módulo proporciona funciones para emular un gamepad virtual (Xbox/DualSense)
 y controlar el juego eFootball mediante comandos programáticos.
 
-Utiliza la biblioteca vgamepad para crear y manipular un gamepad virtual en Windows.
+El envío de los informes se delega en un backend (gamepad_backends): vgamepad para
+crear y manipular un gamepad virtual en Windows, o un grabador sin dispositivo
+que permite ejecutar los bots en cualquier sistema.
+
+Además de la API bloqueante (press_button, move_joystick, trigger_press), el
+controlador ofrece variantes *_async que encolan las entradas en un
+InputScheduler y devuelven un Future, de modo que varias entradas pueden
+solaparse sin bloquear al llamante.
 """
 
-import vgamepad as vg
 import time
+import threading
+from contextlib import contextmanager
 from enum import Enum
 
+from gamepad_backends import RecorderBackend, backend_kind, create_backend, load_gamepad_settings
+from input_calibration import load_input_delays
+from input_scheduler import InputScheduler
+from sequence_timeline import compile_sequence, compiled_sequence
+
 class GamepadType(Enum):
     """Tipos de gamepad soportados"""
     XBOX360 = "xbox360"
     XBOXONE = "xboxone"
     DS4 = "dualshock4"  # PlayStation DualShock 4
+    RECORDER = "recorder"  # Sin dispositivo: registra los informes (ver gamepad_backends)
+
+# Tipo de gamepad de cada backend de gamepad_backends (para `gamepad.type` de settings.yaml)
+BACKEND_GAMEPAD_TYPES = {'xbox': GamepadType.XBOX360, 'ds4': GamepadType.DS4, 'recorder': GamepadType.RECORDER}
 
 class GamepadButton(Enum):
     """Botones comunes en gamepads"""
@@ -40,72 +57,211 @@ class GamepadButton(Enum):
     LEFT_THUMB = "left_thumb"
     RIGHT_THUMB = "right_thumb"
 
+# Controles analógicos tal como aparecen en los cambios de estado (ver GamepadController.apply)
+STICK_CONTROLS = ("left_stick", "right_stick")
+TRIGGER_CONTROLS = ("left_trigger", "right_trigger")
+
+# Direcciones de desplazamiento (scroll) y el botón de la cruceta correspondiente
+DPAD_DIRECTIONS = {
+    "up": GamepadButton.DPAD_UP,
+    "down": GamepadButton.DPAD_DOWN,
+    "left": GamepadButton.DPAD_LEFT,
+    "right": GamepadButton.DPAD_RIGHT,
+}
+
+class RepeatModel:
+    """
+    Modelo de la repetición automática del juego al mantener pulsada la cruceta.
+    
+    Al pulsar, el cursor se mueve una vez; si se mantiene, vuelve a moverse tras
+    `initial_delay` segundos y después cada `interval` segundos.
+    """
+    
+    # Peso de cada nueva medida al recalibrar (media móvil exponencial)
+    SMOOTHING = 0.3
+    
+    def __init__(self, initial_delay=0.35, interval=0.1):
+        """
+        Args:
+            initial_delay (float): Segundos hasta la primera repetición
+            interval (float): Segundos entre repeticiones sucesivas
+        """
+        self.initial_delay = initial_delay
+        self.interval = interval
+    
+    def hold_time(self, count):
+        """
+        Tiempo que hay que mantener pulsado para moverse `count` posiciones. Se
+        suelta a mitad del intervalo entre la repetición `count` y la siguiente.
+        
+        Args:
+            count (int): Posiciones a mover (>= 1)
+        
+        Returns:
+            float: Segundos de pulsación
+        """
+        if count <= 1:
+            return min(0.05, self.initial_delay / 2)
+        return self.initial_delay + (count - 1.5) * self.interval
+    
+    def count_for(self, hold_time):
+        """Posiciones que se mueven manteniendo pulsado `hold_time` segundos."""
+        if hold_time < self.initial_delay:
+            return 1
+        return 2 + int((hold_time - self.initial_delay) / self.interval)
+    
+    def observe(self, press_time, move_times):
+        """
+        Recalibra el modelo con los instantes observados de cada movimiento.
+        
+        Args:
+            press_time (float): Instante (perf_counter) de la pulsación
+            move_times (list): Instantes en que se detectó cada movimiento, en orden
+                (el primero corresponde a la pulsación)
+        """
+        if len(move_times) >= 2:
+            delay = move_times[1] - move_times[0]
+            if delay > 0:
+                self.initial_delay += self.SMOOTHING * (delay - self.initial_delay)
+        if len(move_times) >= 4:
+            gaps = sorted(b - a for a, b in zip(move_times[1:], move_times[2:]))
+            interval = gaps[len(gaps) // 2]
+            if interval > 0:
+                self.interval += self.SMOOTHING * (interval - self.interval)
+
 class GamepadController:
     """
     Clase para controlar un gamepad virtual y enviar comandos al juego eFootball.
     """
     
-    def __init__(self, gamepad_type=GamepadType.XBOX360):
+    def __init__(self, gamepad_type=None, backend=None, instance_name=None):
         """
         Inicializa un controlador de gamepad virtual.
         
+        Sin `gamepad_type`, el tipo de mando es el de `gamepad.type` en settings.yaml
+        ("xbox", "ds4" o "recorder", el backend de grabación sin dispositivo).
+        
         Args:
-            gamepad_type (GamepadType): Tipo de gamepad a emular (por defecto: Xbox 360)
+            gamepad_type (GamepadType, optional): Tipo de gamepad a emular (tiene prioridad sobre settings.yaml)
+            backend (GamepadBackend, optional): Backend ya creado (tiene prioridad sobre el tipo)
+            instance_name (str, optional): Nombre de la instancia del juego; separa la traza
+                del backend de grabación de las de las demás instancias
         """
+        if backend is None:
+            if gamepad_type is not None and not isinstance(gamepad_type, GamepadType):
+                raise ValueError(f"Tipo de gamepad no soportado: {gamepad_type}")
+            settings = load_gamepad_settings()
+            if gamepad_type is None:
+                gamepad_type = BACKEND_GAMEPAD_TYPES[backend_kind(None, settings)]
+            # Xbox One usa el mismo mando que Xbox 360 (vgamepad no tiene uno específico)
+            backend = create_backend(gamepad_type.value, settings, instance_name)
+        elif gamepad_type is None:
+            gamepad_type = GamepadType.RECORDER if isinstance(backend, RecorderBackend) else GamepadType.XBOX360
         self.gamepad_type = gamepad_type
         
-        # Crear el gamepad virtual según el tipo seleccionado
-        if gamepad_type == GamepadType.XBOX360:
-            self.gamepad = vg.VX360Gamepad()
-        elif gamepad_type == GamepadType.XBOXONE:
-            self.gamepad = vg.VX360Gamepad()  # Usamos el mismo ya que vgamepad no tiene específico para Xbox One
-        elif gamepad_type == GamepadType.DS4:
-            self.gamepad = vg.VDS4Gamepad()  # DualShock 4
+        self.backend = backend
+        
+        # Botones soportados por el backend
+        self.button_mapping = {button: backend.button_mapping[button.value]
+                               for button in GamepadButton if button.value in backend.button_mapping}
+        
+        # Cerrojo del estado del mando (compartido con el planificador de entradas)
+        self.report_lock = threading.RLock()
+        self._transaction_depth = 0
+        self._dirty = False
+        # Informes enviados al controlador virtual
+        self.report_count = 0
+        self.last_report_time = None
+        # Funciones llamadas tras cada informe con (instante perf_counter, cambios del informe)
+        self.report_listeners = []
+        self._report_changes = {}
+        self._scheduler = None
+        
+        # Repetición automática de la cruceta (ver scroll)
+        self.repeat_model = RepeatModel()
+        
+        # Retardos mínimos calibrados por pantalla y botón (ver input_calibration)
+        self.input_delays = load_input_delays()
+        # Función que devuelve el estado de pantalla para tap() cuando no se indica
+        # (p. ej. ScreenRecognizer.take_state)
+        self.state_provider = None
+        
+        print(f"Gamepad virtual de tipo {self.gamepad_type.value} inicializado correctamente "
+              f"(backend: {type(backend).__name__})")
+    
+    def _set_control(self, control, value):
+        """
+        Cambia un control en el informe del gamepad sin enviarlo.
+        
+        Args:
+            control: GamepadButton, "left_stick"/"right_stick" o "left_trigger"/"right_trigger"
+            value: True/False para botones, (x, y) para sticks (-32768 a 32767), 0-255 para gatillos
+        """
+        if isinstance(control, GamepadButton):
+            if control not in self.button_mapping:
+                raise ValueError(f"Botón no soportado: {control}")
+            self.backend.set_button(control.value, bool(value))
+        elif control in STICK_CONTROLS:
+            x_value, y_value = value
+            self.backend.set_stick(control.split("_")[0], x_value, y_value)
+        elif control in TRIGGER_CONTROLS:
+            self.backend.set_trigger(control.split("_")[0], value)
         else:
-            raise ValueError(f"Tipo de gamepad no soportado: {gamepad_type}")
-        
-        # Mapeo de botones según el tipo de gamepad
-        self._init_button_mapping()
-        
-        print(f"Gamepad virtual de tipo {gamepad_type.value} inicializado correctamente")
-    
-    def _init_button_mapping(self):
-        """Inicializa el mapeo de botones según el tipo de gamepad"""
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            self.button_mapping = {
-                GamepadButton.A: vg.XUSB_BUTTON.XUSB_GAMEPAD_A,
-                GamepadButton.B: vg.XUSB_BUTTON.XUSB_GAMEPAD_B,
-                GamepadButton.X: vg.XUSB_BUTTON.XUSB_GAMEPAD_X,
-                GamepadButton.Y: vg.XUSB_BUTTON.XUSB_GAMEPAD_Y,
-                GamepadButton.START: vg.XUSB_BUTTON.XUSB_GAMEPAD_START,
-                GamepadButton.BACK: vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK,
-                GamepadButton.LB: vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_SHOULDER,
-                GamepadButton.RB: vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_SHOULDER,
-                GamepadButton.LEFT_THUMB: vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_THUMB,
-                GamepadButton.RIGHT_THUMB: vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_THUMB,
-                GamepadButton.DPAD_UP: vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP,
-                GamepadButton.DPAD_DOWN: vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN,
-                GamepadButton.DPAD_LEFT: vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT,
-                GamepadButton.DPAD_RIGHT: vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT,
-            }
-        elif self.gamepad_type == GamepadType.DS4:
-            # Mapeo para DualShock 4
-            self.button_mapping = {
-                GamepadButton.A: vg.DS4_BUTTONS.DS4_BUTTON_CROSS,
-                GamepadButton.B: vg.DS4_BUTTONS.DS4_BUTTON_CIRCLE,
-                GamepadButton.X: vg.DS4_BUTTONS.DS4_BUTTON_SQUARE,
-                GamepadButton.Y: vg.DS4_BUTTONS.DS4_BUTTON_TRIANGLE,
-                GamepadButton.START: vg.DS4_BUTTONS.DS4_BUTTON_OPTIONS,
-                GamepadButton.BACK: vg.DS4_BUTTONS.DS4_BUTTON_SHARE,
-                GamepadButton.LB: vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_LEFT,
-                GamepadButton.RB: vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_RIGHT,
-                GamepadButton.LEFT_THUMB: vg.DS4_BUTTONS.DS4_BUTTON_THUMB_LEFT,
-                GamepadButton.RIGHT_THUMB: vg.DS4_BUTTONS.DS4_BUTTON_THUMB_RIGHT,
-                GamepadButton.DPAD_UP: vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_NORTH,
-                GamepadButton.DPAD_DOWN: vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_SOUTH,
-                GamepadButton.DPAD_LEFT: vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_WEST,
-                GamepadButton.DPAD_RIGHT: vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_EAST,
-            }
+            raise ValueError(f"Control no válido: {control}")
+        self._report_changes[control] = value
+    
+    def _update(self):
+        """Envía el informe del gamepad, o lo aplaza hasta el final de la transacción en curso."""
+        if self._transaction_depth:
+            self._dirty = True
+            return
+        self.backend.update()
+        self.report_count += 1
+        self.last_report_time = time.perf_counter()
+        changes, self._report_changes = self._report_changes, {}
+        for listener in self.report_listeners:
+            try:
+                listener(self.last_report_time, changes)
+            except Exception as e:
+                print(f"Error en un observador de informes del gamepad: {e}")
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa cambios de botones, sticks y gatillos en un único informe.
+        
+        Dentro del bloque, hold_button, release_button, set_joystick, set_trigger, etc.
+        sólo modifican el estado; el informe se envía una vez al salir. Las
+        transacciones pueden anidarse.
+        
+        Ejemplo:
+            with controller.transaction():
+                controller.hold_button(GamepadButton.RB)
+                controller.set_joystick("left", 32767, 0)
+        """
+        with self.report_lock:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0 and self._dirty:
+                    self._dirty = False
+                    self._update()
+    
+    def apply(self, state_delta):
+        """
+        Aplica varios cambios de estado y los envía en un único informe.
+        
+        Args:
+            state_delta (dict): Control -> valor. Los controles son GamepadButton (True/False),
+                "left_stick"/"right_stick" ((x, y)) y "left_trigger"/"right_trigger" (0-255)
+                Ejemplo: {GamepadButton.RB: True, GamepadButton.A: True, "left_stick": (32767, 0)}
+        """
+        with self.transaction():
+            for control, value in state_delta.items():
+                self._set_control(control, value)
+            self._update()
     
     def press_button(self, button, duration=0.1):
         """
@@ -115,24 +271,7 @@ class GamepadController:
             button (GamepadButton): Botón a presionar
             duration (float): Duración en segundos que el botón permanecerá presionado
         """
-        if button not in self.button_mapping:
-            raise ValueError(f"Botón no soportado: {button}")
-        
-        # Obtener el botón específico según el tipo de gamepad
-        mapped_button = self.button_mapping[button]
-        
-        # Presionar el botón
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            self.gamepad.press_button(button=mapped_button)
-        elif self.gamepad_type == GamepadType.DS4:
-            if button in [GamepadButton.DPAD_UP, GamepadButton.DPAD_DOWN, 
-                         GamepadButton.DPAD_LEFT, GamepadButton.DPAD_RIGHT]:
-                self.gamepad.directional_pad(direction=mapped_button)
-            else:
-                self.gamepad.press_button(button=mapped_button)
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
+        self.hold_button(button)
         
         # Esperar la duración especificada
         time.sleep(duration)
@@ -140,6 +279,58 @@ class GamepadController:
         # Soltar el botón
         self.release_button(button)
     
+    def input_delay(self, button, state=None, default=None):
+        """
+        Retardo mínimo calibrado entre el inicio de la pulsación de un botón y la siguiente entrada.
+        
+        Args:
+            button (GamepadButton): Botón pulsado
+            state (str, optional): Estado de pantalla en el que se pulsa
+            default (float, optional): Valor si no hay calibración para ese par
+        
+        Returns:
+            float: Segundos (o `default`)
+        """
+        if state is None:
+            return default
+        return self.input_delays.get(state, {}).get(button.name, default)
+    
+    def tap(self, button, wait, duration=0.1, state=None):
+        """
+        Pulsa un botón y espera antes de la siguiente entrada.
+        
+        Si hay un retardo calibrado para (state, botón) se espera sólo lo necesario
+        para completarlo desde el inicio de la pulsación; si no, se espera `wait`
+        tras soltar el botón.
+        
+        Args:
+            button (GamepadButton): Botón a pulsar
+            wait (float): Espera tras soltar el botón si no hay calibración
+            duration (float): Duración de la pulsación
+            state (str, optional): Estado de pantalla actual; por defecto, el que
+                devuelve `state_provider` (si se ha asignado)
+        """
+        if state is None and self.state_provider is not None:
+            state = self.state_provider()
+        start = time.perf_counter()
+        self.press_button(button, duration)
+        delay = self.input_delay(button, state)
+        if delay is None:
+            time.sleep(wait)
+            return
+        remaining = start + delay - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def hold_button(self, button):
+        """
+        Presiona un botón del gamepad y lo mantiene pulsado hasta release_button.
+        
+        Args:
+            button (GamepadButton): Botón a presionar
+        """
+        self.apply({button: True})
+    
     def release_button(self, button):
         """
         Suelta un botón del gamepad.
@@ -147,24 +338,7 @@ class GamepadController:
         Args:
             button (GamepadButton): Botón a soltar
         """
-        if button not in self.button_mapping:
-            raise ValueError(f"Botón no soportado: {button}")
-        
-        # Obtener el botón específico según el tipo de gamepad
-        mapped_button = self.button_mapping[button]
-        
-        # Soltar el botón
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            self.gamepad.release_button(button=mapped_button)
-        elif self.gamepad_type == GamepadType.DS4:
-            if button in [GamepadButton.DPAD_UP, GamepadButton.DPAD_DOWN, 
-                         GamepadButton.DPAD_LEFT, GamepadButton.DPAD_RIGHT]:
-                self.gamepad.directional_pad(direction=vg.DS4_DPAD_DIRECTIONS.DS4_BUTTON_DPAD_NONE)
-            else:
-                self.gamepad.release_button(button=mapped_button)
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
+        self.apply({button: False})
     
     def move_joystick(self, joystick="left", x_value=0, y_value=0, duration=0.1):
         """
@@ -176,24 +350,7 @@ class GamepadController:
             y_value (int): Valor del eje Y (-32768 a 32767)
             duration (float): Duración en segundos que el joystick permanecerá en la posición
         """
-        # Mover el joystick
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            if joystick.lower() == "left":
-                self.gamepad.left_joystick(x_value=x_value, y_value=y_value)
-            elif joystick.lower() == "right":
-                self.gamepad.right_joystick(x_value=x_value, y_value=y_value)
-            else:
-                raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
-        elif self.gamepad_type == GamepadType.DS4:
-            if joystick.lower() == "left":
-                self.gamepad.left_joystick_float(x_value=x_value/32767.0, y_value=y_value/32767.0)
-            elif joystick.lower() == "right":
-                self.gamepad.right_joystick_float(x_value=x_value/32767.0, y_value=y_value/32767.0)
-            else:
-                raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
+        self.set_joystick(joystick, x_value, y_value)
         
         # Esperar la duración especificada
         time.sleep(duration)
@@ -202,6 +359,17 @@ class GamepadController:
         if duration > 0:
             self.reset_joystick(joystick)
     
+    def set_joystick(self, joystick="left", x_value=0, y_value=0):
+        """
+        Lleva un joystick a una posición y lo deja en ella.
+        
+        Args:
+            joystick (str): Joystick a mover ("left" o "right")
+            x_value (int): Valor del eje X (-32768 a 32767)
+            y_value (int): Valor del eje Y (-32768 a 32767)
+        """
+        self.apply({self._stick_control(joystick): (x_value, y_value)})
+    
     def reset_joystick(self, joystick="left"):
         """
         Devuelve un joystick a su posición central.
@@ -209,23 +377,7 @@ class GamepadController:
         Args:
             joystick (str): Joystick a resetear ("left" o "right")
         """
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            if joystick.lower() == "left":
-                self.gamepad.left_joystick(x_value=0, y_value=0)
-            elif joystick.lower() == "right":
-                self.gamepad.right_joystick(x_value=0, y_value=0)
-            else:
-                raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
-        elif self.gamepad_type == GamepadType.DS4:
-            if joystick.lower() == "left":
-                self.gamepad.left_joystick_float(x_value=0.0, y_value=0.0)
-            elif joystick.lower() == "right":
-                self.gamepad.right_joystick_float(x_value=0.0, y_value=0.0)
-            else:
-                raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
+        self.set_joystick(joystick, 0, 0)
     
     def trigger_press(self, trigger="left", value=255, duration=0.1):
         """
@@ -236,24 +388,7 @@ class GamepadController:
             value (int): Valor de presión (0-255 para Xbox, 0-255 para DS4)
             duration (float): Duración en segundos que el gatillo permanecerá presionado
         """
-        # Presionar el gatillo
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            if trigger.lower() == "left":
-                self.gamepad.left_trigger(value=value)
-            elif trigger.lower() == "right":
-                self.gamepad.right_trigger(value=value)
-            else:
-                raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
-        elif self.gamepad_type == GamepadType.DS4:
-            if trigger.lower() == "left":
-                self.gamepad.left_trigger_float(value=value/255.0)
-            elif trigger.lower() == "right":
-                self.gamepad.right_trigger_float(value=value/255.0)
-            else:
-                raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
+        self.set_trigger(trigger, value)
         
         # Esperar la duración especificada
         time.sleep(duration)
@@ -262,6 +397,16 @@ class GamepadController:
         if duration > 0:
             self.trigger_release(trigger)
     
+    def set_trigger(self, trigger="left", value=255):
+        """
+        Deja un gatillo presionado con el valor indicado.
+        
+        Args:
+            trigger (str): Gatillo a presionar ("left" o "right")
+            value (int): Valor de presión (0-255 para Xbox, 0-255 para DS4)
+        """
+        self.apply({self._trigger_control(trigger): value})
+    
     def trigger_release(self, trigger="left"):
         """
         Suelta un gatillo del gamepad.
@@ -269,72 +414,237 @@ class GamepadController:
         Args:
             trigger (str): Gatillo a soltar ("left" o "right")
         """
-        # Soltar el gatillo
-        if self.gamepad_type in [GamepadType.XBOX360, GamepadType.XBOXONE]:
-            if trigger.lower() == "left":
-                self.gamepad.left_trigger(value=0)
-            elif trigger.lower() == "right":
-                self.gamepad.right_trigger(value=0)
-            else:
-                raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
-        elif self.gamepad_type == GamepadType.DS4:
-            if trigger.lower() == "left":
-                self.gamepad.left_trigger_float(value=0.0)
-            elif trigger.lower() == "right":
-                self.gamepad.right_trigger_float(value=0.0)
-            else:
-                raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
-        
-        # Actualizar el estado del gamepad
-        self.gamepad.update()
-    
-    def execute_sequence(self, sequence):
+        self.set_trigger(trigger, 0)
+    
+    @staticmethod
+    def _stick_control(joystick):
+        """Convierte "left"/"right" en el nombre del control del stick."""
+        if joystick.lower() not in ("left", "right"):
+            raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
+        return f"{joystick.lower()}_stick"
+    
+    @staticmethod
+    def _trigger_control(trigger):
+        """Convierte "left"/"right" en el nombre del control del gatillo."""
+        if trigger.lower() not in ("left", "right"):
+            raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
+        return f"{trigger.lower()}_trigger"
+    
+    @property
+    def scheduler(self):
+        """Planificador de entradas no bloqueantes (se crea y arranca al primer uso)."""
+        if self._scheduler is None:
+            self._scheduler = InputScheduler(self.apply)
+            self._scheduler.start()
+        return self._scheduler
+    
+    def check_delta(self, state_delta):
+        """
+        Valida los controles de un cambio de estado antes de encolarlo (también lo usan
+        los carriles de entrada antes de enviar eventos al planificador).
+        
+        Args:
+            state_delta (dict): Control -> valor
+        
+        Raises:
+            ValueError: Si algún control no existe en este gamepad
+        """
+        for control in state_delta:
+            if isinstance(control, GamepadButton):
+                if control not in self.button_mapping:
+                    raise ValueError(f"Botón no soportado: {control}")
+            elif control not in STICK_CONTROLS and control not in TRIGGER_CONTROLS:
+                raise ValueError(f"Control no válido: {control}")
+    
+    def apply_async(self, state_delta, delay=0.0):
+        """
+        Encola un cambio de estado (ver apply) sin bloquear.
+        
+        Args:
+            state_delta (dict): Control -> valor
+            delay (float): Segundos desde ahora hasta aplicarlo
+        
+        Returns:
+            Future: Se completa al enviar el informe
+        """
+        self.check_delta(state_delta)
+        return self.scheduler.submit([(delay, dict(state_delta))])
+    
+    def press_button_async(self, button, duration=0.1, delay=0.0):
+        """
+        Encola la pulsación de un botón sin bloquear.
+        
+        Args:
+            button (GamepadButton): Botón a presionar
+            duration (float): Duración en segundos de la pulsación
+            delay (float): Segundos desde ahora hasta la pulsación
+        
+        Returns:
+            Future: Se completa al soltar el botón (resultado: instante perf_counter)
+        """
+        return self.chord_async([button], duration, delay)
+    
+    def chord_async(self, buttons, duration=0.1, delay=0.0):
+        """
+        Encola la pulsación simultánea de varios botones sin bloquear. Todos se
+        pulsan y se sueltan en el mismo informe.
+        
+        Args:
+            buttons (list): Botones (GamepadButton) a presionar a la vez
+            duration (float): Duración en segundos de la pulsación
+            delay (float): Segundos desde ahora hasta la pulsación
+        
+        Returns:
+            Future: Se completa al soltar los botones
+        """
+        self.check_delta(buttons)
+        events = [(delay, {button: True for button in buttons}),
+                  (delay + duration, {button: False for button in buttons})]
+        return self.scheduler.submit(events)
+    
+    def move_joystick_async(self, joystick="left", x_value=0, y_value=0, duration=0.1, delay=0.0):
+        """
+        Encola un movimiento de joystick sin bloquear. Con duración 0 el joystick
+        se queda en la posición.
+        
+        Args:
+            joystick (str): Joystick a mover ("left" o "right")
+            x_value (int): Valor del eje X (-32768 a 32767)
+            y_value (int): Valor del eje Y (-32768 a 32767)
+            duration (float): Duración en segundos en la posición
+            delay (float): Segundos desde ahora hasta el movimiento
+        
+        Returns:
+            Future: Se completa al volver al centro (o al moverlo, si la duración es 0)
+        """
+        control = self._stick_control(joystick)
+        events = [(delay, {control: (x_value, y_value)})]
+        if duration > 0:
+            events.append((delay + duration, {control: (0, 0)}))
+        return self.scheduler.submit(events)
+    
+    def trigger_press_async(self, trigger="left", value=255, duration=0.1, delay=0.0):
+        """
+        Encola la presión de un gatillo sin bloquear. Con duración 0 el gatillo
+        se queda presionado.
+        
+        Args:
+            trigger (str): Gatillo a presionar ("left" o "right")
+            value (int): Valor de presión (0-255)
+            duration (float): Duración en segundos de la presión
+            delay (float): Segundos desde ahora hasta la presión
+        
+        Returns:
+            Future: Se completa al soltar el gatillo (o al presionarlo, si la duración es 0)
+        """
+        control = self._trigger_control(trigger)
+        events = [(delay, {control: value})]
+        if duration > 0:
+            events.append((delay + duration, {control: 0}))
+        return self.scheduler.submit(events)
+    
+    def scroll(self, direction, count, model=None):
+        """
+        Desplaza el cursor `count` posiciones manteniendo pulsada la cruceta y
+        aprovechando la repetición automática del juego, en lugar de pulsar una vez
+        por posición. La suelta la programa el planificador en el instante que
+        indica el modelo de repetición. No verifica el resultado (para eso, ver
+        PlayerListScanner.scroll).
+        
+        Args:
+            direction (str): "up", "down", "left" o "right"
+            count (int): Posiciones a mover
+            model (RepeatModel, optional): Modelo de repetición (por defecto, self.repeat_model)
+        
+        Returns:
+            Future: Se completa al soltar la cruceta
+        """
+        if direction not in DPAD_DIRECTIONS:
+            raise ValueError(f"Dirección no válida: {direction}. Debe ser una de {list(DPAD_DIRECTIONS)}")
+        if count <= 0:
+            return self.scheduler.submit([])
+        model = model or self.repeat_model
+        return self.press_button_async(DPAD_DIRECTIONS[direction], model.hold_time(count))
+    
+    def wait_inputs(self, timeout=None):
+        """
+        Espera a que se hayan ejecutado todas las entradas encoladas.
+        
+        Args:
+            timeout (float, optional): Segundos máximos de espera
+        
+        Returns:
+            bool: True si no quedan entradas pendientes
+        """
+        if self._scheduler is None:
+            return True
+        return self._scheduler.wait_idle(timeout)
+    
+    def close(self):
+        """Detiene el planificador de entradas soltando lo que siga pulsado y libera el backend."""
+        if self._scheduler is not None:
+            self._scheduler.stop()
+            self._scheduler = None
+        self.backend.close()
+    
+    def play_sequence_async(self, sequence, name=None, delay=0.0):
+        """
+        Encola una secuencia completa sin bloquear.
+        
+        Args:
+            sequence: Lista de comandos (ver execute_sequence) o CompiledSequence
+            name (str, optional): Nombre con el que se cachea la compilación
+            delay (float): Segundos desde ahora hasta el inicio
+        
+        Returns:
+            Future: Se completa con el último evento de la secuencia (las esperas
+            finales no cuentan; la duración total está en compile_sequence(...).duration)
+        """
+        compiled = compile_sequence(sequence, name)
+        for _, delta in compiled.events:
+            self.check_delta(delta)
+        return self.scheduler.submit(compiled.events, start=time.perf_counter() + delay)
+    
+    def execute_sequence(self, sequence, name=None):
         """
         Ejecuta una secuencia de comandos del gamepad.
         
+        La secuencia se compila (una sola vez, ver sequence_timeline) en eventos con
+        desfase absoluto que reproduce el planificador de entradas, de modo que los
+        retrasos de cada paso no se acumulan. La llamada bloquea durante la duración
+        total de la secuencia, esperas finales incluidas.
+        
         Args:
-            sequence (list): Lista de diccionarios con comandos a ejecutar
+            sequence (list): Lista de diccionarios con comandos a ejecutar, o CompiledSequence
                 Ejemplo: [
                     {"type": "button", "button": GamepadButton.A, "duration": 0.1},
                     {"type": "joystick", "joystick": "left", "x": 32767, "y": 0, "duration": 0.5},
                     {"type": "wait", "duration": 1.0}
                 ]
+            name (str, optional): Nombre con el que se cachea la compilación
         """
-        for command in sequence:
-            cmd_type = command.get("type", "")
-            
-            if cmd_type == "button":
-                button = command.get("button")
-                duration = command.get("duration", 0.1)
-                self.press_button(button, duration)
-            
-            elif cmd_type == "joystick":
-                joystick = command.get("joystick", "left")
-                x_value = command.get("x", 0)
-                y_value = command.get("y", 0)
-                duration = command.get("duration", 0.1)
-                self.move_joystick(joystick, x_value, y_value, duration)
-            
-            elif cmd_type == "trigger":
-                trigger = command.get("trigger", "left")
-                value = command.get("value", 255)
-                duration = command.get("duration", 0.1)
-                self.trigger_press(trigger, value, duration)
-            
-            elif cmd_type == "wait":
-                duration = command.get("duration", 0.5)
-                time.sleep(duration)
-            
-            else:
-                print(f"Tipo de comando desconocido: {cmd_type}")
+        compiled = compile_sequence(sequence, name)
+        start = time.perf_counter()
+        for _, delta in compiled.events:
+            self.check_delta(delta)
+        self.scheduler.submit(compiled.events, start=start).result()
+        
+        # Esperas finales de la secuencia
+        remaining = start + compiled.duration - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
 
 # Ejemplos de secuencias predefinidas para eFootball
 class EFootballSequences:
     """
     Secuencias predefinidas de comandos para acciones comunes en eFootball.
+    
+    Cada método devuelve la secuencia ya compilada (CompiledSequence); la
+    compilación se hace en la primera llamada y se reutiliza en las siguientes.
     """
     
     @staticmethod
+    @compiled_sequence
     def saltar_banner():
         """Secuencia para saltar un banner o anuncio"""
         return [
@@ -345,6 +655,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def navegar_menu_principal_a_contratos():
         """Secuencia para navegar desde el menú principal a la sección de contratos"""
         return [
@@ -357,6 +668,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def seleccionar_jugadores_normales():
         """Secuencia para seleccionar la opción de jugadores normales en el menú de contratos"""
         return [
@@ -367,6 +679,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def confirmar_compra():
         """Secuencia para confirmar la compra de un jugador"""
         return [
@@ -377,6 +690,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def navegar_menu_principal_a_mi_equipo():
         """Secuencia para navegar desde el menú principal a la sección de Mi Equipo"""
         return [
@@ -387,6 +701,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def seleccionar_jugador_en_lista(navegaciones_abajo=0):
         """
         Secuencia para seleccionar un jugador en la lista de Mi Equipo
@@ -396,7 +711,8 @@ class EFootballSequences:
         """
         sequence = []
         
-        # Navegar hacia abajo hasta el jugador deseado
+        # Navegar hacia abajo hasta el jugador deseado (para listas largas, ver PlayerListScanner.scroll,
+        # que mantiene la cruceta pulsada verificando el avance)
         for _ in range(navegaciones_abajo):
             sequence.append({"type": "button", "button": GamepadButton.DPAD_DOWN, "duration": 0.1})
             sequence.append({"type": "wait", "duration": 0.2})
@@ -408,6 +724,7 @@ class EFootballSequences:
         return sequence
     
     @staticmethod
+    @compiled_sequence
     def acceder_a_habilidades():
         """Secuencia para acceder a la sección de habilidades de un jugador"""
         return [
@@ -420,6 +737,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def seleccionar_entrenamiento_habilidad():
         """Secuencia para seleccionar la opción de entrenamiento de habilidad"""
         return [
@@ -430,6 +748,7 @@ class EFootballSequences:
         ]
     
     @staticmethod
+    @compiled_sequence
     def navegar_menu_principal_a_partido():
         """Secuencia para navegar desde el menú principal a la sección de partidos"""
         return [
@@ -0,0 +1,281 @@
+"""
+Calibración de los retardos mínimos entre entradas por pantalla.
+
+Para cada par (estado de pantalla, botón) se mide cuánto tarda el juego en
+aceptar la siguiente pulsación: se pulsa el botón, se espera un retardo d y se
+pulsa el siguiente botón; la segunda pulsación se da por aceptada si la pantalla,
+una vez estable, difiere de la que deja la primera pulsación sola. El retardo se
+reduce progresivamente hasta que alguna prueba falla. El mínimo aceptado (más un
+margen de seguridad) se guarda en el perfil activo (config/profiles/<perfil>.yaml,
+sección 'input_delays') y GamepadController.tap lo usa automáticamente en lugar
+de la espera fija de cada llamada.
+
+Uso:
+    python input_calibration.py <estado> <botón> [<botón siguiente>] [--undo <botón> ...]
+Ejemplo (lista de Mi Equipo, volviendo arriba tras cada prueba):
+    python input_calibration.py menu_miequipo_jugadores DPAD_DOWN --undo DPAD_UP DPAD_UP
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger('input_calibration')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(PROJECT_DIR, "config", "settings.yaml")
+PROFILES_DIR = os.path.join(PROJECT_DIR, "config", "profiles")
+
+# Diferencia media de gris (0-255) a partir de la cual dos fotogramas se consideran distintos
+DEFAULT_CHANGE_THRESHOLD = 4.0
+
+DEFAULT_CALIBRATION = {
+    'start_delay': 1.0,     # Primer retardo probado (segundos)
+    'min_delay': 0.04,      # Retardo mínimo que se llega a probar
+    'factor': 0.75,         # Reducción del retardo entre rondas
+    'trials': 3,            # Pruebas que deben aceptarse en cada retardo
+    'safety_margin': 1.2,   # Multiplicador aplicado al mínimo aceptado
+    'tap_duration': 0.05,   # Duración de cada pulsación de prueba
+    'settle_time': 0.3,     # Tiempo sin cambios para considerar estable la pantalla
+    'settle_timeout': 3.0,  # Espera máxima a que la pantalla se estabilice
+}
+
+
+def frame_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Diferencia media absoluta entre dos imágenes en gris de la misma forma.
+
+    Returns:
+        Diferencia media (0-255); infinito si las formas no coinciden
+    """
+    if a is None or b is None or a.shape != b.shape:
+        return float('inf')
+    return float(np.mean(np.abs(a.astype(np.int16) - b.astype(np.int16))))
+
+
+def comparable_image(frame) -> np.ndarray:
+    """Imagen con la que se comparan fotogramas (la reducida si existe). Se copia: los buffers se reutilizan."""
+    image = frame.small_gray if frame.small_gray is not None else frame.gray
+    return image.copy()
+
+
+def active_profile_file() -> str:
+    """Ruta del perfil activo (settings.yaml 'active_profile', por defecto 'default')."""
+    profile = 'default'
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                profile = (yaml.safe_load(f) or {}).get('active_profile') or profile
+    except Exception as e:
+        logger.error(f"Error al cargar {SETTINGS_FILE}: {e}")
+    return os.path.join(PROFILES_DIR, f"{profile}.yaml")
+
+
+def load_input_delays(profile_file: str = None) -> Dict[str, Dict[str, float]]:
+    """
+    Carga los retardos calibrados del perfil activo.
+
+    Returns:
+        {estado: {nombre de botón (GamepadButton.name): segundos}} (vacío si no hay calibración)
+    """
+    profile_file = profile_file or active_profile_file()
+    try:
+        if os.path.exists(profile_file):
+            with open(profile_file, 'r', encoding='utf-8') as f:
+                return (yaml.safe_load(f) or {}).get('input_delays') or {}
+    except Exception as e:
+        logger.error(f"Error al cargar los retardos de {profile_file}: {e}")
+    return {}
+
+
+class InputDelayCalibrator:
+    """
+    Mide el retardo mínimo entre dos entradas que el juego acepta en una pantalla.
+    """
+
+    def __init__(self, gamepad_controller, screen_recognizer, config_system=None, settings: Dict = None):
+        """
+        Inicializa el calibrador.
+
+        Args:
+            gamepad_controller: Controlador de gamepad
+            screen_recognizer: Reconocedor de pantalla (captura de fotogramas)
+            config_system: ConfigSystem donde guardar los resultados en el perfil activo
+            settings: Parámetros de la calibración (sobre DEFAULT_CALIBRATION)
+        """
+        self.gamepad = gamepad_controller
+        self.recognizer = screen_recognizer
+        self.config_system = config_system
+        self.settings = dict(DEFAULT_CALIBRATION)
+        self.settings.update(settings or {})
+        self.change_threshold = DEFAULT_CHANGE_THRESHOLD
+
+    def _settled_frame(self) -> Optional[np.ndarray]:
+        """Espera a que la pantalla deje de cambiar y devuelve la imagen estable."""
+        deadline = time.perf_counter() + self.settings['settle_timeout']
+        last = None
+        stable_since = time.perf_counter()
+        while time.perf_counter() < deadline:
+            frame = self.recognizer.capture_frame()
+            if frame is None:
+                return None
+            image = comparable_image(frame)
+            if last is None or frame_difference(image, last) > self.change_threshold:
+                last = image
+                stable_since = time.perf_counter()
+            elif time.perf_counter() - stable_since >= self.settings['settle_time']:
+                return image
+        logger.warning("La pantalla no se estabilizó durante la calibración")
+        return last
+
+    def _undo(self, undo: Sequence) -> None:
+        """Devuelve la pantalla al estado inicial."""
+        for button in undo:
+            self.gamepad.press_button(button, duration=self.settings['tap_duration'])
+            time.sleep(self.settings['settle_time'])
+
+    def probe(self, button, next_button, delay: float, reference: np.ndarray, undo: Sequence) -> bool:
+        """
+        Una prueba: pulsa `button`, espera `delay` desde el inicio de la pulsación y pulsa `next_button`.
+
+        Returns:
+            True si la segunda pulsación tuvo efecto (la pantalla final difiere de `reference`)
+        """
+        tap = self.settings['tap_duration']
+        start = time.perf_counter()
+        self.gamepad.press_button(button, duration=tap)
+        remaining = start + delay - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        self.gamepad.press_button(next_button, duration=tap)
+        final = self._settled_frame()
+        accepted = final is not None and frame_difference(final, reference) > self.change_threshold
+        # Si la segunda pulsación se perdió, basta con deshacer la primera
+        self._undo(undo if accepted else undo[-1:])
+        return accepted
+
+    def calibrate(self, state: str, button, next_button=None, undo: Sequence = None,
+                  save: bool = True) -> Optional[float]:
+        """
+        Busca el retardo mínimo entre `button` y la siguiente entrada en la pantalla `state`.
+
+        La pantalla debe estar en `state` al empezar; `undo` son los botones que la devuelven
+        a ese estado tras pulsar `button` y `next_button` (por defecto, la dirección opuesta de
+        la cruceta dos veces).
+
+        Args:
+            state: Estado de pantalla en el que se calibra
+            button: Botón (GamepadButton) cuya espera posterior se mide
+            next_button: Botón que se pulsa a continuación (por defecto, el mismo)
+            undo: Botones para volver al estado inicial tras cada prueba, en orden inverso
+                (el último deshace la pulsación de `button`)
+            save: Si True, guarda el resultado en el perfil activo
+
+        Returns:
+            Retardo calibrado en segundos (con margen) o None si no se pudo calibrar
+        """
+        next_button = next_button or button
+        if undo is None:
+            undo = self._default_undo(button, next_button)
+            if undo is None:
+                logger.error(f"No hay botones por defecto para deshacer {button.name}; indique 'undo'")
+                return None
+
+        start = self._settled_frame()
+        if start is None:
+            return None
+        # Referencia: la pantalla tras la primera pulsación sola
+        self.gamepad.press_button(button, duration=self.settings['tap_duration'])
+        reference = self._settled_frame()
+        self._undo(undo[-1:])
+        if reference is None or frame_difference(reference, start) <= self.change_threshold:
+            logger.error(f"Pulsar {button.name} no cambia la pantalla '{state}': no se puede calibrar")
+            return None
+
+        delay = self.settings['start_delay']
+        best = None
+        while delay >= self.settings['min_delay']:
+            results = []
+            for _ in range(self.settings['trials']):
+                results.append(self.probe(button, next_button, delay, reference, undo))
+                if frame_difference(self._settled_frame(), start) > self.change_threshold:
+                    logger.error("La pantalla no volvió al estado inicial tras la prueba; calibración abortada")
+                    return self._finish(state, button, best, save)
+                if not results[-1]:
+                    break
+            logger.info(f"{state} / {button.name}: retardo {delay * 1000:.0f} ms -> "
+                        f"{sum(results)}/{self.settings['trials']} aceptadas")
+            if not all(results) or len(results) < self.settings['trials']:
+                break
+            best = delay
+            delay *= self.settings['factor']
+        return self._finish(state, button, best, save)
+
+    def _finish(self, state: str, button, best: Optional[float], save: bool) -> Optional[float]:
+        """Aplica el margen, guarda el resultado y lo activa en el controlador."""
+        if best is None:
+            logger.warning(f"Ningún retardo probado fue aceptado en '{state}' para {button.name}")
+            return None
+        delay = round(best * self.settings['safety_margin'], 3)
+        logger.info(f"Retardo calibrado para {state} / {button.name}: {delay * 1000:.0f} ms")
+        self.gamepad.input_delays.setdefault(state, {})[button.name] = delay
+        if save and self.config_system is not None:
+            self.config_system.set_input_delay(state, button.name, delay)
+        return delay
+
+    @staticmethod
+    def _default_undo(button, next_button) -> Optional[List]:
+        """Dos pulsaciones de la dirección opuesta para los botones de la cruceta."""
+        from gamepad_controller import GamepadButton
+        opposite = {
+            GamepadButton.DPAD_UP: GamepadButton.DPAD_DOWN,
+            GamepadButton.DPAD_DOWN: GamepadButton.DPAD_UP,
+            GamepadButton.DPAD_LEFT: GamepadButton.DPAD_RIGHT,
+            GamepadButton.DPAD_RIGHT: GamepadButton.DPAD_LEFT,
+        }
+        if button not in opposite or next_button not in opposite:
+            return None
+        return [opposite[next_button], opposite[button]]
+
+
+def main(argv: List[str] = None) -> int:
+    """Calibra un par (estado, botón) desde la línea de comandos."""
+    from gamepad_controller import GamepadController, GamepadButton
+    from screen_recognizer import ScreenRecognizer
+    from config_system import ConfigSystem
+
+    parser = argparse.ArgumentParser(description="Calibración de retardos mínimos entre entradas")
+    parser.add_argument("state", help="Estado de pantalla en el que se calibra (debe estar visible)")
+    parser.add_argument("button", help="Botón cuya espera posterior se mide (p. ej. DPAD_DOWN)")
+    parser.add_argument("next_button", nargs="?", help="Botón pulsado a continuación (por defecto, el mismo)")
+    parser.add_argument("--undo", nargs="*", help="Botones que devuelven la pantalla al estado inicial")
+    parser.add_argument("--dry-run", action="store_true", help="No guardar el resultado en el perfil")
+    args = parser.parse_args(argv)
+
+    button = GamepadButton[args.button.upper()]
+    next_button = GamepadButton[args.next_button.upper()] if args.next_button else None
+    undo = [GamepadButton[name.upper()] for name in args.undo] if args.undo else None
+
+    recognizer = ScreenRecognizer()
+    calibrator = InputDelayCalibrator(GamepadController(), recognizer, ConfigSystem())
+    state = recognizer.recognize_screen_for_test()['state']
+    if state != args.state:
+        print(f"La pantalla actual es '{state}', no '{args.state}'")
+        return 1
+    delay = calibrator.calibrate(args.state, button, next_button, undo, save=not args.dry_run)
+    if delay is None:
+        print("No se pudo calibrar")
+        return 1
+    print(f"Retardo mínimo para {args.state} / {button.name}: {delay * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Entrada concurrente por carriles para el juego en partido.
+
+Los controles del mando se reparten en carriles independientes (stick izquierdo,
+stick derecho, botones frontales, botones superiores, gatillos y el resto). Un
+Behavior describe qué hace cada carril a partir de un instante común, por ejemplo
+"mantener RB + dirigir el stick izquierdo + pulsar A a los 0,8 s":
+
+    behavior = (Behavior()
+                .hold(GamepadButton.RB, 0.0, 1.5)
+                .steer("left", 0.0, 1.5, lambda t: (32767, int(-20000 * t)))
+                .tap(GamepadButton.A, 0.8))
+    lanes.play(behavior).result()
+
+InputLanes reproduce cada carril como una acción propia del InputScheduler del
+controlador. Todos los eventos caen en una rejilla de frecuencia fija (60 Hz por
+defecto), de modo que los cambios de los distintos carriles que coinciden en un
+tick se envían en un único informe. Cada carril ejecuta sus comportamientos en
+orden; los carriles libres aceptan otros comportamientos en paralelo.
+"""
+
+import math
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+from gamepad_controller import GamepadButton, STICK_CONTROLS
+
+logger = logging.getLogger('input_lanes')
+
+# Frecuencia de control por defecto (informes por segundo)
+DEFAULT_CONTROL_RATE = 60
+
+STICK_RANGE = (-32768, 32767)
+
+# Carril de cada control
+LANES = {
+    'left_stick': ("left_stick",),
+    'right_stick': ("right_stick",),
+    'face': (GamepadButton.A, GamepadButton.B, GamepadButton.X, GamepadButton.Y),
+    'shoulders': (GamepadButton.LB, GamepadButton.RB),
+    'triggers': ("left_trigger", "right_trigger", GamepadButton.LT, GamepadButton.RT),
+}
+OTHER_LANE = 'other'   # Cruceta, START/BACK y pulsación de sticks
+_LANE_OF = {control: lane for lane, controls in LANES.items() for control in controls}
+
+StickPath = Union[Tuple[int, int], Callable[[float], Tuple[int, int]]]
+
+
+def lane_of(control: Any) -> str:
+    """
+    Carril al que pertenece un control.
+
+    Args:
+        control: GamepadButton, "left_stick"/"right_stick" o "left_trigger"/"right_trigger"
+
+    Returns:
+        Nombre del carril
+    """
+    lane = _LANE_OF.get(control)
+    if lane is not None:
+        return lane
+    if isinstance(control, GamepadButton):
+        return OTHER_LANE
+    raise ValueError(f"Control no válido: {control}")
+
+
+def _clip_stick(value: Tuple[int, int]) -> Tuple[int, int]:
+    low, high = STICK_RANGE
+    return (min(high, max(low, int(value[0]))), min(high, max(low, int(value[1]))))
+
+
+class Behavior:
+    """
+    Descripción declarativa de entradas simultáneas, con desfases relativos al inicio.
+
+    Los métodos devuelven el propio Behavior para encadenarlos. Un mismo control no
+    puede tener dos usos solapados (se comprueba al compilar).
+    """
+
+    def __init__(self, name: str = "comportamiento"):
+        self.name = name
+        # (control, desde, duración, valor o función del tiempo, valor en reposo)
+        self._items: List[Tuple[Any, float, float, Any, Any]] = []
+
+    def hold(self, button: GamepadButton, at: float, duration: float) -> 'Behavior':
+        """Mantiene pulsado un botón `duration` segundos a partir de `at`."""
+        self._items.append((button, at, duration, True, False))
+        return self
+
+    def tap(self, button: GamepadButton, at: float = 0.0, duration: float = None) -> 'Behavior':
+        """Pulsación corta (por defecto, dos ticks de control) en `at`."""
+        self._items.append((button, at, duration, True, False))
+        return self
+
+    def steer(self, joystick: str, at: float, duration: float, path: StickPath) -> 'Behavior':
+        """
+        Mueve un stick durante `duration` segundos y lo devuelve al centro.
+
+        Args:
+            joystick: "left" o "right"
+            at: Desfase de inicio en segundos
+            duration: Duración en segundos
+            path: Posición (x, y) fija o función t -> (x, y), con t en segundos desde `at`,
+                que se muestrea en cada tick de control
+        """
+        if joystick.lower() not in ("left", "right"):
+            raise ValueError(f"Joystick no válido: {joystick}. Debe ser 'left' o 'right'")
+        self._items.append((f"{joystick.lower()}_stick", at, duration, path, (0, 0)))
+        return self
+
+    def trigger(self, trigger: str, at: float, duration: float, value: int = 255) -> 'Behavior':
+        """Aprieta un gatillo (0-255) durante `duration` segundos."""
+        if trigger.lower() not in ("left", "right"):
+            raise ValueError(f"Gatillo no válido: {trigger}. Debe ser 'left' o 'right'")
+        self._items.append((f"{trigger.lower()}_trigger", at, duration, value, 0))
+        return self
+
+    def compile(self, rate: int = DEFAULT_CONTROL_RATE) -> Dict[str, List[Tuple[float, Dict]]]:
+        """
+        Traduce el comportamiento a eventos por carril en la rejilla de control.
+
+        Args:
+            rate: Frecuencia de control (ticks por segundo)
+
+        Returns:
+            {carril: [(desfase en segundos, cambio de estado), ...]} con los desfases múltiplos de 1/rate
+        """
+        period = 1.0 / rate
+        ticks: Dict[str, Dict[int, Dict]] = {}
+        busy: Dict[Any, List[Tuple[int, int]]] = {}
+        for control, at, duration, value, rest in self._items:
+            start = int(round(at * rate))
+            length = 2 if duration is None else max(1, int(round(duration * rate)))
+            end = start + length
+            for other_start, other_end in busy.get(control, []):
+                # La suelta y la siguiente pulsación no pueden compartir tick
+                if start <= other_end and other_start <= end:
+                    raise ValueError(f"Usos solapados de {getattr(control, 'name', control)} en '{self.name}'")
+            busy.setdefault(control, []).append((start, end))
+
+            lane = ticks.setdefault(lane_of(control), {})
+            if callable(value):
+                previous = None
+                for tick in range(start, end):
+                    position = _clip_stick(value((tick - start) * period))
+                    if position != previous:
+                        lane.setdefault(tick, {})[control] = position
+                        previous = position
+            else:
+                lane.setdefault(start, {})[control] = _clip_stick(value) if control in STICK_CONTROLS else value
+            lane.setdefault(end, {})[control] = rest
+
+        return {lane: [(round(tick * period, 6), delta) for tick, delta in sorted(events.items())]
+                for lane, events in ticks.items()}
+
+    @property
+    def duration(self) -> float:
+        """Duración total en segundos (sin cuantizar)."""
+        return max((at + (duration or 0.0) for _, at, duration, _, _ in self._items), default=0.0)
+
+
+class InputLanes:
+    """
+    Reproduce comportamientos por carriles sobre el InputScheduler de un GamepadController
+    a frecuencia de control fija.
+    """
+
+    def __init__(self, gamepad_controller, rate: int = DEFAULT_CONTROL_RATE):
+        """
+        Inicializa los carriles.
+
+        Args:
+            gamepad_controller: Controlador cuyo planificador ejecuta los eventos
+            rate: Frecuencia de control en Hz (todos los eventos caen en su rejilla)
+        """
+        self.gamepad = gamepad_controller
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.origin = time.perf_counter()
+        self._busy_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _grid(self, instant: float) -> float:
+        """Primer tick de la rejilla no anterior a `instant`."""
+        return self.origin + math.ceil((instant - self.origin) / self.period - 1e-9) * self.period
+
+    def busy_until(self, lane: str) -> float:
+        """Instante (perf_counter) en que el carril queda libre."""
+        with self._lock:
+            return self._busy_until.get(lane, 0.0)
+
+    def play(self, behavior: Behavior, delay: float = 0.0) -> Future:
+        """
+        Encola un comportamiento sin bloquear.
+
+        Todos sus carriles empiezan en el mismo tick: el primero tras `delay` en que
+        estén libres todos los carriles que usa.
+
+        Args:
+            behavior: Comportamiento a reproducir
+            delay: Segundos desde ahora hasta el inicio más temprano
+
+        Returns:
+            Future que se completa (con el instante perf_counter del último evento)
+            cuando todos los carriles han terminado
+        """
+        lanes = behavior.compile(self.rate)
+        for events in lanes.values():
+            for _, delta in events:
+                self.gamepad.check_delta(delta)
+        with self._lock:
+            start = self._grid(max([time.perf_counter() + delay] +
+                                   [self._busy_until.get(lane, 0.0) for lane in lanes]))
+            futures = []
+            for lane, events in lanes.items():
+                futures.append(self.gamepad.scheduler.submit(events, start=start))
+                self._busy_until[lane] = start + events[-1][0] + self.period
+        logger.debug(f"'{behavior.name}' en carriles {sorted(lanes)} desde +{start - time.perf_counter():.3f} s")
+        return _gather(futures)
+
+    def play_all(self, behaviors: Sequence[Behavior]) -> Future:
+        """Encola varios comportamientos (cada uno espera a que sus carriles queden libres)."""
+        return _gather([self.play(behavior) for behavior in behaviors])
+
+    def idle(self) -> bool:
+        """Indica si ningún carril tiene entradas pendientes."""
+        now = time.perf_counter()
+        with self._lock:
+            return all(until <= now for until in self._busy_until.values())
+
+
+def _gather(futures: List[Future]) -> Future:
+    """Future que se completa cuando lo hacen todos los de la lista (resultado: el mayor)."""
+    combined = Future()
+    if not futures:
+        combined.set_result(time.perf_counter())
+        return combined
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        if combined.done():
+            return
+        errors = [f.exception() for f in futures if not f.cancelled() and f.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        elif any(f.cancelled() for f in futures):
+            combined.cancel()
+        else:
+            combined.set_result(max(f.result() for f in futures))
+
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
@@ -0,0 +1,386 @@
+"""
+Medición de la latencia entre entrada y pantalla (input-to-photon).
+
+LatencyMonitor se registra como observador de los informes del GamepadController
+(marca de tiempo perf_counter de cada informe enviado) y captura fotogramas en un
+hilo propio con una FrameSource independiente. Tras cada pulsación de un botón
+busca el primer fotograma que difiere del último capturado antes del informe; la
+diferencia entre ambos instantes es una muestra de latencia, que se acumula en
+histogramas por botón y por estado de pantalla. La resolución de cada muestra es
+el intervalo entre capturas.
+
+Los datos sirven para ajustar las esperas y los intervalos de sondeo, y para
+detectar cuándo el juego o la máquina se degradan bajo carga: si la mediana de
+las últimas muestras supera en `degradation_factor` a la mediana global se
+registra un aviso.
+
+Uso (mide un botón en la pantalla actual):
+    python input_latency.py <botón> [--count N] [--undo <botón> ...]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from frame_source import FrameSource, FramePool
+from input_calibration import comparable_image, frame_difference
+
+logger = logging.getLogger('input_latency')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(PROJECT_DIR, "config", "settings.yaml")
+
+DEFAULT_LATENCY_SETTINGS = {
+    'poll_interval': 0.0,         # Pausa entre capturas del monitor (0 = tan rápido como se pueda)
+    'downscale_width': 320,       # Ancho de la imagen reducida con la que se comparan fotogramas
+    'change_threshold': 4.0,      # Diferencia media de gris que cuenta como reacción
+    'timeout': 1.0,               # Segundos sin reacción tras los que la pulsación se descarta
+    'bin_width': 0.01,            # Anchura de las clases del histograma (segundos)
+    'max_latency': 1.0,           # Límite superior del histograma (las muestras mayores van a la última clase)
+    'recent_window': 20,          # Muestras recientes con las que se vigila la degradación
+    'degradation_factor': 1.5,    # Mediana reciente / mediana global a partir de la que se avisa
+    'report_file': os.path.join('logs', 'latency_report.json'),  # Relativo al proyecto
+}
+
+# Muestras que conserva cada histograma para calcular percentiles
+MAX_KEPT_SAMPLES = 10000
+
+
+def load_latency_settings() -> Dict:
+    """Carga la sección 'latency' de settings.yaml sobre los valores por defecto."""
+    settings = dict(DEFAULT_LATENCY_SETTINGS)
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+            for key, value in (data.get('latency') or {}).items():
+                if key in settings:
+                    settings[key] = value
+    except Exception as e:
+        logger.error(f"Error al cargar {SETTINGS_FILE}: {e}. Usando valores por defecto.")
+    return settings
+
+
+class LatencyHistogram:
+    """Histograma de latencias con clases de anchura fija y percentiles sobre las últimas muestras."""
+
+    def __init__(self, bin_width: float = 0.01, max_latency: float = 1.0):
+        """
+        Inicializa el histograma.
+
+        Args:
+            bin_width: Anchura de cada clase en segundos
+            max_latency: Límite superior; las muestras mayores se cuentan en la última clase
+        """
+        self.bin_width = bin_width
+        self.counts = np.zeros(max(1, int(np.ceil(max_latency / bin_width))), dtype=np.int64)
+        self.samples = deque(maxlen=MAX_KEPT_SAMPLES)
+        self.timeouts = 0
+
+    @property
+    def count(self) -> int:
+        """Número total de muestras."""
+        return int(self.counts.sum())
+
+    def add(self, latency: float) -> None:
+        """Añade una muestra (segundos)."""
+        index = min(int(latency / self.bin_width), len(self.counts) - 1)
+        self.counts[max(0, index)] += 1
+        self.samples.append(latency)
+
+    def percentile(self, q: float, last: int = None) -> Optional[float]:
+        """
+        Percentil de las muestras conservadas.
+
+        Args:
+            q: Percentil (0-100)
+            last: Si se indica, sólo se usan las últimas `last` muestras
+
+        Returns:
+            Latencia en segundos o None si no hay muestras
+        """
+        if not self.samples:
+            return None
+        samples = list(self.samples)[-last:] if last else self.samples
+        return float(np.percentile(np.fromiter(samples, dtype=np.float64), q))
+
+    def to_dict(self) -> Dict:
+        """Resumen serializable (milisegundos)."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+        return {
+            'count': self.count,
+            'timeouts': self.timeouts,
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(max(self.samples) if self.samples else None),
+            'bin_width_ms': self.bin_width * 1000,
+            'counts': self.counts.tolist(),
+        }
+
+    def format(self, width: int = 40) -> str:
+        """Histograma en texto (sólo las clases entre la primera y la última no vacías)."""
+        used = np.nonzero(self.counts)[0]
+        if len(used) == 0:
+            return "  (sin muestras)"
+        peak = self.counts.max()
+        lines = []
+        for index in range(used[0], used[-1] + 1):
+            low = index * self.bin_width * 1000
+            bar = '#' * int(round(width * self.counts[index] / peak))
+            suffix = '+' if index == len(self.counts) - 1 else ''
+            lines.append(f"  {low:6.0f}{suffix:1} ms | {bar} {self.counts[index]}")
+        return "\n".join(lines)
+
+
+class _Stimulus:
+    """Pulsación pendiente de la primera reacción en pantalla."""
+
+    __slots__ = ('timestamp', 'button', 'state', 'baseline')
+
+    def __init__(self, timestamp: float, button: str, state: str, baseline: np.ndarray):
+        self.timestamp = timestamp
+        self.button = button
+        self.state = state
+        self.baseline = baseline
+
+
+class LatencyMonitor:
+    """
+    Mide la latencia entre cada pulsación enviada y el primer fotograma en que cambia la pantalla.
+
+    Sólo hay una pulsación en medida a la vez: si llega otra antes de que la pantalla
+    reaccione, la anterior se descarta (no se puede saber a cuál corresponde el cambio).
+    """
+
+    def __init__(self, gamepad_controller, region: Dict[str, int] = None,
+                 state_provider: Callable[[], str] = None, settings: Dict = None):
+        """
+        Inicializa el monitor (la medición empieza con start()).
+
+        Args:
+            gamepad_controller: Controlador cuyos informes se observan
+            region: Región de captura (formato mss); normalmente la del ScreenRecognizer
+            state_provider: Función que devuelve el estado de pantalla actual
+                (por ejemplo, lambda: recognizer.current_state)
+            settings: Parámetros (sobre la sección 'latency' de settings.yaml)
+        """
+        self.gamepad = gamepad_controller
+        self.state_provider = state_provider or (lambda: 'unknown')
+        self.settings = load_latency_settings()
+        self.settings.update(settings or {})
+        # Fuente propia: sus buffers no interfieren con los del reconocedor
+        self.frame_source = FrameSource(region=region, pool=FramePool(),
+                                        downscale_width=self.settings['downscale_width'])
+        self.by_button: Dict[str, LatencyHistogram] = defaultdict(self._new_histogram)
+        self.by_state: Dict[str, LatencyHistogram] = defaultdict(self._new_histogram)
+        self.overall = self._new_histogram()
+        self.superseded = 0
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._last_image: Optional[np.ndarray] = None
+        self._pending: Optional[_Stimulus] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._degraded = False
+
+    def _new_histogram(self) -> LatencyHistogram:
+        return LatencyHistogram(self.settings['bin_width'], self.settings['max_latency'])
+
+    @property
+    def running(self) -> bool:
+        """Indica si el hilo de captura está activo."""
+        return self._running
+
+    def start(self) -> None:
+        """Empieza a observar los informes y a capturar fotogramas."""
+        if self._running:
+            return
+        self._running = True
+        self.gamepad.report_listeners.append(self._on_report)
+        self._thread = threading.Thread(target=self._run, name='LatencyMonitor', daemon=True)
+        self._thread.start()
+        logger.info("Monitor de latencia iniciado")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Deja de observar y detiene el hilo de captura."""
+        if not self._running:
+            return
+        self._running = False
+        if self._on_report in self.gamepad.report_listeners:
+            self.gamepad.report_listeners.remove(self._on_report)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Monitor de latencia detenido")
+
+    def _on_report(self, timestamp: float, changes: Dict) -> None:
+        """Observador de informes: registra la primera pulsación de botón del informe."""
+        button = next((control for control, value in changes.items()
+                       if hasattr(control, 'name') and value is True), None)
+        if button is None:
+            return
+        state = self.state_provider() or 'unknown'
+        with self._lock:
+            if self._last_image is None:
+                return
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = _Stimulus(timestamp, button.name, state, self._last_image)
+
+    def _run(self) -> None:
+        """Bucle del hilo: captura fotogramas y los compara con la pulsación pendiente."""
+        try:
+            while self._running:
+                frame = self.frame_source.grab()
+                if frame is None:
+                    time.sleep(0.1)
+                    continue
+                self.observe(comparable_image(frame), frame.timestamp)
+                if self.settings['poll_interval'] > 0:
+                    time.sleep(self.settings['poll_interval'])
+        finally:
+            self.frame_source.close()
+
+    def observe(self, image: np.ndarray, timestamp: float) -> Optional[float]:
+        """
+        Procesa un fotograma capturado en `timestamp` (perf_counter).
+
+        Args:
+            image: Imagen comparable del fotograma (se conserva: no debe reutilizarse)
+            timestamp: Instante de la captura
+
+        Returns:
+            Latencia medida con este fotograma o None
+        """
+        latency = None
+        with self._lock:
+            self.frames += 1
+            stimulus = self._pending
+            if stimulus is not None and timestamp > stimulus.timestamp:
+                elapsed = timestamp - stimulus.timestamp
+                if frame_difference(image, stimulus.baseline) > self.settings['change_threshold']:
+                    latency = elapsed
+                    self._pending = None
+                elif elapsed > self.settings['timeout']:
+                    self._pending = None
+                    for histogram in (self.by_button[stimulus.button], self.by_state[stimulus.state], self.overall):
+                        histogram.timeouts += 1
+                if latency is not None:
+                    self._record(stimulus, latency)
+            self._last_image = image
+        return latency
+
+    def _record(self, stimulus: _Stimulus, latency: float) -> None:
+        """Añade una muestra a los histogramas y vigila la degradación (con el cerrojo tomado)."""
+        self.by_button[stimulus.button].add(latency)
+        self.by_state[stimulus.state].add(latency)
+        self.overall.add(latency)
+        logger.debug(f"Latencia {stimulus.button} en '{stimulus.state}': {latency * 1000:.0f} ms")
+
+        window = self.settings['recent_window']
+        if self.overall.count < 2 * window:
+            return
+        recent = self.overall.percentile(50, last=window)
+        typical = self.overall.percentile(50)
+        degraded = recent > typical * self.settings['degradation_factor']
+        if degraded and not self._degraded:
+            logger.warning(f"Latencia degradada: mediana de las últimas {window} pulsaciones "
+                           f"{recent * 1000:.0f} ms frente a {typical * 1000:.0f} ms habitual")
+        elif self._degraded and not degraded:
+            logger.info(f"Latencia recuperada: mediana reciente {recent * 1000:.0f} ms")
+        self._degraded = degraded
+
+    def summary(self) -> Dict:
+        """Resumen serializable por botón y por estado de pantalla."""
+        with self._lock:
+            return {
+                'overall': self.overall.to_dict(),
+                'by_button': {name: h.to_dict() for name, h in sorted(self.by_button.items())},
+                'by_state': {name: h.to_dict() for name, h in sorted(self.by_state.items())},
+                'superseded': self.superseded,
+                'frames': self.frames,
+            }
+
+    def format_report(self) -> str:
+        """Informe en texto con un histograma por botón y por estado."""
+        lines = ["=== LATENCIA ENTRADA -> PANTALLA ==="]
+        with self._lock:
+            for title, histograms in (("Botón", self.by_button), ("Pantalla", self.by_state)):
+                for name, histogram in sorted(histograms.items()):
+                    data = histogram.to_dict()
+                    lines.append(f"{title} {name}: {data['count']} muestras, p50 {data['p50_ms']} ms, "
+                                 f"p90 {data['p90_ms']} ms, sin reacción {data['timeouts']}")
+                    lines.append(histogram.format())
+            lines.append(f"Pulsaciones descartadas por solaparse: {self.superseded}")
+        return "\n".join(lines)
+
+    def save(self, path: str = None) -> str:
+        """
+        Guarda el resumen en JSON.
+
+        Args:
+            path: Ruta del informe (por defecto, `report_file` relativo al proyecto)
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        path = path or os.path.join(PROJECT_DIR, self.settings['report_file'])
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        logger.info(f"Informe de latencia guardado en {path}")
+        return path
+
+
+def main(argv: List[str] = None) -> int:
+    """Mide la latencia de un botón en la pantalla actual desde la línea de comandos."""
+    from gamepad_controller import GamepadController, GamepadButton
+    from screen_recognizer import ScreenRecognizer
+
+    parser = argparse.ArgumentParser(description="Medición de latencia entre entrada y pantalla")
+    parser.add_argument("button", help="Botón a medir (p. ej. DPAD_DOWN)")
+    parser.add_argument("--count", type=int, default=20, help="Número de pulsaciones (default: 20)")
+    parser.add_argument("--undo", nargs="*", help="Botones que devuelven la pantalla al estado inicial")
+    parser.add_argument("--wait", type=float, default=1.0, help="Segundos entre pulsaciones (default: 1.0)")
+    parser.add_argument("--save", action="store_true", help="Guardar el informe JSON")
+    args = parser.parse_args(argv)
+
+    button = GamepadButton[args.button.upper()]
+    undo = [GamepadButton[name.upper()] for name in args.undo] if args.undo else []
+
+    recognizer = ScreenRecognizer()
+    state = recognizer.recognize_screen_for_test()['state']
+    gamepad = GamepadController()
+    monitor = LatencyMonitor(gamepad, recognizer.frame_source.region, lambda: state)
+    monitor.start()
+    try:
+        time.sleep(0.2)
+        for _ in range(args.count):
+            gamepad.press_button(button, duration=0.05)
+            time.sleep(args.wait)
+            for undo_button in undo:
+                gamepad.press_button(undo_button, duration=0.05)
+                time.sleep(args.wait)
+    finally:
+        monitor.stop()
+        gamepad.close()
+    print(monitor.format_report())
+    if args.save:
+        print(f"Informe guardado en {monitor.save()}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
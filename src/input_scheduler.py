@@ -0,0 +1,256 @@
+"""
+Planificador de entradas temporizadas para el gamepad virtual.
+
+Las pulsaciones, sueltas y movimientos de ejes se encolan como eventos con una
+marca de tiempo absoluta de time.perf_counter() en una cola de prioridad. Un hilo
+dedicado los ejecuta en su instante, de modo que quien los encola no se bloquea:
+se puede pedir un acorde, mantener el stick y pulsar un botón a la vez mientras se
+siguen reconociendo fotogramas. Cada acción encolada devuelve un Future que se
+completa cuando se ha ejecutado su último evento.
+
+Cada evento es un cambio de estado del mando (ver GamepadController.apply). Los
+eventos que vencen dentro del mismo tick se fusionan y se envían en un único
+informe, salvo que dos de ellos toquen el mismo control (una pulsación y su
+suelta nunca se anulan en el mismo informe).
+"""
+
+import heapq
+import time
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('input_scheduler')
+
+# Margen (segundos) antes de cada evento en el que el hilo deja de dormir y espera
+# activamente: la resolución de sleep/wait en Windows ronda 1-15 ms
+DEFAULT_SPIN_MARGIN = 0.002
+
+# Ventana (segundos) dentro de la cual los eventos se envían en el mismo informe
+DEFAULT_TICK = 0.001
+
+StateDelta = Dict[Any, Any]
+
+
+class _Action:
+    """Grupo de eventos encolados juntos y el Future que los representa."""
+
+    __slots__ = ('future', 'remaining', 'started')
+
+    def __init__(self, future: Future, remaining: int):
+        self.future = future
+        self.remaining = remaining
+        self.started = False
+
+
+class InputScheduler:
+    """
+    Ejecuta en un hilo propio eventos de entrada programados en instantes absolutos.
+
+    Los eventos son cambios de estado del mando (control -> valor) que se entregan a la
+    función `apply` (normalmente GamepadController.apply). Una acción es una lista de
+    eventos con su desfase respecto al instante de inicio; su Future se puede cancelar
+    mientras no se haya ejecutado el primer evento. Una vez empezada, la acción se
+    completa siempre, para no dejar botones pulsados.
+    """
+
+    def __init__(self, apply: Callable[[StateDelta], None], tick: float = DEFAULT_TICK,
+                 spin_margin: float = DEFAULT_SPIN_MARGIN):
+        """
+        Inicializa el planificador (el hilo se arranca con start()).
+
+        Args:
+            apply: Función que aplica un cambio de estado y envía un informe
+            tick: Ventana en segundos para fusionar eventos en un mismo informe
+            spin_margin: Segundos de espera activa antes de cada evento
+        """
+        self.apply = apply
+        self.tick = tick
+        self.spin_margin = spin_margin
+        self._queue: List[Tuple[float, int, _Action, StateDelta]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._busy = False   # Hay eventos extraídos de la cola pendientes de ejecutar
+        # Estadísticas de puntualidad
+        self.executed = 0
+        self.reports = 0
+        self.max_lateness = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Indica si el hilo del planificador está activo."""
+        return self._running
+
+    @property
+    def pending(self) -> int:
+        """Número de eventos en cola."""
+        with self._cond:
+            return len(self._queue)
+
+    def start(self) -> None:
+        """Arranca el hilo del planificador si no está en marcha."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='InputScheduler', daemon=True)
+            self._thread.start()
+        logger.debug("Planificador de entradas iniciado")
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        Detiene el hilo. Las acciones no empezadas se cancelan y las ya empezadas
+        ejecutan inmediatamente el resto de sus eventos (sueltas incluidas).
+
+        Args:
+            timeout: Segundos máximos de espera al hilo
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            queue = sorted(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        started = []
+        for event in queue:
+            if event[2].started:
+                started.append(event)
+            else:
+                event[2].future.cancel()
+        for event in started:
+            self._execute([event])
+        logger.debug("Planificador de entradas detenido")
+
+    def submit(self, events: Sequence[Tuple[float, StateDelta]], start: float = None) -> Future:
+        """
+        Encola una acción.
+
+        Args:
+            events: Lista de (desfase en segundos desde el inicio, cambio de estado)
+            start: Instante de inicio en time.perf_counter(); por defecto, ahora
+
+        Returns:
+            Future que se completa con el instante (perf_counter) del último evento
+        """
+        future = Future()
+        if not events:
+            future.set_result(time.perf_counter())
+            return future
+        if not self._running:
+            self.start()
+        start = time.perf_counter() if start is None else start
+        action = _Action(future, len(events))
+        with self._cond:
+            for offset, delta in events:
+                heapq.heappush(self._queue, (start + offset, next(self._counter), action, delta))
+            self._cond.notify()
+        return future
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Espera a que la cola se vacíe.
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            bool: True si la cola quedó vacía
+        """
+        end = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if end is None else end - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _pop_due(self) -> Optional[List[Tuple[float, int, _Action, StateDelta]]]:
+        """
+        Extrae el siguiente grupo de eventos vencidos que cabe en un informe: los que vencen
+        dentro del mismo tick y no repiten control. Duerme hasta que falte menos que el
+        margen para el siguiente evento.
+
+        Returns:
+            Lista de eventos a ejecutar (vacía si hay que esperar activamente) o None al detenerse
+        """
+        with self._cond:
+            while True:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return None
+                remaining = self._queue[0][0] - time.perf_counter()
+                if remaining <= self.spin_margin:
+                    break
+                self._cond.wait(remaining - self.spin_margin)
+            if remaining > 0:
+                return []
+            limit = self._queue[0][0] + self.tick
+            due = []
+            controls = set()
+            while self._queue and self._queue[0][0] < limit:
+                delta = self._queue[0][3]
+                if not controls.isdisjoint(delta):
+                    break
+                controls.update(delta)
+                due.append(heapq.heappop(self._queue))
+            self._busy = True
+            return due
+
+    def _run(self) -> None:
+        """Bucle del hilo: espera al siguiente evento y lo ejecuta."""
+        while True:
+            due = self._pop_due()
+            if due is None:
+                return
+            if not due:
+                # Espera activa durante el margen final
+                with self._cond:
+                    deadline = self._queue[0][0] if self._queue else 0.0
+                while time.perf_counter() < deadline:
+                    pass
+                continue
+            self._execute(due)
+            with self._cond:
+                self._busy = False
+                if not self._queue:
+                    self._cond.notify_all()
+
+    def _execute(self, events: List[Tuple[float, int, _Action, StateDelta]]) -> None:
+        """Envía en un único informe los eventos de un grupo y completa los Future terminados."""
+        merged: StateDelta = {}
+        actions = []
+        for deadline, _, action, delta in events:
+            if not action.started:
+                if action.future.cancelled() or not action.future.set_running_or_notify_cancel():
+                    continue
+                action.started = True
+            merged.update(delta)
+            actions.append(action)
+        if not actions:
+            return
+        error = None
+        try:
+            self.apply(merged)
+        except Exception as e:
+            logger.error(f"Error al aplicar un evento de entrada: {e}")
+            error = e
+        now = time.perf_counter()
+        self.executed += len(actions)
+        self.reports += 1
+        self.max_lateness = max(self.max_lateness, now - events[0][0])
+        for action in actions:
+            if error is not None and not action.future.done():
+                action.future.set_exception(error)
+            action.remaining -= 1
+            if action.remaining == 0 and not action.future.done():
+                action.future.set_result(now)
@@ -0,0 +1,367 @@
+"""
+Grabación y reproducción de sesiones del gamepad con informe de fidelidad temporal.
+
+TraceRecorder envuelve el backend de un GamepadController (vgamepad o cualquier
+otro): reenvía cada cambio al backend real y, tras cada informe, guarda el estado
+completo del mando, su instante perf_counter y el número de secuencia del último
+fotograma capturado. Los registros (SESSION_DTYPE: REPORT_DTYPE + frame_seq, 30
+bytes) se acumulan en un array estructurado de NumPy y se guardan por columnas en
+un .npz comprimido, de modo que una sesión de horas ocupa pocos MB y se carga de
+una vez.
+
+replay_trace reproduce una grabación con un InputScheduler propio (un informe por
+registro, con espera activa final) y timing_report compara los instantes
+reproducidos con los grabados: error por informe, deriva (pendiente del error a lo
+largo de la sesión) y jitter (dispersión del error sin la deriva y de los
+intervalos entre informes).
+
+Uso:
+    python input_trace.py info <grabación.npz>
+    python input_trace.py replay <grabación.npz> [--speed 1.0] [--report informe.json]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gamepad_backends import BUTTON_NAMES, REPORT_DTYPE, RecorderBackend
+from input_scheduler import InputScheduler
+
+logger = logging.getLogger('input_trace')
+
+# Registro de una sesión: el informe completo y el último fotograma capturado (-1 si no hay)
+SESSION_DTYPE = np.dtype(REPORT_DTYPE.descr + [('frame_seq', '<i8')])
+
+# Registros reservados al empezar (el buffer se duplica al llenarse)
+INITIAL_CAPACITY = 4096
+
+# Margen de espera activa del planificador de reproducción (segundos)
+REPLAY_SPIN_MARGIN = 0.003
+
+
+class TraceRecorder(RecorderBackend):
+    """
+    Backend que envuelve a otro y graba cada informe enviado con el fotograma en curso.
+
+    El estado del mando se mantiene como en RecorderBackend; los informes no se escriben
+    en una traza propia sino en un array SESSION_DTYPE que se guarda con save().
+    """
+
+    def __init__(self, backend, frame_seq: Callable[[], int] = None, path: Optional[str] = None):
+        """
+        Inicializa el grabador.
+
+        Args:
+            backend: Backend real al que se reenvían los cambios (GamepadBackend)
+            frame_seq: Función que devuelve el número de secuencia del último fotograma
+                (por ejemplo, lambda: recognizer.frame_source.seq)
+            path: Archivo .npz donde se guarda la grabación al cerrar (None = no se guarda)
+        """
+        super().__init__()
+        self.backend = backend
+        self.button_mapping = backend.button_mapping
+        self.frame_seq = frame_seq
+        self.path = path
+        self._records = np.zeros(INITIAL_CAPACITY, dtype=SESSION_DTYPE)
+        self._count = 0
+        self.started = time.time()
+
+    def set_button(self, name: str, pressed: bool) -> None:
+        super().set_button(name, pressed)
+        self.backend.set_button(name, pressed)
+
+    def set_stick(self, side: str, x_value: int, y_value: int) -> None:
+        super().set_stick(side, x_value, y_value)
+        self.backend.set_stick(side, x_value, y_value)
+
+    def set_trigger(self, side: str, value: int) -> None:
+        super().set_trigger(side, value)
+        self.backend.set_trigger(side, value)
+
+    def update(self) -> None:
+        self.backend.update()
+        timestamp = time.perf_counter()
+        frame_seq = -1
+        if self.frame_seq is not None:
+            try:
+                frame_seq = int(self.frame_seq())
+            except Exception:
+                frame_seq = -1
+        with self._lock:
+            if self._count == len(self._records):
+                self._records = np.resize(self._records, 2 * len(self._records))
+            self._records[self._count] = (timestamp, self.button_bits(), *self.sticks['left'],
+                                          *self.sticks['right'], self.triggers['left'],
+                                          self.triggers['right'], frame_seq)
+            self._count += 1
+            self.report_count += 1
+
+    def as_array(self) -> np.ndarray:
+        """Registros grabados hasta ahora (copia, SESSION_DTYPE)."""
+        with self._lock:
+            return self._records[:self._count].copy()
+
+    def save(self, path: str = None) -> Optional[str]:
+        """
+        Guarda la grabación (ver save_trace).
+
+        Returns:
+            Ruta del archivo escrito o None si no hay ruta
+        """
+        path = path or self.path
+        if not path:
+            return None
+        return save_trace(path, self.as_array(), {'started': self.started,
+                                                  'backend': type(self.backend).__name__})
+
+    def close(self) -> None:
+        if self.path:
+            self.save()
+        self.backend.close()
+
+
+def save_trace(path: str, records: np.ndarray, meta: Dict = None) -> str:
+    """
+    Guarda registros SESSION_DTYPE por columnas en un .npz comprimido.
+
+    Args:
+        path: Archivo de destino (se añade .npz si falta)
+        records: Array SESSION_DTYPE
+        meta: Metadatos serializables en JSON
+
+    Returns:
+        Ruta del archivo escrito
+    """
+    if not path.endswith('.npz'):
+        path += '.npz'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    meta = dict(meta or {})
+    meta.update({'format': 'gamepad_session', 'clock': 'perf_counter', 'buttons': list(BUTTON_NAMES)})
+    columns = {name: np.ascontiguousarray(records[name]) for name in SESSION_DTYPE.names}
+    np.savez_compressed(path, meta=np.array(json.dumps(meta)), **columns)
+    logger.info(f"Grabación guardada en {path} ({len(records)} informes)")
+    return path
+
+
+def load_trace(path: str) -> Tuple[np.ndarray, Dict]:
+    """
+    Carga una grabación guardada con save_trace.
+
+    Returns:
+        (array SESSION_DTYPE, metadatos)
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        records = np.empty(len(data['t']), dtype=SESSION_DTYPE)
+        for name in SESSION_DTYPE.names:
+            records[name] = data[name]
+    return records, meta
+
+
+def trace_events(records: np.ndarray, speed: float = 1.0) -> List[Tuple[float, Dict]]:
+    """
+    Traduce registros a eventos (desfase desde el primero, cambio de estado) para el planificador.
+
+    Cada evento contiene sólo los controles que cambian respecto al registro anterior
+    (el primero, el estado completo); un registro sin cambios da un evento vacío, que
+    también envía un informe.
+    """
+    from gamepad_controller import GamepadButton
+
+    events = []
+    if len(records) == 0:
+        return events
+    previous = None
+    origin = records['t'][0]
+    for record in records:
+        delta = {}
+        for bit, name in enumerate(BUTTON_NAMES):
+            pressed = bool(record['buttons'] >> bit & 1)
+            if previous is None or pressed != bool(previous['buttons'] >> bit & 1):
+                delta[GamepadButton(name)] = pressed
+        for control, x, y in (("left_stick", 'lx', 'ly'), ("right_stick", 'rx', 'ry')):
+            if previous is None or (record[x], record[y]) != (previous[x], previous[y]):
+                delta[control] = (int(record[x]), int(record[y]))
+        for control, field in (("left_trigger", 'lt'), ("right_trigger", 'rt')):
+            if previous is None or record[field] != previous[field]:
+                delta[control] = int(record[field])
+        events.append((float(record['t'] - origin) / speed, delta))
+        previous = record
+    return events
+
+
+def replay_trace(gamepad_controller, records: np.ndarray, speed: float = 1.0,
+                 frame_seq: Callable[[], int] = None, lead_time: float = 0.1) -> Tuple[np.ndarray, float]:
+    """
+    Reproduce una grabación en un GamepadController y mide cuándo salió cada informe.
+
+    Usa un InputScheduler propio con una ventana de fusión mínima, de modo que cada
+    registro genera exactamente un informe en su instante.
+
+    Args:
+        gamepad_controller: Controlador en el que se reproduce
+        records: Array SESSION_DTYPE
+        speed: Factor de velocidad (2.0 = el doble de rápido)
+        frame_seq: Función que devuelve el último fotograma capturado durante la reproducción
+        lead_time: Segundos entre la preparación y el primer informe
+
+    Returns:
+        (array SESSION_DTYPE con los informes reproducidos (instante real y fotograma),
+         instante previsto del primer informe)
+    """
+    events = trace_events(records, speed)
+    replayed = np.zeros(len(events), dtype=SESSION_DTYPE)
+    count = [0]
+
+    def on_report(timestamp, changes):
+        index = count[0]
+        if index < len(replayed):
+            replayed[index]['t'] = timestamp
+            replayed[index]['frame_seq'] = frame_seq() if frame_seq is not None else -1
+        count[0] += 1
+
+    scheduler = InputScheduler(gamepad_controller.apply, tick=1e-9, spin_margin=REPLAY_SPIN_MARGIN)
+    scheduler.start()
+    gamepad_controller.report_listeners.append(on_report)
+    try:
+        start = time.perf_counter() + lead_time
+        future = scheduler.submit(events, start=start)
+        future.result()
+    finally:
+        gamepad_controller.report_listeners.remove(on_report)
+        scheduler.stop()
+    if count[0] != len(events):
+        logger.warning(f"Se esperaban {len(events)} informes y se enviaron {count[0]}")
+    for name in SESSION_DTYPE.names:
+        if name not in ('t', 'frame_seq'):
+            replayed[name] = records[name]
+    return replayed, start
+
+
+def timing_report(recorded: np.ndarray, replayed: np.ndarray, speed: float = 1.0,
+                  replay_start: float = None) -> Dict:
+    """
+    Compara los instantes reproducidos con los grabados.
+
+    Args:
+        recorded: Registros de la grabación
+        replayed: Registros devueltos por replay_trace
+        speed: Factor de velocidad usado al reproducir
+        replay_start: Instante previsto del primer informe (por defecto, el primero reproducido)
+
+    Returns:
+        Diccionario con número de informes, error (ms: media, p50, p99, máximo absoluto),
+        deriva (ms por minuto y error final), jitter (ms, sin deriva) e intervalos entre informes
+    """
+    n = min(len(recorded), len(replayed))
+    if n < 2:
+        return {'reports': n}
+    expected = (recorded['t'][:n] - recorded['t'][0]) / speed
+    origin = replayed['t'][0] if replay_start is None else replay_start
+    actual = replayed['t'][:n] - origin
+    error = (actual - expected) * 1000
+
+    slope, intercept = np.polyfit(expected, error, 1)
+    jitter = error - (slope * expected + intercept)
+    interval_error = np.diff(actual) * 1000 - np.diff(expected) * 1000
+
+    report = {
+        'reports': int(n),
+        'duration_s': round(float(expected[-1]), 3),
+        'error_ms': {
+            'mean': round(float(error.mean()), 3),
+            'p50': round(float(np.percentile(error, 50)), 3),
+            'p99': round(float(np.percentile(error, 99)), 3),
+            'max_abs': round(float(np.abs(error).max()), 3),
+        },
+        'drift_ms_per_min': round(float(slope * 60), 3),
+        'final_error_ms': round(float(error[-1]), 3),
+        'jitter_ms': {
+            'std': round(float(jitter.std()), 3),
+            'p99_abs': round(float(np.percentile(np.abs(jitter), 99)), 3),
+        },
+        'interval_error_ms': {
+            'p50_abs': round(float(np.percentile(np.abs(interval_error), 50)), 3),
+            'p99_abs': round(float(np.percentile(np.abs(interval_error), 99)), 3),
+            'max_abs': round(float(np.abs(interval_error).max()), 3),
+        },
+    }
+    rec_frames = recorded['frame_seq'][:n]
+    rep_frames = replayed['frame_seq'][:n]
+    if (rec_frames >= 0).all() and (rep_frames >= 0).all():
+        frame_offset = (rep_frames - rep_frames[0]) - (rec_frames - rec_frames[0])
+        report['frame_offset'] = {
+            'p50': float(np.percentile(frame_offset, 50)),
+            'max_abs': int(np.abs(frame_offset).max()),
+        }
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Informe de fidelidad en texto."""
+    if report.get('reports', 0) < 2:
+        return "Grabación demasiado corta para evaluar la reproducción"
+    error, jitter, interval = report['error_ms'], report['jitter_ms'], report['interval_error_ms']
+    lines = [
+        "=== FIDELIDAD DE LA REPRODUCCIÓN ===",
+        f"Informes: {report['reports']} en {report['duration_s']:.1f} s",
+        f"Error: media {error['mean']:.3f} ms, p50 {error['p50']:.3f} ms, p99 {error['p99']:.3f} ms, "
+        f"máximo {error['max_abs']:.3f} ms",
+        f"Deriva: {report['drift_ms_per_min']:.3f} ms/min (error final {report['final_error_ms']:.3f} ms)",
+        f"Jitter: desviación {jitter['std']:.3f} ms, p99 {jitter['p99_abs']:.3f} ms",
+        f"Intervalos: p50 {interval['p50_abs']:.3f} ms, p99 {interval['p99_abs']:.3f} ms, "
+        f"máximo {interval['max_abs']:.3f} ms",
+    ]
+    if 'frame_offset' in report:
+        lines.append(f"Desfase de fotogramas: p50 {report['frame_offset']['p50']:.0f}, "
+                     f"máximo {report['frame_offset']['max_abs']}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    """Muestra o reproduce una grabación desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Grabaciones de sesiones del gamepad")
+    subparsers = parser.add_subparsers(dest="command")
+    info_parser = subparsers.add_parser("info", help="Resumen de una grabación")
+    info_parser.add_argument("path", help="Archivo .npz")
+    replay_parser = subparsers.add_parser("replay", help="Reproducir una grabación y medir su fidelidad")
+    replay_parser.add_argument("path", help="Archivo .npz")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Factor de velocidad (default: 1.0)")
+    replay_parser.add_argument("--gamepad", type=str, default=None,
+                               help="Tipo de gamepad en el que reproducir (default: gamepad.type de settings.yaml)")
+    replay_parser.add_argument("--report", type=str, help="Guardar el informe de fidelidad en JSON")
+    args = parser.parse_args(argv)
+
+    if args.command not in ("info", "replay"):
+        parser.print_help()
+        return 1
+    records, meta = load_trace(args.path)
+    duration = float(records['t'][-1] - records['t'][0]) if len(records) else 0.0
+    print(f"{args.path}: {len(records)} informes, {duration:.1f} s, backend {meta.get('backend', '?')}")
+    if args.command == "info":
+        return 0
+
+    from gamepad_controller import GamepadController, GamepadType
+    gamepad = GamepadController(GamepadType(args.gamepad) if args.gamepad else None)
+    try:
+        replayed, start = replay_trace(gamepad, records, args.speed)
+    finally:
+        gamepad.close()
+    report = timing_report(records, replayed, args.speed, start)
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Informe guardado en {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
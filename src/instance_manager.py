@@ -0,0 +1,139 @@
+"""
+Gestor de varias instancias del juego en la misma máquina.
+
+Cada instancia es una EFootballAutomation con su propio gamepad virtual y un
+ScreenRecognizer limitado a su monitor o a la región de su ventana. Las
+plantillas, mappings y comparadores se cargan una sola vez (en la primera
+instancia) y el resto los comparte; las regiones OCR se desplazan a la vista de
+cada instancia. Cada instancia ejecuta su flujo en un hilo propio, de modo que
+el rendimiento crece con el número de instancias. El catálogo de jugadores, el
+informe de latencia y la traza del backend de grabación llevan el nombre de la
+instancia (cada juego tiene sus listas).
+
+Las instancias se describen en la sección 'instances' de settings.yaml:
+
+    instances:
+      - name: izquierda
+        monitor: 1
+      - name: derecha
+        region: {left: 1920, top: 0, width: 1920, height: 1080}
+        gamepad: xbox360
+
+Cada juego debe quedarse con su propio mando virtual (el orden en que se crean
+los mandos es el de la lista).
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+logger = logging.getLogger('instance_manager')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(PROJECT_DIR, "config", "settings.yaml")
+
+
+def load_instance_settings() -> List[Dict]:
+    """Carga la lista 'instances' de settings.yaml (vacía si no hay)."""
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                instances = (yaml.safe_load(f) or {}).get('instances') or []
+            return [dict(instance) for instance in instances if isinstance(instance, dict)]
+    except Exception as e:
+        logger.error(f"Error al cargar {SETTINGS_FILE}: {e}")
+    return []
+
+
+class InstanceManager:
+    """
+    Crea N instancias (gamepad + reconocedor + bots) y ejecuta un flujo en todas a la vez.
+    """
+
+    def __init__(self, count: int = None, instances: List[Dict] = None, gamepad_type: str = None,
+                 factory: Callable = None):
+        """
+        Inicializa las instancias.
+
+        Args:
+            count: Número de instancias. Si hay menos descritas en `instances`/settings.yaml,
+                las que faltan usan los monitores siguientes
+            instances: Descripción de cada instancia (name, monitor, region, gamepad);
+                por defecto, la sección 'instances' de settings.yaml
+            gamepad_type: Tipo de gamepad de las instancias que no indican uno (por defecto,
+                `gamepad.type` de settings.yaml)
+            factory: Clase de cada instancia (por defecto, main.EFootballAutomation)
+        """
+        if factory is None:
+            from main import EFootballAutomation as factory
+
+        configs = list(instances if instances is not None else load_instance_settings())
+        if count is not None:
+            configs = configs[:count]
+            for index in range(len(configs), count):
+                configs.append({'monitor': index + 1})
+        if not configs:
+            configs = [{'monitor': 1}]
+
+        self.instances = []
+        self.names = []
+        shared = None
+        for index, config in enumerate(configs):
+            name = str(config.get('name') or f"instancia_{index + 1}")
+            logger.info(f"Creando instancia '{name}'")
+            app = factory(gamepad_type=config.get('gamepad', gamepad_type),
+                          monitor=config.get('monitor', 1), region=config.get('region'),
+                          shared_recognizer=shared, instance_name=name)
+            shared = shared or app.recognizer
+            self.instances.append(app)
+            self.names.append(name)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def _run_one(self, name: str, app, task: str, kwargs: Dict) -> Any:
+        """Ejecuta una tarea en una instancia capturando sus errores."""
+        try:
+            return getattr(app, task)(**kwargs)
+        except Exception as e:
+            logger.error(f"Error en la instancia '{name}' durante '{task}': {e}", exc_info=True)
+            return False
+
+    def run(self, task: str, **kwargs) -> Dict[str, Any]:
+        """
+        Ejecuta el mismo método de EFootballAutomation en todas las instancias en paralelo.
+
+        Args:
+            task: Nombre del método (p. ej. "play_matches")
+            **kwargs: Argumentos del método
+
+        Returns:
+            {nombre de la instancia: resultado} (False si la instancia falló)
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(self.instances),
+                                                    thread_name_prefix='instancia')
+        futures = {name: self._executor.submit(self._run_one, name, app, task, kwargs)
+                   for name, app in zip(self.names, self.instances)}
+        results = {name: future.result() for name, future in futures.items()}
+        for name, result in results.items():
+            logger.info(f"Instancia '{name}' terminó '{task}': {result}")
+        return results
+
+    def close(self) -> None:
+        """Detiene los hilos y libera los gamepads y reconocedores de todas las instancias."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        for app in self.instances:
+            app.stop_latency_monitor()
+            app.gamepad.close()
+            app.recognizer.close()
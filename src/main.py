@@ -23,44 +23,71 @@ from banner_skipper import BannerSkipper
 from player_signer import PlayerSigner
 from player_trainer import PlayerTrainer
 from match_player import MatchPlayer
+from player_catalog import PlayerCatalog, instance_catalog_file
+from input_latency import LatencyMonitor, load_latency_settings
+from input_trace import TraceRecorder
 
 class EFootballAutomation:
     """
     Clase principal que integra todas las funcionalidades para la automatización de eFootball.
     """
     
-    def __init__(self, gamepad_type="xbox360"):
+    def __init__(self, gamepad_type=None, monitor=1, region=None, shared_recognizer=None,
+                 instance_name=None):
         """
         Inicializa la aplicación de automatización de eFootball.
         
         Args:
-            gamepad_type (str): Tipo de gamepad a emular ("xbox360", "xboxone", "dualshock4")
+            gamepad_type (str, optional): Tipo de gamepad a emular ("xbox360", "xboxone", "dualshock4",
+                o "recorder" para ejecutar sin mando virtual grabando los informes); por defecto,
+                `gamepad.type` de settings.yaml
+            monitor (int): Monitor en el que se ve el juego (1-indexado)
+            region (dict, optional): Región de la ventana del juego (left, top, width, height)
+            shared_recognizer (ScreenRecognizer, optional): Reconocedor de otra instancia cuyas
+                plantillas se reutilizan (ver instance_manager)
+            instance_name (str, optional): Nombre de la instancia; separa su catálogo de
+                jugadores, su informe de latencia y su traza del gamepad de los de las demás instancias
         """
         print("Inicializando aplicación de automatización de eFootball...")
         
         # Convertir el tipo de gamepad a la enumeración correspondiente
-        if gamepad_type.lower() == "xbox360":
-            self.gamepad_type = GamepadType.XBOX360
+        # (sin tipo, GamepadController usa `gamepad.type` de settings.yaml)
+        if gamepad_type is None:
+            gamepad_type_enum = None
+        elif gamepad_type.lower() == "xbox360":
+            gamepad_type_enum = GamepadType.XBOX360
         elif gamepad_type.lower() == "xboxone":
-            self.gamepad_type = GamepadType.XBOXONE
+            gamepad_type_enum = GamepadType.XBOXONE
         elif gamepad_type.lower() in ["dualshock4", "ds4", "playstation"]:
-            self.gamepad_type = GamepadType.DS4
+            gamepad_type_enum = GamepadType.DS4
+        elif gamepad_type.lower() == "recorder":
+            gamepad_type_enum = GamepadType.RECORDER
         else:
             print(f"Tipo de gamepad no reconocido: {gamepad_type}. Usando Xbox 360 por defecto.")
-            self.gamepad_type = GamepadType.XBOX360
+            gamepad_type_enum = GamepadType.XBOX360
         
         # Inicializar el controlador de gamepad
-        self.gamepad = GamepadController(self.gamepad_type)
+        self.gamepad = GamepadController(gamepad_type_enum, instance_name=instance_name)
+        self.gamepad_type = self.gamepad.gamepad_type
         
         # Inicializar el reconocedor de pantalla
-        self.recognizer = ScreenRecognizer()
+        self.recognizer = ScreenRecognizer(monitor=monitor, region=region, shared=shared_recognizer)
+        # Los retardos calibrados de tap() se aplican a la primera pulsación tras cada reconocimiento
+        self.gamepad.state_provider = self.recognizer.take_state
+        
+        # Catálogo de jugadores compartido por el fichador y el entrenador de esta instancia
+        self.instance_name = instance_name
+        self.catalog = PlayerCatalog(instance_catalog_file(instance_name))
         
         # Inicializar los módulos de funcionalidad
         self.banner_skipper = BannerSkipper(self.gamepad, self.recognizer)
-        self.player_signer = PlayerSigner(self.gamepad, self.recognizer)
-        self.player_trainer = PlayerTrainer(self.gamepad, self.recognizer)
+        self.player_signer = PlayerSigner(self.gamepad, self.recognizer, catalog=self.catalog)
+        self.player_trainer = PlayerTrainer(self.gamepad, self.recognizer, catalog=self.catalog)
         self.match_player = MatchPlayer(self.gamepad, self.recognizer)
         
+        # Monitor de latencia entre entradas y pantalla (ver start_latency_monitor)
+        self.latency_monitor = None
+        
         # Directorio para logs
         self.logs_dir = "/home/ubuntu/efootball_automation/logs"
         os.makedirs(self.logs_dir, exist_ok=True)
@@ -220,6 +247,41 @@ class EFootballAutomation:
         
         return results
 
+    def start_latency_monitor(self):
+        """
+        Empieza a medir la latencia entre cada pulsación y la reacción de la pantalla
+        durante la sesión, clasificada por botón y por estado de pantalla.
+        """
+        settings = None
+        if self.instance_name:
+            # Un informe por instancia (ver instance_manager)
+            base, ext = os.path.splitext(load_latency_settings()['report_file'])
+            settings = {'report_file': f"{base}_{self.instance_name}{ext}"}
+        self.latency_monitor = LatencyMonitor(self.gamepad, self.recognizer.frame_source.region,
+                                              lambda: self.recognizer.current_state, settings)
+        self.latency_monitor.start()
+    
+    def stop_latency_monitor(self):
+        """Detiene el monitor de latencia, muestra el informe y lo guarda en JSON."""
+        if self.latency_monitor is None:
+            return
+        self.latency_monitor.stop()
+        print(self.latency_monitor.format_report())
+        print(f"Informe de latencia guardado en {self.latency_monitor.save()}")
+        self.latency_monitor = None
+
+    def start_trace_recording(self, path):
+        """
+        Graba los informes del gamepad de la sesión con el número de fotograma en curso
+        (ver input_trace). La grabación se guarda al cerrar el gamepad.
+        
+        Args:
+            path (str): Archivo .npz de destino
+        """
+        self.gamepad.backend = TraceRecorder(self.gamepad.backend,
+                                             lambda: self.recognizer.frame_source.seq, path)
+        print(f"Grabando los informes del gamepad en {path}")
+
 def parse_arguments():
     """
     Parsea los argumentos de línea de comandos.
@@ -230,9 +292,22 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="Automatización de eFootball")
     
     # Argumento para el tipo de gamepad
-    parser.add_argument("--gamepad", type=str, default="xbox360",
-                        choices=["xbox360", "xboxone", "dualshock4", "ds4"],
-                        help="Tipo de gamepad a emular (default: xbox360)")
+    parser.add_argument("--gamepad", type=str, default=None,
+                        choices=["xbox360", "xboxone", "dualshock4", "ds4", "recorder"],
+                        help="Tipo de gamepad a emular (default: gamepad.type de settings.yaml)")
+    
+    # Número de instancias del juego (ver la sección 'instances' de settings.yaml)
+    parser.add_argument("--instances", type=int, default=1,
+                        help="Número de instancias del juego en paralelo, una por monitor o ventana (default: 1)")
+    
+    # Grabación de los informes del gamepad
+    parser.add_argument("--record-trace", type=str, metavar="ARCHIVO",
+                        help="Grabar los informes del gamepad con el fotograma en curso (.npz); "
+                             "se reproduce con 'python input_trace.py replay ARCHIVO'")
+    
+    # Medición de latencia durante la sesión
+    parser.add_argument("--latency", action="store_true",
+                        help="Medir la latencia entre entradas y pantalla y guardar el informe al terminar")
     
     # Subparsers para los diferentes comandos
     subparsers = parser.add_subparsers(dest="command", help="Comando a ejecutar")
@@ -265,17 +340,18 @@ def parse_arguments():
     
     return parser.parse_args()
 
-def main():
-    """Función principal de la aplicación"""
-    # Parsear argumentos
-    args = parse_arguments()
+def command_task(args):
+    """
+    Traduce el comando de la línea de comandos al método de EFootballAutomation que lo ejecuta.
     
-    # Inicializar la aplicación
-    app = EFootballAutomation(gamepad_type=args.gamepad)
+    Args:
+        args (argparse.Namespace): Argumentos parseados
     
-    # Ejecutar el comando correspondiente
+    Returns:
+        tuple: (nombre del método, argumentos) o None si el comando no se reconoce
+    """
     if args.command == "skip":
-        app.skip_banners()
+        return "skip_banners", {}
     
     elif args.command == "sign":
         # Construir filtros si se proporcionan
@@ -287,20 +363,61 @@ def main():
         if args.price:
             filters["price_max"] = args.price
         
-        # Ejecutar el fichador de jugadores
-        app.sign_player(player_name=args.name, filters=filters if filters else None, player_index=args.index)
+        return "sign_player", {"player_name": args.name, "filters": filters if filters else None,
+                               "player_index": args.index}
     
     elif args.command == "train":
-        app.train_player(args.name)
+        return "train_player", {"player_name": args.name}
     
     elif args.command == "play":
-        app.play_matches(max_matches=args.max, event_mode=args.event, difficulty=args.difficulty)
+        return "play_matches", {"max_matches": args.max, "event_mode": args.event,
+                                "difficulty": args.difficulty}
     
     elif args.command == "all":
-        app.run_all()
+        return "run_all", {}
     
-    else:
+    return None
+
+def main():
+    """Función principal de la aplicación"""
+    # Parsear argumentos
+    args = parse_arguments()
+    
+    task = command_task(args)
+    if task is None:
         print("Comando no reconocido. Use --help para ver los comandos disponibles.")
+        return
+    
+    # Varias instancias del juego: una por monitor/ventana, cada una en su hilo
+    if args.instances > 1:
+        from instance_manager import InstanceManager
+        manager = InstanceManager(args.instances, gamepad_type=args.gamepad, factory=EFootballAutomation)
+        for name, app in zip(manager.names, manager.instances):
+            if args.record_trace:
+                base, ext = os.path.splitext(args.record_trace)
+                app.start_trace_recording(f"{base}_{name}{ext or '.npz'}")
+            if args.latency:
+                app.start_latency_monitor()
+        try:
+            manager.run(task[0], **task[1])
+        finally:
+            manager.close()
+        return
+    
+    # Inicializar la aplicación
+    app = EFootballAutomation(gamepad_type=args.gamepad)
+    if args.record_trace:
+        app.start_trace_recording(args.record_trace)
+    if args.latency:
+        app.start_latency_monitor()
+    
+    # Ejecutar el comando correspondiente
+    method, kwargs = task
+    getattr(app, method)(**kwargs)
+    
+    app.stop_latency_monitor()
+    app.gamepad.close()
+    app.recognizer.close()
 
 if __name__ == "__main__":
     print("Aplicación de automatización de eFootball")
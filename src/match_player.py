@@ -10,8 +10,10 @@ Utiliza los módulos de control de gamepad y reconocimiento de pantalla.
 
 import time
 import os
+import math
 import random
 from gamepad_controller import GamepadController, GamepadButton, EFootballSequences
+from input_lanes import Behavior, InputLanes
 from screen_recognizer import ScreenRecognizer, GameScreen, ScreenElement
 
 class MatchPlayer:
@@ -39,6 +41,9 @@ class MatchPlayer:
         else:
             self.recognizer = screen_recognizer
         
+        # Entrada concurrente por carriles durante el partido
+        self.lanes = InputLanes(self.gamepad)
+        
         # Directorio para guardar capturas de pantalla
         self.screenshots_dir = "/home/ubuntu/efootball_automation/screenshots/matches"
         os.makedirs(self.screenshots_dir, exist_ok=True)
@@ -107,8 +112,7 @@ class MatchPlayer:
                 
                 # Intentar volver al menú principal presionando B varias veces
                 for _ in range(3):
-                    self.gamepad.press_button(GamepadButton.B, duration=0.2)
-                    time.sleep(1.0)
+                    self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
                 
                 # Verificar si hemos vuelto al menú principal
                 new_screen = self.recognizer.recognize_screen()
@@ -154,31 +158,23 @@ class MatchPlayer:
         if event_mode:
             print("Seleccionando modo evento...")
             # Navegar al modo evento (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_RIGHT, duration=0.2)
-            time.sleep(wait_time)
-            self.gamepad.press_button(GamepadButton.DPAD_RIGHT, duration=0.2)
-            time.sleep(wait_time)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(wait_time * 2)
+            self.gamepad.tap(GamepadButton.DPAD_RIGHT, wait=wait_time, duration=0.2)
+            self.gamepad.tap(GamepadButton.DPAD_RIGHT, wait=wait_time, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=wait_time * 2, duration=0.2)
         else:
             print("Seleccionando partido amistoso contra CPU...")
             # Navegar al modo amistoso (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(wait_time)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(wait_time * 2)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=wait_time, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=wait_time * 2, duration=0.2)
         
         # Seleccionar CPU como oponente (simulación)
         print("Seleccionando CPU como oponente...")
-        self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-        time.sleep(wait_time)
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time * 2)
+        self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=wait_time, duration=0.2)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time * 2, duration=0.2)
         
         # Confirmar selección
         print("Confirmando selección...")
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time * 2)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time * 2, duration=0.2)
         
         # Guardar una captura de pantalla después de seleccionar el partido
         self.recognizer.save_screenshot("partido_seleccionado.png", self.screenshots_dir)
@@ -207,27 +203,21 @@ class MatchPlayer:
         print(f"Configurando dificultad a {difficulty}...")
         
         # Navegar a la opción de dificultad (simulación)
-        self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-        time.sleep(wait_time)
-        self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-        time.sleep(wait_time)
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=wait_time, duration=0.2)
+        self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=wait_time, duration=0.2)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
         
         # Seleccionar dificultad según el parámetro
         if difficulty == "easy":
             # Navegar a dificultad fácil (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_UP, duration=0.2)
-            time.sleep(wait_time)
+            self.gamepad.tap(GamepadButton.DPAD_UP, wait=wait_time, duration=0.2)
         elif difficulty == "hard":
             # Navegar a dificultad difícil (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(wait_time)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=wait_time, duration=0.2)
         # Para "normal" no hacemos nada, asumimos que es la opción por defecto
         
         # Confirmar selección de dificultad
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
         
         # Confirmar configuración y comenzar partido
         print("Confirmando configuración y comenzando partido...")
@@ -240,6 +230,33 @@ class MatchPlayer:
         print("Partido configurado correctamente")
         return True
     
+    def _random_behavior(self):
+        """
+        Genera una jugada aleatoria que combina varios carriles de entrada.
+        
+        Returns:
+            Behavior: Conducción (con o sin sprint) girando el stick izquierdo y
+                terminada en pase corto, pase largo, pase al hueco o tiro; o presión
+                manteniendo LB mientras se orienta el stick
+        """
+        duration = random.uniform(0.4, 1.5)
+        angle = random.uniform(0, 2 * math.pi)
+        turn = random.uniform(-1.5, 1.5)   # Radianes por segundo
+        
+        def steer(t):
+            return (int(32767 * math.cos(angle + turn * t)), int(32767 * math.sin(angle + turn * t)))
+        
+        kind = random.choice(["conducción", "sprint", "presión"])
+        behavior = Behavior(kind).steer("left", 0.0, duration, steer)
+        if kind == "presión":
+            return behavior.hold(GamepadButton.LB, 0.0, duration)
+        if kind == "sprint":
+            behavior.hold(GamepadButton.RB, 0.0, duration)
+        
+        # Pase corto, pase largo, tiro o a través al final de la conducción
+        finish = random.choice([GamepadButton.A, GamepadButton.X, GamepadButton.B, GamepadButton.Y])
+        return behavior.tap(finish, max(0.0, duration - 0.2), duration=random.uniform(0.05, 0.3))
+    
     def play_match(self, duration_minutes=5, max_wait_time=600):
         """
         Juega un partido contra la CPU.
@@ -262,32 +279,22 @@ class MatchPlayer:
         # Tiempo de inicio
         start_time = time.time()
         
-        # Simular juego presionando botones aleatorios
+        # Simular juego con comportamientos aleatorios: cada carril (sticks, botones
+        # frontales, superiores y gatillos) se reproduce en paralelo a 60 Hz
         print("Simulando juego...")
         
-        # Lista de botones comunes durante el juego
-        game_buttons = [
-            GamepadButton.A,  # Pase corto
-            GamepadButton.X,  # Pase largo
-            GamepadButton.B,  # Tiro
-            GamepadButton.Y,  # A través
-            GamepadButton.RB,  # Sprint
-            GamepadButton.LB  # Presión
-        ]
-        
-        # Jugar hasta que se cumpla el tiempo o se detecte el fin del partido
+        # Jugar hasta que se cumpla el tiempo o se detecte el fin del partido. El siguiente
+        # comportamiento se encola mientras suena el actual: si usa otros carriles se
+        # reproduce a la vez; si comparte alguno, empieza en cuanto ese carril queda libre.
+        pending = None
         while time.time() - start_time < play_time and time.time() - start_time < max_wait_time:
-            # Presionar un botón aleatorio
-            random_button = random.choice(game_buttons)
-            self.gamepad.press_button(random_button, duration=random.uniform(0.1, 0.3))
+            # Pausa aleatoria entre acciones
+            queued = self.lanes.play(self._random_behavior(), delay=random.uniform(0.0, 0.2))
             
-            # Mover el joystick izquierdo aleatoriamente
-            x_value = random.randint(-32768, 32767)
-            y_value = random.randint(-32768, 32767)
-            self.gamepad.move_joystick("left", x_value, y_value, duration=random.uniform(0.2, 0.5))
-            
-            # Esperar un tiempo aleatorio entre acciones
-            time.sleep(random.uniform(0.1, 0.5))
+            # Como mucho dos comportamientos en cola: se espera al anterior, no al recién encolado
+            if pending is not None:
+                pending.result()
+            pending = queued
             
             # Cada 30 segundos, verificar si el partido ha terminado
             if (time.time() - start_time) % 30 < 1:
@@ -300,27 +307,25 @@ class MatchPlayer:
                     print("Partido terminado (detectado cambio de pantalla)")
                     break
         
+        # Terminar el último comportamiento antes de tocar los menús
+        if pending is not None:
+            pending.result()
+        
         # Si llegamos aquí por tiempo, presionar START para pausar y abandonar
         if time.time() - start_time >= play_time and time.time() - start_time < max_wait_time:
             print("Tiempo de juego cumplido, abandonando partido...")
             
             # Pausar el partido
-            self.gamepad.press_button(GamepadButton.START, duration=0.2)
-            time.sleep(2.0)
+            self.gamepad.tap(GamepadButton.START, wait=2.0, duration=0.2)
             
             # Navegar a la opción de abandonar (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(1.0)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(1.0)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(2.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=1.0, duration=0.2)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=1.0, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=2.0, duration=0.2)
             
             # Confirmar abandono
-            self.gamepad.press_button(GamepadButton.DPAD_LEFT, duration=0.2)
-            time.sleep(1.0)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(3.0)
+            self.gamepad.tap(GamepadButton.DPAD_LEFT, wait=1.0, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=3.0, duration=0.2)
         
         # Guardar una captura de pantalla al final del partido
         self.recognizer.save_screenshot("fin_partido.png", self.screenshots_dir)
@@ -330,8 +335,7 @@ class MatchPlayer:
         
         # Presionar A varias veces para pasar pantallas de resultados, recompensas, etc.
         for _ in range(5):
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(2.0)
+            self.gamepad.tap(GamepadButton.A, wait=2.0, duration=0.2)
         
         print("Partido jugado correctamente")
         return True
@@ -0,0 +1,225 @@
+"""
+Perfiles de OCR por región para eFootball Automation.
+
+Cada región de ocr_regions.json puede indicar en su clave "ocr" cómo debe
+preprocesarse antes de pasarla a tesseract: un nombre de perfil predefinido
+("line", "digits", ...) o un diccionario con las opciones:
+
+    {"scale": 0.5, "binarize": "otsu", "invert": "auto", "psm": 7,
+     "whitelist": "0123456789", "lang": "eng"}
+
+Los perfiles se compilan una sola vez (pasos de preprocesado, cadena de
+configuración de tesseract y filtro de caracteres) y se reutilizan en cada
+lectura. Un psm ajustado y una lista blanca reducen mucho el tiempo de
+tesseract y los reintentos por lecturas erróneas.
+"""
+
+import re
+import json
+import logging
+from typing import Any, Callable, Dict, List, Union
+
+import numpy as np
+import cv2
+import pytesseract
+
+logger = logging.getLogger('ocr_profiles')
+
+# Idioma por defecto de tesseract (español primero, es el idioma de la interfaz)
+DEFAULT_LANG = "spa+eng"
+BINARIZE_METHODS = ('none', 'otsu', 'adaptive', 'fixed')
+
+# Opciones por defecto: equivalen a la lectura original (gris sin preprocesar, psm automático)
+DEFAULT_PROFILE_OPTIONS = {
+    'scale': 1.0,          # Factor de escala aplicado antes del OCR
+    'binarize': 'none',    # 'none', 'otsu', 'adaptive' o 'fixed'
+    'threshold': 127,      # Umbral para binarize = 'fixed'
+    'invert': False,       # True, False o 'auto' (texto oscuro sobre fondo claro)
+    'psm': None,           # Page segmentation mode de tesseract (None = por defecto)
+    'whitelist': None,     # Caracteres permitidos (p. ej. "0123456789")
+    'lang': DEFAULT_LANG,
+}
+
+# Perfiles predefinidos que se pueden referenciar por nombre en ocr_regions.json
+PRESET_PROFILES = {
+    'default': {},
+    'block': {'binarize': 'otsu', 'invert': 'auto', 'psm': 6},
+    'line': {'binarize': 'otsu', 'invert': 'auto', 'psm': 7},
+    'word': {'binarize': 'otsu', 'invert': 'auto', 'psm': 8},
+    'sparse': {'binarize': 'otsu', 'invert': 'auto', 'psm': 11},
+    # Índice de texto de pantalla completa (find_text_on_screen): texto disperso a media resolución
+    'screen': {'psm': 11, 'scale': 0.5},
+    'digits': {'binarize': 'otsu', 'invert': 'auto', 'psm': 7, 'whitelist': '0123456789.,', 'lang': 'eng'},
+}
+
+# Caracteres que se conservan al limpiar texto sin lista blanca
+_CLEAN_PATTERN = re.compile(r'[^a-zA-Z0-9ñÑáéíóúÁÉÍÓÚüÜ\s]')
+_SPACES_PATTERN = re.compile(r'\s+')
+
+
+class OCRProfile:
+    """
+    Perfil de OCR compilado: pasos de preprocesado y configuración de tesseract.
+    """
+
+    def __init__(self, options: Dict[str, Any] = None, name: str = "custom"):
+        """
+        Compila un perfil.
+
+        Args:
+            options: Opciones del perfil (se completan con DEFAULT_PROFILE_OPTIONS)
+            name: Nombre descriptivo del perfil
+        """
+        self.name = name
+        self.options = dict(DEFAULT_PROFILE_OPTIONS)
+        self.options.update(options or {})
+        binarize = self.options['binarize']
+        if binarize not in BINARIZE_METHODS:
+            raise ValueError(f"Binarización no soportada: {binarize}. Debe ser una de {BINARIZE_METHODS}")
+
+        self.lang = self.options['lang']
+        self.config = self._build_config()
+        self._steps = self._compile_steps()
+        whitelist = self.options['whitelist']
+        self._reject_pattern = (re.compile(f"[^{re.escape(whitelist)}\\s]") if whitelist else _CLEAN_PATTERN)
+
+    def _build_config(self) -> str:
+        """Construye la cadena de configuración de tesseract."""
+        parts = []
+        if self.options['psm'] is not None:
+            parts.append(f"--psm {int(self.options['psm'])}")
+        if self.options['whitelist']:
+            parts.append(f"-c tessedit_char_whitelist={self.options['whitelist']}")
+        return " ".join(parts)
+
+    def _compile_steps(self) -> List[Callable[[np.ndarray], np.ndarray]]:
+        """Traduce las opciones a la lista de operaciones de preprocesado."""
+        steps = []
+        scale = float(self.options['scale'])
+        if scale != 1.0:
+            # INTER_AREA al reducir, INTER_CUBIC al ampliar
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            steps.append(lambda img: cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation))
+
+        binarize = self.options['binarize']
+        if binarize == 'otsu':
+            steps.append(lambda img: cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+        elif binarize == 'adaptive':
+            steps.append(lambda img: cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                                           cv2.THRESH_BINARY, 31, 10))
+        elif binarize == 'fixed':
+            threshold = int(self.options['threshold'])
+            steps.append(lambda img: cv2.threshold(img, threshold, 255, cv2.THRESH_BINARY)[1])
+
+        invert = self.options['invert']
+        if invert == 'auto':
+            # tesseract rinde mejor con texto oscuro sobre fondo claro; el fondo es la mayoría de la región
+            steps.append(lambda img: cv2.bitwise_not(img) if cv2.mean(img)[0] < 127 else img)
+        elif invert:
+            steps.append(cv2.bitwise_not)
+        return steps
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        """
+        Aplica el preprocesado del perfil.
+
+        Args:
+            image: Región en BGR o escala de grises
+
+        Returns:
+            Imagen en escala de grises lista para tesseract
+        """
+        result = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        for step in self._steps:
+            result = step(result)
+        return result
+
+    def clean(self, text: str) -> str:
+        """Limpia el texto leído según la lista blanca del perfil."""
+        text = text.replace('\n', ' ').replace('\r', '')
+        text = self._reject_pattern.sub('', text)
+        return _SPACES_PATTERN.sub(' ', text).strip()
+
+    def read_text(self, image: np.ndarray) -> str:
+        """
+        Preprocesa una región, ejecuta tesseract y limpia el resultado.
+
+        Args:
+            image: Región en BGR o escala de grises
+
+        Returns:
+            Texto limpio ("" si falla el OCR)
+        """
+        try:
+            text = pytesseract.image_to_string(self.preprocess(image), lang=self.lang, config=self.config)
+        except Exception as e:
+            logger.error(f"Error durante OCR (perfil '{self.name}'): {e}")
+            return ""
+        return self.clean(text)
+
+    def read_data(self, image: np.ndarray) -> Dict[str, List]:
+        """
+        Ejecuta image_to_data de tesseract sobre la región preprocesada.
+
+        Las coordenadas devueltas están en el sistema de la región original (se
+        deshace el factor de escala del perfil).
+
+        Args:
+            image: Región en BGR o escala de grises
+
+        Returns:
+            Diccionario de tesseract (text, left, top, width, height, conf, ...) o {} si falla
+        """
+        try:
+            data = pytesseract.image_to_data(self.preprocess(image), lang=self.lang, config=self.config,
+                                             output_type=pytesseract.Output.DICT)
+        except Exception as e:
+            logger.error(f"Error durante OCR (perfil '{self.name}'): {e}")
+            return {}
+        scale = float(self.options['scale'])
+        if scale != 1.0:
+            for key in ('left', 'top', 'width', 'height'):
+                data[key] = [int(round(value / scale)) for value in data[key]]
+        return data
+
+
+_compiled_profiles: Dict[str, OCRProfile] = {}
+
+
+def get_profile(spec: Union[str, Dict[str, Any], None] = None) -> OCRProfile:
+    """
+    Devuelve el perfil compilado para una especificación, compilándolo la primera vez.
+
+    Args:
+        spec: None (perfil por defecto), nombre de un perfil predefinido o diccionario de opciones.
+              Un diccionario puede incluir "preset" para partir de un perfil predefinido.
+
+    Returns:
+        OCRProfile compilado
+    """
+    if spec is None:
+        spec = 'default'
+    cache_key = spec if isinstance(spec, str) else json.dumps(spec, sort_keys=True)
+    profile = _compiled_profiles.get(cache_key)
+    if profile is not None:
+        return profile
+
+    if isinstance(spec, str):
+        if spec not in PRESET_PROFILES:
+            logger.warning(f"Perfil OCR '{spec}' desconocido. Usando el perfil por defecto.")
+            profile = get_profile('default')
+        else:
+            profile = OCRProfile(PRESET_PROFILES[spec], name=spec)
+    else:
+        options = dict(spec)
+        preset = options.pop('preset', None)
+        base: Dict[str, Any] = dict(PRESET_PROFILES.get(preset, {})) if preset else {}
+        base.update(options)
+        try:
+            profile = OCRProfile(base, name=preset or "custom")
+        except ValueError as e:
+            logger.warning(f"Perfil OCR inválido {spec}: {e}. Usando el perfil por defecto.")
+            profile = get_profile('default')
+
+    _compiled_profiles[cache_key] = profile
+    return profile
@@ -0,0 +1,340 @@
+"""
+Catálogo local de jugadores (SQLite) alimentado por los escáneres de listas y fichas.
+
+Cada vez que un escáner ve una tarjeta se registra el jugador con la lista en la que
+aparece, su índice en esa lista y la caja de pantalla donde se vio. Los parsers de
+fichas completan valoración, posición, precio, club, estadísticas y habilidades.
+PlayerSigner y PlayerTrainer consultan el catálogo para saltar directamente a la
+posición de un jugador en lugar de recorrer la lista desde el principio, y las
+entradas se actualizan de forma incremental a medida que se vuelven a ver.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from text_index import normalize_text
+from text_matcher import levenshtein
+
+logger = logging.getLogger('player_catalog')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_FILE = os.path.join(PROJECT_DIR, "config", "player_catalog.db")
+
+# Nombres de las listas del juego registradas en el catálogo
+LIST_MY_TEAM = "mi_equipo"
+LIST_NORMAL_PLAYERS = "contrato_jugadores_normales"
+
+# Fracción de caracteres del nombre que pueden diferir en la búsqueda aproximada
+DEFAULT_MAX_EDIT_RATIO = 0.2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    list_name   TEXT    NOT NULL,
+    list_index  INTEGER NOT NULL,
+    name        TEXT    NOT NULL,
+    name_key    TEXT    NOT NULL,
+    position    TEXT,
+    rating      INTEGER,
+    price       INTEGER,
+    club        TEXT,
+    skills      TEXT,
+    stats       TEXT,
+    box         TEXT,
+    sort_key    TEXT,
+    updated_at  REAL    NOT NULL,
+    PRIMARY KEY (list_name, list_index)
+);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players (name_key);
+"""
+
+# Abreviaturas de posición de las tarjetas agrupadas por línea, para filtrar por "Delantero", "Defensa"...
+POSITION_GROUPS = {
+    'portero': {'PT'},
+    'defensa': {'DFC', 'LI', 'LD'},
+    'centrocampista': {'MCD', 'MC', 'MDI', 'MDD', 'MO'},
+    'delantero': {'EI', 'ED', 'SD', 'DC'},
+}
+
+# Filtros admitidos por matches_filters
+FILTER_KEYS = ('position', 'club', 'price_max')
+
+# Campos descriptivos que se conservan si la misma tarjeta se vuelve a ver sin leerlos
+_DETAIL_FIELDS = ('position', 'rating', 'price', 'club', 'skills', 'stats')
+
+
+@dataclass
+class PlayerRecord:
+    """Entrada del catálogo: un jugador visto en una posición de una lista."""
+    name: str
+    list_name: str = ""
+    list_index: Optional[int] = None
+    position: Optional[str] = None
+    rating: Optional[int] = None
+    price: Optional[int] = None
+    club: Optional[str] = None
+    skills: List[str] = field(default_factory=list)
+    stats: Dict[str, int] = field(default_factory=dict)
+    box: Optional[Tuple[int, int, int, int]] = None  # Caja (x, y, ancho, alto) en pantalla donde se vio
+    sort_key: Optional[str] = None                   # Orden de la lista cuando se vio
+    updated_at: float = 0.0
+
+    @property
+    def age(self) -> float:
+        """Segundos desde la última vez que se vio o actualizó."""
+        return time.time() - self.updated_at
+
+
+def _allowed_positions(value) -> set:
+    """Abreviaturas admitidas por un filtro de posición (abreviatura, grupo o lista de ambos)."""
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    allowed = set()
+    for item in values:
+        key = normalize_text(str(item))
+        group = POSITION_GROUPS.get(key) or POSITION_GROUPS.get(key.rstrip('s'))
+        allowed |= group if group else {key.upper()}
+    return allowed
+
+
+def matches_filters(record: PlayerRecord, filters: Dict, max_edit_ratio: float = DEFAULT_MAX_EDIT_RATIO) -> bool:
+    """
+    Comprueba si un jugador cumple los filtros de búsqueda de PlayerSigner.
+
+    Un campo desconocido (no leído en la tarjeta ni en el catálogo) no cumple el filtro.
+
+    Args:
+        record: Jugador
+        filters: {'position': 'SD' | 'Delantero' | [...], 'club': nombre, 'price_max': precio}
+        max_edit_ratio: Tolerancia de la comparación del club (lecturas OCR)
+
+    Returns:
+        True si cumple todos los filtros
+    """
+    if filters.get('position'):
+        if not record.position or record.position.upper() not in _allowed_positions(filters['position']):
+            return False
+    if filters.get('club'):
+        if not record.club:
+            return False
+        wanted, club = normalize_text(filters['club']), normalize_text(record.club)
+        allowed = int(len(wanted) * max_edit_ratio)
+        if wanted not in club and levenshtein(club, wanted, allowed) > allowed:
+            return False
+    if filters.get('price_max') is not None:
+        if record.price is None or record.price > filters['price_max']:
+            return False
+    return True
+
+
+def instance_catalog_file(instance_name: str = None) -> str:
+    """
+    Ruta del catálogo de una instancia del juego (ver instance_manager).
+
+    Cada instancia juega con su propia cuenta: sus listas no pueden compartir catálogo.
+
+    Args:
+        instance_name: Nombre de la instancia (None para el catálogo del proyecto)
+
+    Returns:
+        Ruta del archivo SQLite
+    """
+    if not instance_name:
+        return CATALOG_FILE
+    base, ext = os.path.splitext(CATALOG_FILE)
+    return f"{base}_{instance_name}{ext}"
+
+
+class PlayerCatalog:
+    """
+    Acceso al catálogo SQLite. Seguro para usar desde varios hilos.
+    """
+
+    def __init__(self, db_path: str = CATALOG_FILE):
+        """
+        Abre (o crea) el catálogo.
+
+        Args:
+            db_path: Ruta del archivo SQLite (":memory:" para un catálogo temporal)
+        """
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Cierra la conexión."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> PlayerRecord:
+        """Convierte una fila en PlayerRecord."""
+        return PlayerRecord(
+            name=row['name'],
+            list_name=row['list_name'],
+            list_index=row['list_index'],
+            position=row['position'],
+            rating=row['rating'],
+            price=row['price'],
+            club=row['club'],
+            skills=json.loads(row['skills']) if row['skills'] else [],
+            stats=json.loads(row['stats']) if row['stats'] else {},
+            box=tuple(json.loads(row['box'])) if row['box'] else None,
+            sort_key=row['sort_key'],
+            updated_at=row['updated_at'],
+        )
+
+    def record_seen(self, list_name: str, list_index: int, name: str, box: Tuple[int, int, int, int] = None,
+                    sort_key: str = None, **details) -> bool:
+        """
+        Registra que un jugador se ha visto en una posición de una lista.
+
+        Si en esa posición ya estaba el mismo jugador, sólo se actualizan los campos
+        proporcionados (y la marca de tiempo); si era otro, la entrada se reemplaza.
+
+        Args:
+            list_name: Lista en la que se vio (LIST_MY_TEAM, LIST_NORMAL_PLAYERS, ...)
+            list_index: Índice de la tarjeta en la lista (0 = primera)
+            name: Nombre leído
+            box: Caja (x, y, ancho, alto) en pantalla
+            sort_key: Orden activo de la lista
+            **details: position, rating, price, club, skills, stats
+
+        Returns:
+            True si la entrada es nueva o ha cambiado, False si sólo se refrescó
+        """
+        name_key = normalize_text(name)
+        if not name_key:
+            return False
+        unknown = set(details) - set(_DETAIL_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos de jugador desconocidos: {sorted(unknown)}")
+
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT * FROM players WHERE list_name = ? AND list_index = ?",
+                                     (list_name, list_index)).fetchone()
+            values = {'position': None, 'rating': None, 'price': None, 'club': None,
+                      'skills': None, 'stats': None, 'box': None, 'sort_key': None}
+            same_player = row is not None and row['name_key'] == name_key
+            if same_player:
+                values.update({key: row[key] for key in values})
+            for key, value in details.items():
+                if value is not None:
+                    values[key] = json.dumps(value, ensure_ascii=False) if key in ('skills', 'stats') else value
+            if box is not None:
+                values['box'] = json.dumps(list(box))
+            if sort_key is not None:
+                values['sort_key'] = sort_key
+
+            changed = not same_player or any(row[key] != values[key] for key in values)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO players (list_name, list_index, name, name_key, position, rating, price, "
+                "club, skills, stats, box, sort_key, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (list_name, list_index, name, name_key, values['position'], values['rating'], values['price'],
+                 values['club'], values['skills'], values['stats'], values['box'], values['sort_key'], time.time()))
+        if changed:
+            logger.debug(f"Catálogo: {list_name}[{list_index}] = {name}")
+        return changed
+
+    def update_details(self, name: str, list_name: str = None, **details) -> int:
+        """
+        Actualiza los datos de ficha (valoración, estadísticas, habilidades...) de un jugador.
+
+        Args:
+            name: Nombre del jugador
+            list_name: Si se indica, sólo se actualizan sus entradas en esa lista
+            **details: position, rating, price, club, skills, stats
+
+        Returns:
+            Número de entradas actualizadas
+        """
+        unknown = set(details) - set(_DETAIL_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos de jugador desconocidos: {sorted(unknown)}")
+        updates = {key: (json.dumps(value, ensure_ascii=False) if key in ('skills', 'stats') else value)
+                   for key, value in details.items() if value is not None}
+        if not updates:
+            return 0
+        assignments = ", ".join(f"{key} = ?" for key in updates) + ", updated_at = ?"
+        query = f"UPDATE players SET {assignments} WHERE name_key = ?"
+        params = list(updates.values()) + [time.time(), normalize_text(name)]
+        if list_name is not None:
+            query += " AND list_name = ?"
+            params.append(list_name)
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def find(self, name: str, list_name: str = None,
+             max_edit_ratio: float = DEFAULT_MAX_EDIT_RATIO) -> List[PlayerRecord]:
+        """
+        Busca un jugador por nombre (exacto tras normalizar y, si no hay, aproximado).
+
+        Args:
+            name: Nombre a buscar
+            list_name: Si se indica, sólo en esa lista
+            max_edit_ratio: Fracción de caracteres que pueden diferir en la búsqueda aproximada
+
+        Returns:
+            Entradas encontradas, de la más reciente a la más antigua
+        """
+        name_key = normalize_text(name)
+        if not name_key:
+            return []
+        query = "SELECT * FROM players WHERE name_key = ?"
+        params = [name_key]
+        if list_name is not None:
+            query += " AND list_name = ?"
+            params.append(list_name)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+            if not rows:
+                # Búsqueda aproximada sobre los nombres distintos (lecturas OCR con errores)
+                fuzzy_query = "SELECT DISTINCT name_key FROM players"
+                fuzzy_params = []
+                if list_name is not None:
+                    fuzzy_query += " WHERE list_name = ?"
+                    fuzzy_params.append(list_name)
+                allowed = int(len(name_key) * max_edit_ratio)
+                keys = [row['name_key'] for row in self._conn.execute(fuzzy_query, fuzzy_params)
+                        if levenshtein(row['name_key'], name_key, allowed) <= allowed]
+                if keys:
+                    placeholders = ", ".join("?" for _ in keys)
+                    query = f"SELECT * FROM players WHERE name_key IN ({placeholders})"
+                    params = keys
+                    if list_name is not None:
+                        query += " AND list_name = ?"
+                        params = keys + [list_name]
+                    rows = self._conn.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def get_list(self, list_name: str) -> List[PlayerRecord]:
+        """Devuelve todas las entradas conocidas de una lista, ordenadas por índice."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM players WHERE list_name = ? ORDER BY list_index",
+                                      (list_name,)).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def truncate_list(self, list_name: str, length: int) -> int:
+        """
+        Elimina las entradas con índice >= length (la lista es más corta que la última vez).
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM players WHERE list_name = ? AND list_index >= ?",
+                                      (list_name, length)).rowcount
+
+    def clear_list(self, list_name: str) -> int:
+        """Elimina todas las entradas de una lista (p. ej. si ha cambiado su orden)."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM players WHERE list_name = ?", (list_name,)).rowcount
@@ -0,0 +1,246 @@
+"""
+Lectura de la ficha de un jugador (estadísticas y habilidades) a partir de un único fotograma.
+
+Las pantallas de ficha (menu_raquel_stats, menu_raquel_habilidades,
+menu_miequipo_jugadores_raquel_stats...) tienen una disposición fija, descrita en
+config/player_detail_layout.json con regiones normalizadas (fracción del ancho y
+alto de pantalla). Todas las regiones se recortan del mismo fotograma: las
+numéricas se leen juntas con el atlas de glifos en una sola clasificación y las de
+texto se envían en bloque al pool de OCR del ScreenRecognizer. Las filas vacías
+('-', sin texto) se descartan antes de llegar a tesseract.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from text_index import normalize_text
+
+logger = logging.getLogger('player_detail_parser')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLAYER_DETAIL_LAYOUT_FILE = os.path.join(PROJECT_DIR, "config", "player_detail_layout.json")
+
+# Diferencia mínima de gris entre el texto y el fondo de una región (el texto de
+# las estadísticas es de color, así que no basta con buscar píxeles claros)
+TEXT_MIN_CONTRAST = 64
+
+# Valores que el juego muestra en las filas sin contenido
+EMPTY_VALUES = {"", "no aplicable"}
+
+
+@dataclass
+class PlayerDetail:
+    """Datos leídos de una página de ficha de jugador."""
+    page: str                                               # 'stats' o 'skills'
+    name: str = ""
+    rating: Optional[int] = None
+    position: Optional[str] = None
+    club: Optional[str] = None
+    level: Optional[int] = None
+    stats: Dict[str, int] = field(default_factory=dict)
+    attributes: Dict[str, str] = field(default_factory=dict)  # Características (pierna mala, regularidad...)
+    skills: List[str] = field(default_factory=list)
+    additional_skills: List[str] = field(default_factory=list)
+    additional_positions: List[str] = field(default_factory=list)
+    ai_styles: List[str] = field(default_factory=list)
+    elapsed: float = 0.0                                     # Segundos empleados en la lectura
+
+    def catalog_details(self) -> Dict:
+        """
+        Campos para PlayerCatalog.update_details. Las habilidades sólo se incluyen si se
+        ha leído la página de habilidades, para no borrar las conocidas desde la de estadísticas.
+        """
+        details = {'rating': self.rating, 'position': self.position, 'club': self.club}
+        if self.stats:
+            details['stats'] = dict(self.stats)
+        if self.page == 'skills':
+            details['skills'] = self.skills + self.additional_skills
+        return details
+
+
+def load_layout(layout_file: str = PLAYER_DETAIL_LAYOUT_FILE) -> Dict:
+    """
+    Carga la disposición de las fichas.
+
+    Returns:
+        Diccionario con 'screens', 'header' y 'pages' (vacío si no se pudo cargar)
+    """
+    try:
+        with open(layout_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.error(f"No se encontró {layout_file}")
+    except json.JSONDecodeError as e:
+        logger.error(f"Error al decodificar {layout_file}: {e}")
+    return {}
+
+
+class PlayerDetailParser:
+    """
+    Extrae estadísticas y habilidades de las pantallas de ficha de jugador.
+    """
+
+    def __init__(self, screen_recognizer, catalog=None, layout_file: str = PLAYER_DETAIL_LAYOUT_FILE):
+        """
+        Inicializa el parser.
+
+        Args:
+            screen_recognizer: Reconocedor de pantalla (captura, atlas de glifos y pool de OCR)
+            catalog: Catálogo de jugadores (PlayerCatalog) donde guardar lo leído
+            layout_file: Archivo JSON con las regiones de cada página
+        """
+        self.recognizer = screen_recognizer
+        self.catalog = catalog
+        self.layout = load_layout(layout_file)
+
+    def page_for_state(self, state: str) -> Optional[str]:
+        """Devuelve la página ('stats', 'skills') que corresponde a un estado, o None."""
+        return self.layout.get('screens', {}).get(state)
+
+    def _regions(self, state: str, page: str, width: int,
+                 height: int) -> List[Tuple[str, str, Dict, Tuple[int, int, int, int]]]:
+        """
+        Calcula todas las regiones de una página en píxeles. Además de la cabecera común, cada
+        estado puede tener campos propios en 'screen_fields' (el club sólo se ve en algunas fichas).
+
+        Returns:
+            Lista de (destino, clave, datos de región, caja (x0, y0, x1, y1)). El destino es
+            'header', 'stats', 'attributes' o el nombre de una lista; la clave es el campo o el índice de fila.
+        """
+        regions = []
+        header = dict(self.layout.get('header', {}))
+        header.update(self.layout.get('screen_fields', {}).get(state, {}))
+        for key, region_data in header.items():
+            x0, y0, x1, y1 = region_data['box']
+            regions.append(('header', key, region_data,
+                            (int(x0 * width), int(y0 * height), int(x1 * width), int(y1 * height))))
+
+        for group in self.layout.get('pages', {}).get(page, []):
+            x0, x1 = int(group['x'][0] * width), int(group['x'][1] * width)
+            keys = group.get('fields') or [str(row) for row in range(group.get('rows', 0))]
+            target = group.get('list') or ('stats' if group.get('numeric') else 'attributes')
+            for row, key in enumerate(keys):
+                y0 = int((group['top'] + row * group['row_step']) * height)
+                y1 = y0 + int(group['row_height'] * height)
+                regions.append((target, key, group, (x0, y0, x1, y1)))
+        return regions
+
+    @staticmethod
+    def _is_empty(crop: np.ndarray, list_row: bool) -> bool:
+        """
+        Indica si una región no tiene texto. En las filas de listas también se descarta
+        el guion de las filas vacías: su texto es más estrecho que alto.
+        """
+        columns = np.flatnonzero((crop > int(crop.min()) + TEXT_MIN_CONTRAST).any(axis=0))
+        if columns.size == 0:
+            return True
+        return list_row and columns[-1] - columns[0] + 1 < crop.shape[0]
+
+    def parse(self, frame=None, state: str = None) -> Optional[PlayerDetail]:
+        """
+        Lee la ficha visible.
+
+        Args:
+            frame: Fotograma ya capturado (Frame); si no se indica se captura uno
+            state: Estado de la pantalla; por defecto el último reconocido
+
+        Returns:
+            PlayerDetail o None si la pantalla no es una ficha conocida o no se pudo capturar
+        """
+        start = time.perf_counter()
+        state = state or self.recognizer.current_state
+        page = self.page_for_state(state)
+        if page is None:
+            logger.warning(f"El estado '{state}' no es una ficha de jugador con disposición conocida")
+            return None
+        if frame is None:
+            frame = self.recognizer.capture_frame()
+            if frame is None:
+                logger.error("No se pudo capturar la ficha del jugador")
+                return None
+
+        gray = frame.gray
+        height, width = gray.shape[:2]
+        numeric = []   # (destino, clave, recorte)
+        textual = []   # (destino, clave, perfil OCR, recorte)
+        for target, key, region_data, (x0, y0, x1, y1) in self._regions(state, page, width, height):
+            crop = gray[y0:y1, x0:x1]
+            if crop.size == 0 or self._is_empty(crop, 'list' in region_data):
+                continue
+            if region_data.get('numeric'):
+                numeric.append((target, key, crop))
+            else:
+                # Copia del recorte: los buffers del fotograma se reutilizan en la siguiente captura
+                textual.append((target, key, region_data.get('ocr', 'line'), crop.copy()))
+
+        # Todas las regiones de texto se leen en paralelo mientras se clasifican los glifos
+        executor = self.recognizer._get_ocr_executor()
+        futures: List[Tuple[str, str, Future]] = [
+            (target, key, executor.submit(self.recognizer._extract_and_clean_text, crop, profile))
+            for target, key, profile, crop in textual]
+
+        values: Dict[Tuple[str, str], object] = {}
+        readings = self.recognizer.digit_recognizer.recognize_many([crop for _, _, crop in numeric])
+        min_confidence = self.recognizer.settings['digit_min_confidence']
+        for (target, key, crop), (text, confidence) in zip(numeric, readings):
+            digits = text.replace(".", "").replace(",", "")
+            if digits.isdigit() and confidence >= min_confidence:
+                values[(target, key)] = int(digits)
+            else:
+                logger.debug(f"Lectura de glifos poco fiable para {key} ('{text}', {confidence:.2f}). Usando tesseract.")
+                futures.append((target, key, executor.submit(self.recognizer._extract_and_clean_text,
+                                                              crop.copy(), 'digits')))
+
+        for target, key, future in futures:
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.error(f"Error en OCR de la región '{key}': {e}")
+                continue
+            if target == 'stats' or key in ('rating', 'level'):
+                digits = re.sub(r'\D', '', text)
+                if digits:
+                    values[(target, key)] = int(digits)
+            elif normalize_text(text) not in EMPTY_VALUES and text.strip() != '-':
+                values[(target, key)] = text.strip()
+
+        detail = PlayerDetail(page=page)
+        for (target, key), value in values.items():
+            if target == 'header':
+                setattr(detail, key, value)
+            elif target in ('stats', 'attributes'):
+                getattr(detail, target)[key] = value
+        for target in ('skills', 'additional_skills', 'additional_positions', 'ai_styles'):
+            rows = sorted((int(key), value) for (t, key), value in values.items() if t == target)
+            setattr(detail, target, [value for _, value in rows])
+        detail.elapsed = time.perf_counter() - start
+        logger.info(f"Ficha de '{detail.name}' ({page}) leída en {detail.elapsed * 1000:.0f} ms: "
+                    f"{len(detail.stats)} estadísticas, {len(detail.skills) + len(detail.additional_skills)} habilidades")
+
+        if self.catalog is not None and detail.name:
+            self.catalog.update_details(detail.name, **detail.catalog_details())
+        return detail
+
+    def parse_current(self, state: str = None) -> Optional[PlayerDetail]:
+        """
+        Lee la ficha visible. Sin estado se reconoce la pantalla actual y la ficha se lee del
+        mismo fotograma del reconocimiento (sin una segunda captura).
+
+        Args:
+            state: Estado de la pantalla de ficha, si ya se conoce
+
+        Returns:
+            PlayerDetail o None si la pantalla no es una ficha conocida
+        """
+        if state is not None:
+            return self.parse(state=state)
+        state = self.recognizer.recognize_screen_for_test().get('state')
+        return self.parse(frame=self.recognizer.frame_source.current, state=state)
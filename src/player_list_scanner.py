@@ -0,0 +1,1061 @@
+"""
+Escáner de listas de jugadores: Mi Equipo (pantallas menu_miequipo_jugadores*) y
+jugadores normales de Contrato.
+
+La lista es una cuadrícula de tarjetas (2 columnas x 4 filas visibles en Mi Equipo,
+1 columna en Contrato). El escáner recorta el nombre de cada tarjeta visible, calcula
+un hash de la imagen del nombre y sólo pasa por OCR los nombres que no ha visto antes,
+de modo que tras cada desplazamiento únicamente se leen las filas nuevas. La búsqueda se detiene en
+cuanto aparece el jugador y, cuando hay que recorrer muchas filas, el
+desplazamiento se hace manteniendo pulsada la cruceta en lugar de pulsación a
+pulsación. El tiempo de búsqueda depende de la posición del jugador en la lista,
+no de un número fijo de desplazamientos.
+
+Además del nombre, de cada tarjeta se leen la valoración, la posición y (en Contrato)
+el precio, de modo que la lista se puede ordenar una vez desde el menú "Ordenar" y
+filtrar localmente (find_first) sin recorrer los menús de filtros del juego. El
+escáner conoce el orden activo (marca y flecha del panel "Ordenar"): deja de recorrer
+la lista cuando el campo ordenado de varias tarjetas seguidas supera el valor buscado
+y usa el catálogo para estimar hasta dónde desplazarse.
+"""
+
+import os
+import re
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+import yaml
+
+from gamepad_controller import GamepadButton, DPAD_DIRECTIONS, RepeatModel
+from digit_recognizer import binarize
+from text_index import normalize_text
+from text_matcher import levenshtein
+from player_catalog import PlayerRecord, LIST_MY_TEAM, LIST_NORMAL_PLAYERS
+
+logger = logging.getLogger('player_list_scanner')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(PROJECT_DIR, "config", "settings.yaml")
+
+# Geometría de la lista en coordenadas normalizadas (fracción del ancho/alto de pantalla)
+PLAYER_LIST_LAYOUT = {
+    'columns': [(0.0813, 0.4938), (0.5063, 0.9188)],  # (x inicial, x final) de las tarjetas de cada columna
+    'row_tops': [0.1889, 0.3556, 0.5222, 0.6889],       # y superior de cada fila visible
+    'row_height': 0.1556,                                # Alto de una tarjeta
+    'name_box': (0.27, 0.23, 0.93, 0.52),                # Nombre dentro de la tarjeta (x0, y0, x1, y1 relativos)
+    'scrollbar': (0.935, 0.17, 0.945, 0.87),             # Barra de desplazamiento (x0, y0, x1, y1)
+    'fields': {                                          # Datos de la tarjeta (x0, y0, x1, y1 relativos)
+        'rating': (0.040, 0.175, 0.098, 0.40),
+        'position': (0.040, 0.395, 0.098, 0.53),
+    },
+    'selected_scale': 1.035,                             # La tarjeta seleccionada se amplía sobre su centro
+}
+
+# Lista de jugadores normales de Contrato: una sola columna de tarjetas anchas
+CONTRACT_LIST_LAYOUT = {
+    'columns': [(0.1375, 0.8625)],
+    'row_tops': [0.1889, 0.3556, 0.5222, 0.6889],
+    'row_height': 0.1556,
+    'name_box': (0.1566, 0.23, 0.55, 0.52),
+    'scrollbar': (0.885, 0.17, 0.895, 0.87),
+    'fields': {
+        'rating': (0.030, 0.175, 0.068, 0.40),
+        'position': (0.030, 0.395, 0.068, 0.53),
+        'price': (0.856, 0.33, 0.984, 0.60),
+    },
+    'selected_scale': 1.035,
+}
+
+# Campos numéricos de las tarjetas (se leen con el atlas de glifos)
+NUMERIC_CARD_FIELDS = ('rating', 'price')
+
+# Panel "Ordenar" (botón X de la lista): opciones en coordenadas normalizadas
+SORT_MENU_LAYOUT = {
+    'x': (0.5438, 0.9688),   # (x inicial, x final) de las opciones
+    'top': 0.1889,           # y superior de la primera opción
+    'row_step': 0.0667,      # Distancia vertical entre opciones
+    'row_height': 0.0556,    # Alto de una opción
+    'check_x': (0.9375, 0.9688),  # Zona de la marca de verificación del orden activo
+    'arrow': (0.93, 0.08, 0.975, 0.15),  # Flecha de dirección (arriba: ascendente, abajo: descendente)
+}
+
+# Opciones del panel "Ordenar" de cada lista, en el orden en que aparecen
+SORT_OPTIONS = {
+    LIST_NORMAL_PLAYERS: ['posicion', 'valoracion', 'valor', 'precio'],
+    LIST_MY_TEAM: ['nombre', 'posicion', 'valoracion', 'contratacion', 'valor', 'nivel'],
+}
+
+# Campo de PlayerRecord por el que queda ordenada la lista con cada opción (las demás no se leen en las tarjetas)
+SORT_FIELDS = {
+    'precio': 'price',
+    'valoracion': 'rating',
+    'nombre': 'name',
+}
+
+# Tarjetas seguidas fuera del límite del orden activo necesarias para dejar de recorrer la lista
+# (una sola puede ser una lectura errónea, p. ej. un precio de 1500 leído como 15000)
+PAST_BOUND_CONFIRMATIONS = 2
+
+# Valores por defecto de la sección 'player_list' de settings.yaml
+DEFAULT_SCANNER_SETTINGS = {
+    'tap_duration': 0.05,         # Duración de una pulsación de cruceta
+    'tap_interval': 0.12,         # Espera tras cada pulsación para que la lista se mueva
+    'hold_min_rows': 4,           # A partir de cuántas filas se desplaza manteniendo pulsada la cruceta
+    'hold_initial_delay': 0.35,   # Retardo hasta que el juego empieza a repetir la pulsación mantenida
+    'hold_repeat_interval': 0.1,  # Intervalo de repetición de la pulsación mantenida
+    'settle_time': 0.2,           # Espera tras desplazarse antes de capturar
+    'max_pages': 60,              # Páginas máximas a recorrer antes de rendirse
+    'sort_menu_delay': 0.4,       # Espera tras abrir o cerrar el panel "Ordenar"
+    'selected_brightness': 150,   # Brillo medio mínimo de la tarjeta seleccionada (fondo blanco)
+    'max_edit_ratio': 0.2,        # Fracción de caracteres del nombre que pueden diferir en el OCR
+    'scroll_max_correction': 2,   # Filas de error del desplazamiento mantenido que se corrigen pulsando
+}
+
+# Tamaño (ancho, alto) del hash de la imagen de un nombre
+_HASH_SIZE = (48, 12)
+
+# Bits (de 576) en que pueden diferir dos hashes del mismo texto. El resaltado de la tarjeta
+# seleccionada (texto oscuro sobre blanco y ampliado) cambia unos 30 bits; nombres distintos
+# de la lista difieren en más de 140
+NAME_HASH_TOLERANCE = 48
+
+
+def name_hash(gray: np.ndarray) -> bytes:
+    """
+    Hash de la imagen de un nombre.
+
+    Se binariza con polaridad automática, se recorta al texto y se reduce a una
+    rejilla fija de bits. El hash del mismo nombre cambia ligeramente cuando la
+    tarjeta está seleccionada (el grosor del trazo no es el mismo con texto oscuro
+    sobre blanco), así que los hashes se comparan con hash_distance y
+    NAME_HASH_TOLERANCE, no por igualdad.
+
+    Args:
+        gray: Recorte del nombre en escala de grises
+
+    Returns:
+        Bytes del hash (b"" si no hay texto)
+    """
+    binary = binarize(gray)
+    x, y, w, h = cv2.boundingRect(binary)
+    if w == 0 or h == 0:
+        return b""
+    small = cv2.resize(binary[y:y + h, x:x + w], _HASH_SIZE, interpolation=cv2.INTER_AREA)
+    return np.packbits(small > 127).tobytes()
+
+
+def hash_distance(a: bytes, b: bytes) -> int:
+    """Número de bits distintos entre dos hashes de name_hash (máximo si alguno está vacío)."""
+    if not a or not b or len(a) != len(b):
+        return 0 if a == b else 8 * max(len(a), len(b))
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).bit_count()
+
+
+def same_text(a: bytes, b: bytes) -> bool:
+    """Indica si dos hashes corresponden al mismo texto."""
+    return hash_distance(a, b) <= NAME_HASH_TOLERANCE
+
+
+def rows_match(a: Sequence[Tuple[bytes, ...]], b: Sequence[Tuple[bytes, ...]]) -> bool:
+    """Indica si dos listas de filas (hashes por fila) muestran los mismos nombres."""
+    return len(a) == len(b) and all(
+        len(row_a) == len(row_b) and all(same_text(x, y) for x, y in zip(row_a, row_b))
+        for row_a, row_b in zip(a, b))
+
+
+def cache_lookup(cache: Dict[bytes, str], key: bytes) -> Optional[str]:
+    """
+    Busca un hash en una caché de textos, aceptando hashes cercanos (ver NAME_HASH_TOLERANCE).
+
+    Un acierto aproximado se guarda también con la clave exacta para la próxima vez.
+    """
+    text = cache.get(key)
+    if text is not None:
+        return text
+    best = None
+    for known, known_text in cache.items():
+        distance = hash_distance(known, key)
+        if distance <= NAME_HASH_TOLERANCE and (best is None or distance < best[0]):
+            best = (distance, known_text)
+    if best is None:
+        return None
+    cache[key] = best[1]
+    return best[1]
+
+
+class PlayerListScanner:
+    """
+    Busca jugadores por nombre en la lista de Mi Equipo leyendo sólo las filas nuevas.
+    """
+
+    def __init__(self, gamepad_controller, screen_recognizer, layout: Dict = None, catalog=None,
+                 list_name: str = LIST_MY_TEAM):
+        """
+        Inicializa el escáner.
+
+        Args:
+            gamepad_controller: Controlador de gamepad
+            screen_recognizer: Reconocedor de pantalla (captura y OCR)
+            layout: Geometría de la lista (por defecto PLAYER_LIST_LAYOUT)
+            catalog: Catálogo de jugadores (PlayerCatalog) donde registrar lo visto y consultar posiciones
+            list_name: Nombre de la lista en el catálogo
+        """
+        self.gamepad = gamepad_controller
+        self.recognizer = screen_recognizer
+        self.layout = layout or PLAYER_LIST_LAYOUT
+        self.catalog = catalog
+        self.list_name = list_name
+        self.settings = self._load_settings()
+        # Hash de la imagen del nombre -> texto leído (se conserva entre búsquedas)
+        self._name_cache: Dict[bytes, str] = {}
+        # Hash de la imagen de la posición -> texto leído
+        self._position_cache: Dict[bytes, str] = {}
+        self.stats = {'ocr_reads': 0, 'cache_hits': 0, 'pages': 0}
+        # Fila de la lista en la que quedó el cursor tras el último recorrido (aproximada)
+        self.cursor_row = 0
+        # Orden activo de la lista (clave de SORT_OPTIONS) y su dirección, si se conocen
+        self.sort_key: Optional[str] = None
+        self.sort_descending: Optional[bool] = None
+        # Repetición automática de la cruceta, recalibrada con cada desplazamiento verificado
+        self.repeat_model = RepeatModel(self.settings['hold_initial_delay'], self.settings['hold_repeat_interval'])
+
+    def _load_settings(self) -> Dict:
+        """Carga la sección 'player_list' de settings.yaml sobre los valores por defecto."""
+        settings = dict(DEFAULT_SCANNER_SETTINGS)
+        try:
+            if os.path.exists(SETTINGS_FILE):
+                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f) or {}
+                for key, value in (data.get('player_list') or {}).items():
+                    if key in settings:
+                        settings[key] = value
+        except Exception as e:
+            logger.error(f"Error al cargar {SETTINGS_FILE}: {e}. Usando valores por defecto.")
+        return settings
+
+    def _cell_boxes(self, width: int, height: int) -> List[Tuple[int, int, Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+        """
+        Calcula las tarjetas visibles en píxeles.
+
+        Returns:
+            Lista de (fila, columna, caja de la tarjeta, caja del nombre), cajas como (x0, y0, x1, y1)
+        """
+        cells = []
+        nx0, ny0, nx1, ny1 = self.layout['name_box']
+        card_height = self.layout['row_height'] * height
+        for row, top in enumerate(self.layout['row_tops']):
+            y0 = top * height
+            for col, (left, right) in enumerate(self.layout['columns']):
+                x0, x1 = left * width, right * width
+                card_width = x1 - x0
+                card = (int(x0), int(y0), int(x1), int(y0 + card_height))
+                name = (int(x0 + nx0 * card_width), int(y0 + ny0 * card_height),
+                        int(x0 + nx1 * card_width), int(y0 + ny1 * card_height))
+                cells.append((row, col, card, name))
+        return cells
+
+    def read_visible(self, frame) -> Tuple[List[Tuple[int, int, str]], Optional[Tuple[int, int]]]:
+        """
+        Lee los nombres de las tarjetas visibles, usando OCR sólo para las no vistas antes.
+
+        Args:
+            frame: Fotograma capturado (Frame)
+
+        Returns:
+            Tupla (lista de (fila, columna, nombre, hash), (fila, columna) seleccionada o None)
+        """
+        gray = frame.gray
+        height, width = gray.shape[:2]
+        names = []
+        selected = None
+        best_brightness = self.settings['selected_brightness']
+        for row, col, (cx0, cy0, cx1, cy1), (nx0, ny0, nx1, ny1) in self._cell_boxes(width, height):
+            brightness = cv2.mean(gray[cy0:cy1, cx0:cx1])[0]
+            if brightness >= best_brightness:
+                best_brightness = brightness
+                selected = (row, col)
+
+            crop = gray[ny0:ny1, nx0:nx1]
+            key = name_hash(crop)
+            if not key:
+                continue # Tarjeta vacía (final de la lista)
+            text = cache_lookup(self._name_cache, key)
+            if text is None:
+                text = self.recognizer._extract_and_clean_text(crop, 'line')
+                self._name_cache[key] = text
+                self.stats['ocr_reads'] += 1
+            else:
+                self.stats['cache_hits'] += 1
+            names.append((row, col, text, key))
+        return names, selected
+
+    def scrollbar_position(self, frame) -> int:
+        """
+        Posición (fila de píxeles) del indicador de la barra de desplazamiento, o -1 si no se ve.
+
+        Distingue páginas con nombres repetidos y permite detectar el final de la lista.
+        """
+        gray = frame.gray
+        height, width = gray.shape[:2]
+        x0, y0, x1, y1 = self.layout['scrollbar']
+        strip = gray[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+        if strip.size == 0:
+            return -1
+        bright_rows = np.flatnonzero(strip.max(axis=1) > 128)
+        return int(bright_rows[0]) if bright_rows.size else -1
+
+    def _best_match(self, cells: List[Tuple[int, int, str, bytes]], target: str) -> Optional[Tuple[int, int]]:
+        """
+        Devuelve la tarjeta visible cuyo nombre está más cerca del buscado, tolerando errores de OCR.
+
+        Returns:
+            (fila, columna) de la mejor coincidencia o None si ninguna está dentro de la tolerancia
+        """
+        allowed = int(len(target) * self.settings['max_edit_ratio'])
+        best = None
+        for row, col, text, _ in cells:
+            if not text:
+                continue
+            distance = levenshtein(normalize_text(text), target, allowed)
+            if distance <= allowed and (best is None or distance < best[0]):
+                best = (distance, (row, col))
+                if distance == 0:
+                    break
+        return best[1] if best is not None else None
+
+    def _tap(self, button: GamepadButton, times: int = 1) -> None:
+        """
+        Pulsa un botón varias veces dejando que la lista se mueva entre pulsaciones (con el
+        retardo calibrado para la pantalla actual si existe, ver input_calibration).
+        """
+        for _ in range(times):
+            self.gamepad.tap(button, wait=self.settings['tap_interval'], duration=self.settings['tap_duration'],
+                             state=self.recognizer.current_state)
+
+    def move_rows(self, rows: int) -> None:
+        """
+        Mueve el cursor un número de filas (positivo hacia abajo).
+
+        Los desplazamientos largos mantienen pulsada la cruceta (ver scroll).
+        """
+        if rows == 0:
+            return
+        if abs(rows) >= self.settings['hold_min_rows']:
+            self.scroll('down' if rows > 0 else 'up', abs(rows))
+            return
+        self._tap(GamepadButton.DPAD_DOWN if rows > 0 else GamepadButton.DPAD_UP, abs(rows))
+        time.sleep(self.settings['settle_time'])
+
+    def _visible_rows(self, frame) -> Tuple[List[Tuple[bytes, ...]], Optional[Tuple[int, int]]]:
+        """
+        Hashes de los nombres de cada fila visible y tarjeta seleccionada, sin OCR.
+
+        Returns:
+            Tupla (hashes por fila, (fila, columna) seleccionada o None)
+        """
+        gray = frame.gray
+        height, width = gray.shape[:2]
+        visible_rows = len(self.layout['row_tops'])
+        keys: List[List[bytes]] = [[] for _ in range(visible_rows)]
+        selected = None
+        best_brightness = self.settings['selected_brightness']
+        for row, col, (cx0, cy0, cx1, cy1), (nx0, ny0, nx1, ny1) in self._cell_boxes(width, height):
+            brightness = cv2.mean(gray[cy0:cy1, cx0:cx1])[0]
+            if brightness >= best_brightness:
+                best_brightness = brightness
+                selected = (row, col)
+            key = name_hash(gray[ny0:ny1, nx0:nx1])
+            if key:
+                keys[row].append(key)
+        return [tuple(row_keys) for row_keys in keys], selected
+
+    def scroll(self, direction: str, count: int) -> int:
+        """
+        Desplaza el cursor `count` filas manteniendo pulsada la cruceta, verificando el avance.
+
+        Mientras la cruceta está pulsada se capturan fotogramas y se cuenta cada cambio de fila
+        (cursor o lista desplazada, comparando los hashes de los nombres). La suelta está
+        programada en el instante que predice el modelo de repetición, pero se adelanta si se
+        alcanza antes la fila objetivo. Al terminar se corrigen con pulsaciones sueltas los
+        errores pequeños y se recalibra el modelo con los instantes observados.
+
+        Args:
+            direction: 'up' o 'down'
+            count: Filas a mover
+
+        Returns:
+            Filas movidas según la verificación (count si no se pudo verificar)
+        """
+        if direction not in ('up', 'down'):
+            raise ValueError(f"Dirección no válida para la lista: {direction}. Debe ser 'up' o 'down'")
+        if count <= 0:
+            return 0
+        button = DPAD_DIRECTIONS[direction]
+        sign = 1 if direction == 'down' else -1
+        frame = self.recognizer.capture_frame()
+        state = self._track_rows(frame, None) if frame is not None else None
+        if state is None:
+            # Sin referencia inicial no se puede verificar: desplazamiento en lazo abierto
+            self.gamepad.scroll(direction, count, self.repeat_model).result()
+            time.sleep(self.settings['settle_time'])
+            return count
+
+        hold_time = self.repeat_model.hold_time(count)
+        start_position = state['position']
+        progress = 0
+        move_times = []
+        press_time = time.perf_counter()
+        self.gamepad.hold_button(button)
+        release = self.gamepad.apply_async({button: False}, delay=hold_time)
+        while not release.done():
+            frame = self.recognizer.capture_frame()
+            if frame is None:
+                break
+            state = self._track_rows(frame, state)
+            moved = (state['position'] - start_position) * sign
+            if moved > progress:
+                move_times.extend([frame.timestamp] * (moved - progress))
+                progress = moved
+            if progress >= count and release.cancel():
+                self.gamepad.release_button(button)
+                logger.debug(f"Suelta adelantada tras {time.perf_counter() - press_time:.2f} s (previstos {hold_time:.2f} s)")
+                break
+        release_time = release.result() if not release.cancelled() else time.perf_counter()
+
+        time.sleep(self.settings['settle_time'])
+        frame = self.recognizer.capture_frame()
+        if frame is not None:
+            state = self._track_rows(frame, state)
+            progress = (state['position'] - start_position) * sign
+        if frame is None or not state['verified']:
+            # Sin verificación final no se sabe cuánto falta: no se corrige a ciegas
+            logger.warning(f"No se pudo verificar el desplazamiento de {count} filas; se asume completo")
+            return count
+        logger.info(f"Desplazamiento mantenido de {count} filas: {progress} verificadas "
+                    f"({release_time - press_time:.2f} s pulsado)")
+        self.repeat_model.observe(press_time, move_times)
+
+        error = count - progress
+        if 0 < abs(error) <= self.settings['scroll_max_correction']:
+            self._tap(button if error > 0 else DPAD_DIRECTIONS['up' if direction == 'down' else 'down'], abs(error))
+            progress = count
+        elif error:
+            logger.warning(f"Desplazamiento de {progress} filas en lugar de {count} (¿final de la lista?)")
+        return progress
+
+    def _track_rows(self, frame, state: Optional[Dict]) -> Optional[Dict]:
+        """
+        Actualiza la posición absoluta del cursor (fila superior de la lista + fila seleccionada).
+
+        Las filas se comparan con tolerancia (rows_match), porque el hash del nombre de la tarjeta
+        seleccionada difiere del de la misma tarjeta sin seleccionar. Los fotogramas en plena
+        animación (sin tarjeta seleccionada o con filas que no encajan con el último fotograma
+        estable) no cambian la posición y dejan el estado sin verificar ('verified' False).
+
+        Returns:
+            Estado {'rows', 'top_row', 'position', 'verified'} o None si el primer fotograma no
+            sirve de referencia
+        """
+        rows, selected = self._visible_rows(frame)
+        if selected is None:
+            return dict(state, verified=False) if state is not None else None
+        if state is None:
+            return {'rows': rows, 'top_row': 0, 'position': selected[0], 'verified': True}
+        visible_rows = len(rows)
+        previous = state['rows']
+        shifts = [shift for shift in range(-(visible_rows - 1), visible_rows)
+                  if (rows_match(rows[:visible_rows - shift], previous[shift:]) if shift >= 0
+                      else rows_match(rows[-shift:], previous[:visible_rows + shift]))]
+        if not shifts:
+            return dict(state, verified=False)
+        top_row = state['top_row'] + min(shifts, key=abs)
+        return {'rows': rows, 'top_row': top_row, 'position': top_row + selected[0], 'verified': True}
+
+    def _move_cursor_to(self, current: Tuple[int, int], target: Tuple[int, int]) -> None:
+        """Mueve el cursor entre dos tarjetas visibles."""
+        d_row = target[0] - current[0]
+        d_col = target[1] - current[1]
+        if d_row:
+            self._tap(GamepadButton.DPAD_DOWN if d_row > 0 else GamepadButton.DPAD_UP, abs(d_row))
+        if d_col:
+            self._tap(GamepadButton.DPAD_RIGHT if d_col > 0 else GamepadButton.DPAD_LEFT, abs(d_col))
+
+    @staticmethod
+    def _estimate_shift(previous_rows: List[Tuple[bytes, ...]], rows: List[Tuple[bytes, ...]], expected: int) -> int:
+        """
+        Estima cuántas filas se ha desplazado la lista comparando los hashes de las filas.
+
+        Entre los desplazamientos compatibles (las filas que siguen visibles coinciden) se elige
+        el más cercano al esperado; si no hay ninguno (página totalmente nueva), se usa el esperado.
+        """
+        visible_rows = len(rows)
+        candidates = [shift for shift in range(visible_rows)
+                      if rows_match(rows[:visible_rows - shift], previous_rows[shift:])]
+        if not candidates:
+            return expected
+        return min(candidates, key=lambda shift: abs(shift - expected))
+
+    def find_player(self, player_name: str, start_row: int = None, max_pages: int = None) -> bool:
+        """
+        Busca un jugador en la lista y deja el cursor sobre su tarjeta.
+
+        Se asume que la lista está al principio (cursor en la primera tarjeta) al empezar.
+
+        Args:
+            player_name: Nombre del jugador
+            start_row: Fila aproximada del jugador si se conoce; por defecto se consulta el catálogo.
+                Permite saltar directamente hasta ella con la cruceta mantenida. Es sólo una pista:
+                si la lista ha cambiado desde que se vio y el jugador no aparece a partir de esa
+                fila, se vuelve al principio y se recorre la lista completa
+            max_pages: Páginas máximas a recorrer (por defecto, settings 'max_pages')
+
+        Returns:
+            True si el jugador quedó seleccionado, False si no se encontró
+        """
+        target = normalize_text(player_name)
+        if not target:
+            return False
+        columns = len(self.layout['columns'])
+        logger.info(f"Buscando jugador '{player_name}' en la lista")
+
+        if start_row is None and self.catalog is not None:
+            # Sólo sirven las posiciones vistas con el orden activo (si se conoce)
+            known = [r for r in self.catalog.find(player_name, self.list_name) if r.list_index is not None
+                     and (self.sort_label is None or r.sort_key in (None, self.sort_label))]
+            if known:
+                start_row = known[0].list_index // columns
+                logger.info(f"'{player_name}' visto antes en el índice {known[0].list_index}: saltando a la fila {start_row}")
+        if start_row is None and self.sort_key == 'nombre':
+            # Lista ordenada por nombre: saltar hasta el último nombre conocido anterior al buscado
+            estimate = self.estimate_index(target)
+            if estimate is not None:
+                start_row = estimate // columns
+                logger.info(f"Orden por nombre: '{player_name}' debe estar después del índice {estimate}")
+
+        def passed_target(cells, details, top_row):
+            # Con la lista ordenada por nombre, si todos los nombres visibles van ya después del buscado, no está
+            names = [PlayerRecord(name=text) for _, _, text, _ in cells if text]
+            return bool(names) and all(self.past_bound(record, 'name', upper=target, lower=target) for record in names)
+
+        def scan(start_row):
+            return self._scan(lambda cells, details, top_row: self._best_match(cells, target),
+                              f"jugador '{player_name}'", start_row=start_row, max_pages=max_pages,
+                              exhausted=passed_target)
+
+        if scan(start_row):
+            return True
+        if not start_row:
+            return False
+        # La posición conocida ya no vale (jugadores fichados o vendidos, otro orden): el
+        # jugador puede estar antes de la fila de salto
+        logger.info(f"'{player_name}' no está a partir de la fila {start_row}: buscando desde el principio")
+        self.move_rows(-self.cursor_row)
+        return scan(None)
+
+    def find_first(self, predicate: Callable[[PlayerRecord], bool], skip: int = 0, max_pages: int = None,
+                   stop_when: Callable[[PlayerRecord], bool] = None, start_index: int = None) -> Optional[PlayerRecord]:
+        """
+        Recorre la lista desde el principio leyendo los datos de cada tarjeta y deja el cursor
+        sobre la primera que cumple una condición (filtrado local, sin los menús del juego).
+
+        Args:
+            predicate: Condición sobre el PlayerRecord de cada tarjeta (nombre, índice, valoración,
+                posición, precio y, si el catálogo lo conoce, club)
+            skip: Número de coincidencias a saltar antes de detenerse (0 = la primera)
+            max_pages: Páginas máximas a recorrer (por defecto, settings 'max_pages')
+            stop_when: Condición de parada: con la lista ordenada, una tarjeta que la cumple indica
+                que ninguna posterior puede cumplir predicate (ver past_bound). Para no perder
+                coincidencias por una lectura errónea, el recorrido sólo se detiene cuando la cumplen
+                PAST_BOUND_CONFIRMATIONS tarjetas seguidas
+            start_index: Índice desde el que empezar si se sabe que las tarjetas anteriores no
+                cumplen la condición (ver estimate_index)
+
+        Returns:
+            PlayerRecord de la tarjeta seleccionada o None si ninguna cumple la condición
+        """
+        columns = len(self.layout['columns'])
+        seen = set()
+        remaining = skip
+        found = None
+        stopped = False
+
+        past_bound = 0  # Tarjetas seguidas que superan el límite de stop_when
+
+        def match_page(cells, details, top_row):
+            nonlocal remaining, found, stopped, past_bound
+            for row, col, text, _ in cells:
+                index = (top_row + row) * columns + col
+                if not text or index in seen:
+                    continue
+                seen.add(index)
+                record = self._to_record(text, index, details.get((row, col), {}))
+                if stop_when is not None and stop_when(record):
+                    past_bound += 1
+                    if past_bound >= PAST_BOUND_CONFIRMATIONS:
+                        logger.info(f"'{record.name}' (índice {index}) y las {past_bound - 1} tarjetas anteriores "
+                                    f"superan el límite del orden '{self.sort_label}'")
+                        stopped = True
+                        return None
+                    continue
+                past_bound = 0
+                if not predicate(record):
+                    continue
+                if remaining == 0:
+                    found = record
+                    return row, col
+                remaining -= 1
+            return None
+
+        start_row = start_index // columns if start_index else None
+        if not self._scan(match_page, "tarjeta que cumpla los filtros", start_row=start_row, max_pages=max_pages,
+                          read_details=True, exhausted=lambda cells, details, top_row: stopped):
+            return None
+        return found
+
+    def _scan(self, match_page: Callable, description: str, start_row: int = None, max_pages: int = None,
+              read_details: bool = False, exhausted: Callable = None) -> bool:
+        """
+        Recorre la lista página a página hasta que match_page señala una tarjeta visible.
+
+        Args:
+            match_page: Función (tarjetas, datos por tarjeta, fila superior) -> (fila, columna) o None
+            description: Qué se busca (para el log)
+            start_row: Fila de la lista a la que saltar antes de empezar
+            max_pages: Páginas máximas a recorrer (por defecto, settings 'max_pages')
+            read_details: Si True, además del nombre se leen los campos de cada tarjeta (read_cards)
+            exhausted: Función con los mismos argumentos que match_page que indica que, por el orden
+                de la lista, lo buscado ya no puede aparecer más adelante
+
+        Returns:
+            True si el cursor quedó sobre la tarjeta encontrada
+        """
+        max_pages = max_pages if max_pages is not None else self.settings['max_pages']
+        visible_rows = len(self.layout['row_tops'])
+        columns = len(self.layout['columns'])
+
+        # Fila de la lista que ocupa la primera fila visible
+        top_row = 0
+        if start_row:
+            self.move_rows(start_row)
+            top_row = max(0, start_row - (visible_rows - 1))
+        self.cursor_row = start_row or 0
+
+        last_page = None
+        previous_rows = None
+        expected_shift = 0
+        for page in range(max_pages):
+            frame = self.recognizer.capture_frame()
+            if frame is None:
+                logger.error("No se pudo capturar la pantalla durante la búsqueda")
+                return False
+            self.stats['pages'] += 1
+            cells, selected = self.read_visible(frame)
+            details = self.read_cards(frame, cells, selected) if read_details else {}
+
+            rows = [tuple(key for row, _, _, key in cells if row == r) for r in range(visible_rows)]
+            if previous_rows is not None:
+                top_row += self._estimate_shift(previous_rows, rows, expected_shift)
+            previous_rows = rows
+            self._record_cells(frame, cells, top_row, details)
+
+            self.cursor_row = top_row + (selected[0] if selected is not None else 0)
+
+            match = match_page(cells, details, top_row)
+            if match is not None:
+                row, col = match
+                logger.info(f"Encontrado {description} en fila {row}, columna {col} (página {page + 1})")
+                if selected is not None and selected != (row, col):
+                    self._move_cursor_to(selected, (row, col))
+                self.cursor_row = top_row + row
+                return True
+            if exhausted is not None and exhausted(cells, details, top_row):
+                logger.info(f"El orden de la lista descarta {description} en el resto de la lista")
+                return False
+
+            # Si ni la página, ni el cursor ni la barra cambian tras desplazarse, se ha llegado al final
+            page_key = (tuple(text for _, _, text, _ in cells), selected, self.scrollbar_position(frame))
+            if page_key == last_page:
+                logger.info(f"Fin de la lista alcanzado sin encontrar {description}")
+                if self.catalog is not None and cells:
+                    last_row, last_col = cells[-1][0], cells[-1][1]
+                    self.catalog.truncate_list(self.list_name, (top_row + last_row) * columns + last_col + 1)
+                return False
+            last_page = page_key
+
+            # Llevar el cursor a la última fila visible y desplazar una página completa
+            current_row = selected[0] if selected is not None else 0
+            rows_to_move = (visible_rows - 1 - current_row) + visible_rows
+            expected_shift = rows_to_move - (visible_rows - 1 - current_row)
+            self.move_rows(rows_to_move)
+            self.cursor_row += rows_to_move
+
+        logger.warning(f"No se encontró {description} tras {max_pages} páginas")
+        return False
+
+    def _field_box(self, card: Tuple[int, int, int, int], field_box: Tuple[float, float, float, float],
+                   selected: bool) -> Tuple[int, int, int, int]:
+        """
+        Caja en píxeles (x0, y0, x1, y1) de un campo de una tarjeta. La tarjeta seleccionada se
+        dibuja ampliada sobre su centro (layout 'selected_scale').
+        """
+        x0, y0, x1, y1 = card
+        if selected:
+            scale = self.layout.get('selected_scale', 1.0)
+            center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+            half_w, half_h = (x1 - x0) * scale / 2, (y1 - y0) * scale / 2
+            x0, y0, x1, y1 = center_x - half_w, center_y - half_h, center_x + half_w, center_y + half_h
+        width, height = x1 - x0, y1 - y0
+        fx0, fy0, fx1, fy1 = field_box
+        return (int(x0 + fx0 * width), int(y0 + fy0 * height),
+                int(x0 + fx1 * width), int(y0 + fy1 * height))
+
+    def read_cards(self, frame, cells: List[Tuple[int, int, str, bytes]],
+                   selected: Optional[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict]:
+        """
+        Lee los campos (valoración, posición, precio) de las tarjetas visibles.
+
+        Los campos numéricos de todas las tarjetas se clasifican juntos con el atlas de glifos;
+        las posiciones se leen por OCR en el pool del reconocedor y se guardan por hash de imagen,
+        así que cada abreviatura ('SD', 'PT'...) sólo se lee una vez.
+
+        Args:
+            frame: Fotograma capturado (Frame)
+            cells: Tarjetas devueltas por read_visible
+            selected: Tarjeta seleccionada (fila, columna) o None
+
+        Returns:
+            Diccionario (fila, columna) -> {campo: valor}
+        """
+        fields = self.layout.get('fields', {})
+        details: Dict[Tuple[int, int], Dict] = {}
+        if not fields:
+            return details
+        gray = frame.gray
+        height, width = gray.shape[:2]
+        cards = {(row, col): card for row, col, card, _ in self._cell_boxes(width, height)}
+
+        numeric = []  # (tarjeta, campo, recorte)
+        textual = []  # (tarjeta, campo, hash, recorte)
+        for row, col, text, _ in cells:
+            if not text:
+                continue
+            cell = (row, col)
+            details[cell] = {}
+            for field_name, field_box in fields.items():
+                x0, y0, x1, y1 = self._field_box(cards[cell], field_box, cell == selected)
+                crop = gray[y0:y1, x0:x1]
+                if crop.size == 0:
+                    continue
+                if field_name in NUMERIC_CARD_FIELDS:
+                    numeric.append((cell, field_name, crop))
+                    continue
+                key = name_hash(crop)
+                if not key:
+                    continue
+                position = cache_lookup(self._position_cache, key)
+                if position is not None:
+                    self.stats['cache_hits'] += 1
+                    if position:
+                        details[cell][field_name] = position
+                else:
+                    textual.append((cell, field_name, key, crop))
+
+        executor = self.recognizer._get_ocr_executor()
+        futures: List[Tuple[Tuple[int, int], str, Optional[bytes], Future]] = []
+        readings = self.recognizer.digit_recognizer.recognize_many([crop for _, _, crop in numeric])
+        min_confidence = self.recognizer.settings['digit_min_confidence']
+        for (cell, field_name, crop), (text, confidence) in zip(numeric, readings):
+            digits = text.replace(".", "").replace(",", "")
+            if digits.isdigit() and confidence >= min_confidence:
+                details[cell][field_name] = int(digits)
+            else:
+                # Copia del recorte: los buffers del fotograma se reutilizan en la siguiente captura
+                futures.append((cell, field_name, None, executor.submit(
+                    self.recognizer._extract_and_clean_text, crop.copy(), 'digits')))
+        for cell, field_name, key, crop in textual:
+            futures.append((cell, field_name, key, executor.submit(
+                self.recognizer._extract_and_clean_text, crop.copy(), 'word')))
+
+        for cell, field_name, key, future in futures:
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.error(f"Error en OCR del campo '{field_name}' de la tarjeta {cell}: {e}")
+                continue
+            self.stats['ocr_reads'] += 1
+            if key is None:
+                digits = re.sub(r'\D', '', text)
+                if digits:
+                    details[cell][field_name] = int(digits)
+            else:
+                value = re.sub(r'[^A-Z]', '', text.upper())
+                self._position_cache[key] = value
+                if value:
+                    details[cell][field_name] = value
+        return details
+
+    def _to_record(self, name: str, list_index: int, details: Dict) -> PlayerRecord:
+        """Construye el PlayerRecord de una tarjeta, completando el club con el catálogo si lo conoce."""
+        record = PlayerRecord(name=name, list_name=self.list_name, list_index=list_index,
+                              sort_key=self.sort_label, **details)
+        if self.catalog is not None:
+            known = self.catalog.find(name, self.list_name)
+            if known:
+                record.club = known[0].club
+        return record
+
+    def _record_cells(self, frame, cells: List[Tuple[int, int, str, bytes]], top_row: int,
+                      details: Dict[Tuple[int, int], Dict] = None) -> None:
+        """Registra en el catálogo las tarjetas visibles con su índice en la lista, su caja en pantalla y sus datos."""
+        if self.catalog is None:
+            return
+        details = details or {}
+        height, width = frame.gray.shape[:2]
+        offset_x = frame.region.get('left', 0)
+        offset_y = frame.region.get('top', 0)
+        boxes = {(row, col): card for row, col, card, _ in self._cell_boxes(width, height)}
+        columns = len(self.layout['columns'])
+        for row, col, text, _ in cells:
+            if not text:
+                continue
+            x0, y0, x1, y1 = boxes[(row, col)]
+            self.catalog.record_seen(self.list_name, (top_row + row) * columns + col, text,
+                                     box=(x0 + offset_x, y0 + offset_y, x1 - x0, y1 - y0),
+                                     sort_key=self.sort_label, **details.get((row, col), {}))
+
+    def read_sort_menu(self, frame) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Lee el panel "Ordenar" si está abierto.
+
+        Las opciones tienen fondo gris uniforme salvo la que tiene el cursor (blanca); el orden
+        activo se distingue por la marca de verificación azul a la derecha de su opción.
+
+        Args:
+            frame: Fotograma capturado (Frame)
+
+        Returns:
+            Tupla (índice de la opción con el cursor, índice del orden activo o None), o None si
+            el panel no está abierto
+        """
+        options = SORT_OPTIONS.get(self.list_name, [])
+        if not options:
+            return None
+        height, width = frame.gray.shape[:2]
+        x0, x1 = int(SORT_MENU_LAYOUT['x'][0] * width), int(SORT_MENU_LAYOUT['x'][1] * width)
+        cx0, cx1 = int(SORT_MENU_LAYOUT['check_x'][0] * width), int(SORT_MENU_LAYOUT['check_x'][1] * width)
+        cursor, checked = None, None
+        for index in range(len(options)):
+            y0 = int((SORT_MENU_LAYOUT['top'] + index * SORT_MENU_LAYOUT['row_step']) * height)
+            y1 = y0 + int(SORT_MENU_LAYOUT['row_height'] * height)
+            background = np.median(frame.gray[y0:y1, x0:x1])
+            if background >= 230:
+                cursor = index
+            elif not 55 <= background <= 95:
+                return None  # No es una opción del panel: está cerrado
+            check = frame.bgr[y0:y1, cx0:cx1]
+            if np.mean((check[..., 0] > 180) & (check[..., 2] < 100)) > 0.02:
+                checked = index
+        if cursor is None:
+            return None
+        return cursor, checked
+
+    @staticmethod
+    def sort_direction(frame) -> Optional[bool]:
+        """
+        Lee la flecha de dirección del panel "Ordenar".
+
+        La punta de la flecha es la mitad más ancha: arriba para orden ascendente, abajo para descendente.
+        Con el panel cerrado la zona contiene otros textos ("Tienes: 327/500"), que no forman una
+        única figura alta como la flecha.
+
+        Returns:
+            True si el orden es descendente, False si es ascendente, None si no se ve la flecha
+        """
+        height, width = frame.gray.shape[:2]
+        x0, y0, x1, y1 = SORT_MENU_LAYOUT['arrow']
+        bright = frame.gray[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)] > 200
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(bright.astype(np.uint8), connectivity=8)
+        if count < 2:
+            return None
+        largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        if stats[largest, cv2.CC_STAT_HEIGHT] < bright.shape[0] // 2:
+            return None
+        arrow = labels == largest
+        rows = np.flatnonzero(arrow.any(axis=1))
+        if rows.size < 4:
+            return None
+        widths = np.array([np.ptp(np.flatnonzero(arrow[row])) for row in rows])
+        half = len(widths) // 2
+        return bool(widths[half:].mean() > widths[:half].mean())
+
+    @property
+    def sort_label(self) -> Optional[str]:
+        """Orden activo tal como se guarda en el catálogo ('precio_asc', 'nombre_desc'...)."""
+        if self.sort_key is None:
+            return None
+        if self.sort_descending is None:
+            return self.sort_key
+        return f"{self.sort_key}_{'desc' if self.sort_descending else 'asc'}"
+
+    def _open_sort_menu(self):
+        """Abre el panel "Ordenar" y devuelve (fotograma, (cursor, orden activo)) o (None, None) si no se abrió."""
+        self.gamepad.press_button(GamepadButton.X, duration=self.settings['tap_duration'])
+        time.sleep(self.settings['sort_menu_delay'])
+        frame = self.recognizer.capture_frame()
+        menu = self.read_sort_menu(frame) if frame is not None else None
+        if menu is None:
+            logger.error("No se abrió el panel 'Ordenar'")
+            return None, None
+        return frame, menu
+
+    def _close_sort_menu(self) -> None:
+        """Cierra el panel "Ordenar" sin cambiar el orden."""
+        self.gamepad.press_button(GamepadButton.B, duration=self.settings['tap_duration'])
+        time.sleep(self.settings['sort_menu_delay'])
+
+    def read_sort_order(self) -> Optional[Tuple[str, Optional[bool]]]:
+        """
+        Lee el orden activo de la lista abriendo y cerrando el panel "Ordenar" (marca y flecha).
+
+        Returns:
+            Tupla (opción de SORT_OPTIONS, descendente) o None si no se pudo leer
+        """
+        frame, menu = self._open_sort_menu()
+        if menu is None:
+            return None
+        _, checked = menu
+        descending = self.sort_direction(frame)
+        self._close_sort_menu()
+        if checked is None:
+            return None
+        self.sort_key = SORT_OPTIONS[self.list_name][checked]
+        self.sort_descending = descending
+        logger.info(f"Orden activo de la lista: {self.sort_label}")
+        return self.sort_key, descending
+
+    def sort_by(self, sort_key: str, descending: bool = None) -> bool:
+        """
+        Ordena la lista con el panel "Ordenar" (botón X) y deja el cursor al principio de la lista.
+
+        Args:
+            sort_key: Opción de SORT_OPTIONS de la lista ('precio', 'valoracion'...)
+            descending: Dirección deseada (se invierte con el botón Y si hace falta); None para no cambiarla
+
+        Returns:
+            True si la lista quedó ordenada por esa opción (y en esa dirección)
+        """
+        options = SORT_OPTIONS.get(self.list_name, [])
+        if sort_key not in options:
+            logger.error(f"Orden '{sort_key}' no disponible en la lista {self.list_name}: {options}")
+            return False
+        target = options.index(sort_key)
+        previous_label = self.sort_label
+
+        frame, menu = self._open_sort_menu()
+        if menu is None:
+            return False
+        cursor, checked = menu
+
+        if checked != target:
+            if cursor != target:
+                self._tap(GamepadButton.DPAD_DOWN if target > cursor else GamepadButton.DPAD_UP, abs(target - cursor))
+            self.gamepad.press_button(GamepadButton.A, duration=self.settings['tap_duration'])
+            time.sleep(self.settings['sort_menu_delay'])
+            frame = self.recognizer.capture_frame()
+            menu = self.read_sort_menu(frame) if frame is not None else None
+            if menu is None:
+                # El panel se cerró al elegir la opción: volver a abrirlo sólo si hay que cambiar la dirección
+                if descending is not None:
+                    frame, menu = self._open_sort_menu()
+                    if menu is None:
+                        return False
+            elif menu[1] != target:
+                logger.error(f"No se pudo seleccionar el orden '{sort_key}'")
+                self._close_sort_menu()
+                return False
+
+        current_direction = self.sort_direction(frame) if menu is not None else None
+        if descending is not None and current_direction is not None and current_direction != descending:
+            self.gamepad.press_button(GamepadButton.Y, duration=self.settings['tap_duration'])
+            time.sleep(self.settings['sort_menu_delay'])
+            frame = self.recognizer.capture_frame()
+            current_direction = self.sort_direction(frame) if frame is not None else None
+            if current_direction != descending:
+                logger.error(f"No se pudo invertir la dirección del orden '{sort_key}'")
+                self._close_sort_menu()
+                return False
+        if menu is not None:
+            self._close_sort_menu()
+
+        if current_direction is None and checked == target and self.sort_key == sort_key:
+            current_direction = self.sort_descending  # Mismo orden que antes: la dirección no ha cambiado
+        self.sort_key = sort_key
+        self.sort_descending = current_direction
+        logger.info(f"Lista ordenada por '{self.sort_label}'")
+        if self.catalog is not None and previous_label is not None and self.sort_label != previous_label:
+            # Los índices conocidos corresponden al orden anterior
+            self.catalog.clear_list(self.list_name)
+        return True
+
+    def _sort_value(self, record: PlayerRecord):
+        """Valor del campo por el que está ordenada la lista (nombre normalizado para 'nombre'), o None."""
+        field_name = SORT_FIELDS.get(self.sort_key)
+        value = getattr(record, field_name) if field_name else None
+        if isinstance(value, str):
+            value = normalize_text(value)
+        return value if value not in (None, "") else None
+
+    def past_bound(self, record: PlayerRecord, field_name: str, upper=None, lower=None) -> bool:
+        """
+        Indica si, con el orden activo, ninguna tarjeta a partir de esta puede tener el campo
+        dentro de [lower, upper] (p. ej. precio > price_max en una lista ordenada por precio ascendente).
+
+        Args:
+            record: Tarjeta leída
+            field_name: Campo del límite ('price', 'rating', 'name')
+            upper: Límite superior o None
+            lower: Límite inferior o None
+
+        Returns:
+            True si la tarjeta queda fuera del límite. Un valor mal leído puede dar un falso
+            positivo: quien recorre la lista no se detiene hasta que lo confirman
+            PAST_BOUND_CONFIRMATIONS tarjetas seguidas
+        """
+        if SORT_FIELDS.get(self.sort_key) != field_name or self.sort_descending is None:
+            return False
+        value = self._sort_value(record)
+        if value is None:
+            return False
+        if self.sort_descending:
+            return lower is not None and value < lower
+        return upper is not None and value > upper
+
+    def estimate_index(self, value) -> Optional[int]:
+        """
+        Estima el índice a partir del cual puede aparecer un valor del campo ordenado, usando
+        las tarjetas del catálogo vistas con el mismo orden.
+
+        Args:
+            value: Valor buscado (nombre, precio o valoración según el orden activo)
+
+        Returns:
+            Índice de la última tarjeta conocida que va antes del valor, o None si no se puede estimar
+        """
+        if self.catalog is None or self.sort_key not in SORT_FIELDS or self.sort_descending is None:
+            return None
+        if isinstance(value, str):
+            value = normalize_text(value)
+        label = self.sort_label
+        best = None
+        for record in self.catalog.get_list(self.list_name):
+            known = self._sort_value(record)
+            if record.sort_key != label or known is None or type(known) is not type(value):
+                continue
+            before = known > value if self.sort_descending else known < value
+            if before:
+                best = record.list_index
+        return best
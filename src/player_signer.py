@@ -12,19 +12,23 @@ import time
 import os
 from gamepad_controller import GamepadController, GamepadButton, EFootballSequences
 from screen_recognizer import ScreenRecognizer, GameScreen, ScreenElement
+from player_list_scanner import PlayerListScanner, CONTRACT_LIST_LAYOUT
+from player_detail_parser import PlayerDetailParser
+from player_catalog import PlayerCatalog, LIST_NORMAL_PLAYERS, FILTER_KEYS, matches_filters
 
 class PlayerSigner:
     """
     Clase para automatizar el proceso de fichaje de jugadores en eFootball.
     """
     
-    def __init__(self, gamepad_controller=None, screen_recognizer=None):
+    def __init__(self, gamepad_controller=None, screen_recognizer=None, catalog=None):
         """
         Inicializa el fichador de jugadores.
         
         Args:
             gamepad_controller (GamepadController, optional): Controlador de gamepad a utilizar
             screen_recognizer (ScreenRecognizer, optional): Reconocedor de pantalla a utilizar
+            catalog (PlayerCatalog, optional): Catálogo de jugadores (por defecto, el del proyecto)
         """
         # Inicializar el controlador de gamepad si no se proporciona uno
         if gamepad_controller is None:
@@ -38,6 +42,12 @@ class PlayerSigner:
         else:
             self.recognizer = screen_recognizer
         
+        # Catálogo local de jugadores y escáner de la lista de jugadores normales
+        self.catalog = catalog if catalog is not None else PlayerCatalog()
+        self.list_scanner = PlayerListScanner(self.gamepad, self.recognizer, layout=CONTRACT_LIST_LAYOUT,
+                                              catalog=self.catalog, list_name=LIST_NORMAL_PLAYERS)
+        self.detail_parser = PlayerDetailParser(self.recognizer, catalog=self.catalog)
+        
         # Directorio para guardar capturas de pantalla
         self.screenshots_dir = "/home/ubuntu/efootball_automation/screenshots"
         os.makedirs(self.screenshots_dir, exist_ok=True)
@@ -106,8 +116,7 @@ class PlayerSigner:
                 
                 # Intentar volver al menú principal presionando B varias veces
                 for _ in range(3):
-                    self.gamepad.press_button(GamepadButton.B, duration=0.2)
-                    time.sleep(1.0)
+                    self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
                 
                 # Verificar si hemos vuelto al menú principal
                 new_screen = self.recognizer.recognize_screen()
@@ -190,10 +199,15 @@ class PlayerSigner:
         print("No se pudo seleccionar la opción de jugadores normales después de varios intentos")
         return False
     
-    def apply_filters(self, filters=None, max_attempts=5, wait_time=2.0):
+    def apply_filters(self, filters=None, max_attempts=5, wait_time=2.0, mode="local", match_index=0,
+                      sort_key="precio"):
         """
         Aplica filtros para buscar jugadores específicos.
         
+        En modo "local" (por defecto) la lista se ordena una sola vez, se leen las tarjetas
+        visibles y los filtros se comprueban aquí; el cursor queda sobre el jugador que los
+        cumple. El modo "menu" recorre los menús de filtros del juego a ciegas.
+        
         Args:
             filters (dict, optional): Diccionario con los filtros a aplicar
                 Ejemplo: {
@@ -203,10 +217,16 @@ class PlayerSigner:
                 }
             max_attempts (int): Número máximo de intentos
             wait_time (float): Tiempo de espera entre intentos en segundos
+            mode (str): "local" o "menu"
+            match_index (int): En modo local, cuántos jugadores que cumplen los filtros saltar
+            sort_key (str): En modo local, orden de la lista antes de recorrerla
         
         Returns:
             bool: True si se aplicaron los filtros correctamente, False en caso contrario
         """
+        if mode == "local":
+            return self.apply_filters_locally(filters, match_index=match_index, sort_key=sort_key)
+        
         print("Aplicando filtros para buscar jugadores...")
         
         # Si no se proporcionan filtros, no hacer nada
@@ -235,8 +255,7 @@ class PlayerSigner:
         print("Aplicando filtros (simulación)...")
         
         # Presionar Y para abrir el menú de filtros
-        self.gamepad.press_button(GamepadButton.Y, duration=0.2)
-        time.sleep(1.0)
+        self.gamepad.tap(GamepadButton.Y, wait=1.0, duration=0.2)
         
         # Navegar por los filtros y aplicarlos según los valores proporcionados
         # Nota: Esta es una implementación simplificada, en una versión real
@@ -246,69 +265,50 @@ class PlayerSigner:
         if "position" in filters:
             print(f"Aplicando filtro de posición: {filters['position']}")
             # Navegar al filtro de posición y seleccionarlo
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Seleccionar la posición (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Volver al menú de filtros
-            self.gamepad.press_button(GamepadButton.B, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
         
         # Club
         if "club" in filters:
             print(f"Aplicando filtro de club: {filters['club']}")
             # Navegar al filtro de club y seleccionarlo
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Seleccionar el club (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Volver al menú de filtros
-            self.gamepad.press_button(GamepadButton.B, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
         
         # Precio máximo
         if "price_max" in filters:
             print(f"Aplicando filtro de precio máximo: {filters['price_max']}")
             # Navegar al filtro de precio y seleccionarlo
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.DPAD_DOWN, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Seleccionar el precio máximo (simulación)
-            self.gamepad.press_button(GamepadButton.DPAD_RIGHT, duration=0.2)
-            time.sleep(0.5)
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.DPAD_RIGHT, wait=0.5, duration=0.2)
+            self.gamepad.tap(GamepadButton.A, wait=1.0, duration=0.2)
             
             # Volver al menú de filtros
-            self.gamepad.press_button(GamepadButton.B, duration=0.2)
-            time.sleep(1.0)
+            self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
         
         # Aplicar los filtros
         print("Aplicando filtros seleccionados...")
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(2.0)
+        self.gamepad.tap(GamepadButton.A, wait=2.0, duration=0.2)
         
         # Guardar una captura de pantalla después de aplicar filtros
         self.recognizer.save_screenshot("despues_filtros.png", self.screenshots_dir)
@@ -316,6 +316,55 @@ class PlayerSigner:
         print("Filtros aplicados correctamente")
         return True
     
+    def apply_filters_locally(self, filters=None, match_index=0, sort_key="precio"):
+        """
+        Ordena la lista una vez, recorre sus tarjetas comprobando los filtros y deja el cursor
+        sobre el jugador que los cumple.
+        
+        Las tarjetas muestran valoración, posición y precio; el club se toma del catálogo
+        (fichas leídas antes), así que los jugadores cuyo club no se conoce no cumplen ese filtro.
+        
+        Args:
+            filters (dict, optional): Filtros (position, club, price_max)
+            match_index (int): Cuántos jugadores que cumplen los filtros saltar (0 = el primero)
+            sort_key (str): Orden de la lista ('precio', 'valoracion', 'valor', 'posicion')
+        
+        Returns:
+            bool: True si el cursor quedó sobre un jugador que cumple los filtros
+        """
+        if not filters:
+            print("No se proporcionaron filtros, omitiendo paso")
+            return True
+        unsupported = set(filters) - set(FILTER_KEYS)
+        if unsupported:
+            print(f"Filtros no admitidos en modo local, se ignoran: {sorted(unsupported)}")
+        
+        print(f"Aplicando filtros localmente: {filters}")
+        price_max = filters.get("price_max")
+        # Ordenando por precio ascendente, el recorrido termina en cuanto un precio supera price_max
+        descending = False if sort_key == "precio" and price_max is not None else None
+        if not self.list_scanner.sort_by(sort_key, descending=descending):
+            print(f"No se pudo ordenar la lista por '{sort_key}'")
+            return False
+        
+        stop_when = None
+        start_index = None
+        if price_max is not None:
+            stop_when = lambda r: self.list_scanner.past_bound(r, "price", upper=price_max)
+            if self.list_scanner.sort_key == "precio" and self.list_scanner.sort_descending:
+                # Orden descendente: los jugadores más caros que price_max vistos antes se saltan
+                last_expensive = self.list_scanner.estimate_index(price_max)
+                start_index = last_expensive + 1 if last_expensive is not None and match_index == 0 else None
+        
+        record = self.list_scanner.find_first(lambda r: matches_filters(r, filters), skip=match_index,
+                                              stop_when=stop_when, start_index=start_index)
+        if record is None:
+            print("Ningún jugador de la lista cumple los filtros")
+            return False
+        print(f"Jugador que cumple los filtros: {record.name} (índice {record.list_index}, "
+              f"{record.position}, valoración {record.rating}, precio {record.price})")
+        return True
+    
     def select_player(self, player_index=0, max_attempts=5, wait_time=2.0):
         """
         Selecciona un jugador de la lista según su índice.
@@ -342,16 +391,12 @@ class PlayerSigner:
         # Guardar una captura de pantalla antes de seleccionar el jugador
         self.recognizer.save_screenshot("antes_seleccion_jugador.png", self.screenshots_dir)
         
-        # Navegar hasta el jugador deseado
-        for i in range(player_index):
-            print(f"Navegando al jugador {i+1}...")
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(0.5)
+        # Navegar hasta el jugador deseado (los desplazamientos largos mantienen pulsada la cruceta)
+        self.list_scanner.move_rows(player_index)
         
         # Seleccionar el jugador
         print(f"Seleccionando jugador {player_index}...")
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
         
         # Verificar si hemos llegado a la pantalla de confirmación de compra
         new_screen = self.recognizer.recognize_screen()
@@ -366,6 +411,18 @@ class PlayerSigner:
             print(f"No se pudo seleccionar el jugador. Pantalla actual: {new_screen.value}")
             return False
     
+    def read_player_detail(self, state=None):
+        """
+        Lee la ficha del jugador visible (estadísticas o habilidades) y la guarda en el catálogo.
+        
+        Args:
+            state (str): Estado de la pantalla de ficha; por defecto se reconoce la pantalla actual
+            
+        Returns:
+            PlayerDetail: Datos leídos o None si la pantalla no es una ficha
+        """
+        return self.detail_parser.parse_current(state)
+    
     def confirm_purchase(self, max_attempts=5, wait_time=2.0):
         """
         Confirma la compra de un jugador.
@@ -410,8 +467,7 @@ class PlayerSigner:
                         self.recognizer.save_screenshot("compra_realizada.png", self.screenshots_dir)
                         
                         # Presionar A para continuar
-                        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-                        time.sleep(wait_time)
+                        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
                         
                         return True
                 else:
@@ -429,8 +485,7 @@ class PlayerSigner:
                         self.recognizer.save_screenshot("compra_realizada.png", self.screenshots_dir)
                         
                         # Presionar A para continuar
-                        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-                        time.sleep(wait_time)
+                        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
                         
                         return True
             else:
@@ -465,17 +520,27 @@ class PlayerSigner:
             return False
         
         # Paso 3: Aplicar filtros si se proporcionan
-        if filters:
-            if not self.apply_filters(filters):
+        # (en modo local el cursor queda sobre el jugador que los cumple; la búsqueda por
+        # nombre no los necesita)
+        if filters and not player_name:
+            if not self.apply_filters(filters, match_index=player_index):
                 print("No se pudieron aplicar los filtros")
                 return False
         
         # Paso 4: Seleccionar el jugador
-        if player_name:
+        if filters and not player_name:
+            # El cursor ya está sobre el jugador que cumple los filtros
+            if not self.select_player(0):
+                print("No se pudo seleccionar el jugador")
+                return False
+        elif player_name:
             # Si se proporciona un nombre, buscar al jugador por nombre
+            # (si el catálogo conoce su posición, se salta directamente hasta ella)
             print(f"Buscando jugador por nombre: {player_name}")
-            # Nota: La búsqueda por nombre requeriría implementación de OCR
-            # Por ahora, simplemente seleccionamos el primer jugador
+            if not self.list_scanner.find_player(player_name):
+                print(f"Jugador '{player_name}' no encontrado en la lista")
+                return False
+            # El cursor ya está sobre el jugador
             if not self.select_player(0):
                 print("No se pudo seleccionar el jugador")
                 return False
@@ -12,19 +12,23 @@ import time
 import os
 from gamepad_controller import GamepadController, GamepadButton, EFootballSequences
 from screen_recognizer import ScreenRecognizer, GameScreen, ScreenElement
+from player_list_scanner import PlayerListScanner
+from player_detail_parser import PlayerDetailParser
+from player_catalog import PlayerCatalog, LIST_MY_TEAM
 
 class PlayerTrainer:
     """
     Clase para automatizar el proceso de entrenamiento de habilidades a jugadores en eFootball.
     """
     
-    def __init__(self, gamepad_controller=None, screen_recognizer=None):
+    def __init__(self, gamepad_controller=None, screen_recognizer=None, catalog=None):
         """
         Inicializa el entrenador de jugadores.
         
         Args:
             gamepad_controller (GamepadController, optional): Controlador de gamepad a utilizar
             screen_recognizer (ScreenRecognizer, optional): Reconocedor de pantalla a utilizar
+            catalog (PlayerCatalog, optional): Catálogo de jugadores (por defecto, el del proyecto)
         """
         # Inicializar el controlador de gamepad si no se proporciona uno
         if gamepad_controller is None:
@@ -38,6 +42,12 @@ class PlayerTrainer:
         else:
             self.recognizer = screen_recognizer
         
+        # Catálogo local de jugadores y escáner de la lista de Mi Equipo
+        self.catalog = catalog if catalog is not None else PlayerCatalog()
+        self.list_scanner = PlayerListScanner(self.gamepad, self.recognizer, catalog=self.catalog,
+                                              list_name=LIST_MY_TEAM)
+        self.detail_parser = PlayerDetailParser(self.recognizer, catalog=self.catalog)
+        
         # Directorio para guardar capturas de pantalla
         self.screenshots_dir = "/home/ubuntu/efootball_automation/screenshots/training"
         os.makedirs(self.screenshots_dir, exist_ok=True)
@@ -106,8 +116,7 @@ class PlayerTrainer:
                 
                 # Intentar volver al menú principal presionando B varias veces
                 for _ in range(3):
-                    self.gamepad.press_button(GamepadButton.B, duration=0.2)
-                    time.sleep(1.0)
+                    self.gamepad.tap(GamepadButton.B, wait=1.0, duration=0.2)
                 
                 # Verificar si hemos vuelto al menú principal
                 new_screen = self.recognizer.recognize_screen()
@@ -119,14 +128,14 @@ class PlayerTrainer:
         print("No se pudo navegar a Mi Equipo después de varios intentos")
         return False
     
-    def find_player_by_name(self, player_name, max_attempts=5, max_scrolls=10, wait_time=1.0):
+    def find_player_by_name(self, player_name, max_attempts=5, max_scrolls=None, wait_time=1.0):
         """
         Busca un jugador por su nombre en la lista de jugadores del equipo.
         
         Args:
             player_name (str): Nombre del jugador a buscar
             max_attempts (int): Número máximo de intentos
-            max_scrolls (int): Número máximo de desplazamientos hacia abajo
+            max_scrolls (int, optional): Número máximo de páginas de la lista a recorrer (por defecto, settings)
             wait_time (float): Tiempo de espera entre acciones en segundos
         
         Returns:
@@ -150,8 +159,7 @@ class PlayerTrainer:
         # Si estamos en Mi Equipo pero no en la lista de jugadores, navegar a la lista
         if current_screen == GameScreen.MY_TEAM:
             print("Navegando a la lista de jugadores...")
-            self.gamepad.press_button(GamepadButton.A, duration=0.2)
-            time.sleep(wait_time)
+            self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
             
             # Verificar si hemos llegado a la lista de jugadores
             new_screen = self.recognizer.recognize_screen()
@@ -162,34 +170,16 @@ class PlayerTrainer:
         # Guardar una captura de pantalla antes de buscar al jugador
         self.recognizer.save_screenshot(f"busqueda_{player_name}_inicio.png", self.screenshots_dir)
         
-        # Nota: En una implementación real, aquí se utilizaría OCR para reconocer
-        # los nombres de los jugadores en la lista. Como es una simulación,
-        # simplemente navegaremos por la lista y seleccionaremos un jugador.
-        
-        print("Buscando jugador en la lista (simulación)...")
-        
-        # Intentar encontrar al jugador desplazándose por la lista
-        for scroll in range(max_scrolls):
-            # Capturar la pantalla actual
-            screen = self.recognizer.capture_screen()
-            
-            # Aquí iría la lógica de OCR para detectar el nombre del jugador
-            # Por ahora, simplemente simulamos que no lo encontramos y seguimos desplazándonos
-            
-            print(f"Desplazamiento {scroll+1}/{max_scrolls}, jugador no encontrado aún")
-            
-            # Desplazarse hacia abajo
-            self.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.2)
-            time.sleep(wait_time)
-        
-        # Para la simulación, asumimos que hemos encontrado al jugador
-        # En una implementación real, se verificaría si realmente se encontró
+        # Recorrer la lista leyendo sólo las filas nuevas tras cada desplazamiento
+        # (si el catálogo conoce su posición, se salta directamente hasta ella)
+        if not self.list_scanner.find_player(player_name, max_pages=max_scrolls):
+            print(f"Jugador '{player_name}' no encontrado en la lista")
+            return False
         
-        print(f"Jugador '{player_name}' encontrado (simulación)")
+        print(f"Jugador '{player_name}' encontrado")
         
         # Seleccionar el jugador
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
         
         # Verificar si hemos llegado a la pantalla de acciones del jugador
         new_screen = self.recognizer.recognize_screen()
@@ -204,6 +194,18 @@ class PlayerTrainer:
             print(f"No se pudo seleccionar al jugador. Pantalla actual: {new_screen.value}")
             return False
     
+    def read_player_detail(self, state=None):
+        """
+        Lee la ficha del jugador visible (estadísticas o habilidades) y la guarda en el catálogo.
+        
+        Args:
+            state (str): Estado de la pantalla de ficha; por defecto se reconoce la pantalla actual
+            
+        Returns:
+            PlayerDetail: Datos leídos o None si la pantalla no es una ficha
+        """
+        return self.detail_parser.parse_current(state)
+    
     def navigate_to_skills(self, max_attempts=5, wait_time=2.0):
         """
         Navega a la sección de habilidades del jugador seleccionado.
@@ -357,8 +359,7 @@ class PlayerTrainer:
         
         # Seleccionar la primera habilidad disponible (simulación)
         print("Seleccionando habilidad para entrenar...")
-        self.gamepad.press_button(GamepadButton.A, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.A, wait=wait_time, duration=0.2)
         
         # Confirmar la selección
         print("Confirmando selección de habilidad...")
@@ -370,8 +371,7 @@ class PlayerTrainer:
         
         # Volver a la pantalla de habilidades
         print("Volviendo a la pantalla de habilidades...")
-        self.gamepad.press_button(GamepadButton.B, duration=0.2)
-        time.sleep(wait_time)
+        self.gamepad.tap(GamepadButton.B, wait=wait_time, duration=0.2)
         
         # Verificar si hemos vuelto a la pantalla de habilidades
         new_screen = self.recognizer.recognize_screen()
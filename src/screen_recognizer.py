@@ -6,9 +6,17 @@ import re # Para limpiar texto OCR
 import cv2
 import numpy as np
 import mss
-import pytesseract
+import yaml
 from enum import Enum
 import logging # Asegurar que logging esté importado
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from frame_source import FrameSource, FramePool
+from edge_signature import SignatureMatcher
+from fft_matcher import FFTMatcher
+from digit_recognizer import DigitRecognizer
+from ocr_profiles import get_profile
+from text_index import TextIndex
+from text_matcher import ExpectedTextIndex
 
 # --- Configuración del Logging (puede ser configurado externamente también) ---
 # Si este módulo se usa solo, esta configuración básica es útil.
@@ -29,6 +37,7 @@ CONFIG_DIR = os.path.join(PROJECT_DIR, "config")
 IMAGES_DIR = os.path.join(PROJECT_DIR, "images")
 TEMPLATE_MAPPING_FILE = os.path.join(CONFIG_DIR, "templates_mapping.json")
 OCR_MAPPING_FILE = os.path.join(CONFIG_DIR, "ocr_regions.json") # <<< Nombre correcto de la constante
+SETTINGS_FILE = os.path.join(CONFIG_DIR, "settings.yaml")
 # Umbral por defecto para la coincidencia de plantillas
 DEFAULT_TEMPLATE_THRESHOLD = 0.75
 # Umbral mínimo para considerar una coincidencia parcial (para dirigir OCR)
@@ -37,6 +46,29 @@ OCR_FALLBACK_THRESHOLD = 0.6
 MIN_OCR_TEXT_LEN = 3
 # Constante de fuente (Aunque no es ideal aquí, se mantiene por compatibilidad con importación previa)
 DEFAULT_FONT_SIZE = 11
+# Lado mínimo (px) de una plantilla reducida; por debajo se compara a resolución completa
+MIN_SMALL_TEMPLATE_SIDE = 8
+# Margen de confianza de la primera pasada sobre el fotograma reducido (reconocimiento y
+# localización de elementos); la verificación a resolución completa usa el umbral normal
+SMALL_PASS_SLACK = 0.05
+# Valores por defecto de la sección 'screen_recognition' de settings.yaml
+DEFAULT_RECOGNITION_SETTINGS = {
+    'downscale_width': 960,          # Ancho del fotograma reducido para la primera pasada (0 = desactivado)
+    'verify_full_resolution': True,  # Verificar el mejor candidato a resolución completa
+    'matcher': 'template',           # 'template' (TM_CCOEFF_NORMED) o 'signature' (firmas binarias XOR+popcount)
+    'signature_size': [240, 135],    # Resolución (ancho, alto) de las firmas
+    'signature_threshold': 0.6,      # Similitud mínima de firma para aceptar un estado
+    'signature_ocr_threshold': 0.35, # Similitud mínima de firma para intentar OCR fallback
+    'fft_cache_size': 32,            # Espectros de plantilla cacheados para la localización por FFT
+    'search_window_margin': 24,      # Margen (px) de la ventana de búsqueda alrededor de la última posición
+    'digit_min_confidence': 0.75,    # Confianza mínima del atlas de glifos antes de recurrir a tesseract
+    'text_index_profile': 'screen',  # Perfil OCR del índice de texto (ver ocr_profiles.PRESET_PROFILES)
+    'text_index_min_conf': 40,       # Confianza mínima de tesseract (0-100) para indexar una palabra
+    'text_index_max_age': 0.25,      # Antigüedad máxima (s) del fotograma actual para reutilizarlo en find_text_on_screen
+    'ocr_max_candidates': 3,         # Estados candidatos cuyas regiones se leen en paralelo en el OCR fallback
+    'ocr_workers': 4,                # Hilos del pool de OCR fallback
+    'ocr_max_edit_ratio': 0.2,       # Fracción de caracteres del texto esperado que pueden diferir en la verificación OCR
+}
 
 
 # --- Funciones de Carga/Guardado de Mappings (con mejor manejo de errores) ---
@@ -75,7 +107,8 @@ def save_json_mapping(mapping, file_path, file_desc="mapping"):
 
 # --- ScreenRecognizer Class ---
 class ScreenRecognizer:
-    def __init__(self, monitor=1, threshold=DEFAULT_TEMPLATE_THRESHOLD, ocr_fallback_threshold=OCR_FALLBACK_THRESHOLD):
+    def __init__(self, monitor=1, threshold=DEFAULT_TEMPLATE_THRESHOLD, ocr_fallback_threshold=OCR_FALLBACK_THRESHOLD,
+                 region=None, shared=None):
         """
         Inicializa el reconocedor de pantalla.
 
@@ -83,15 +116,64 @@ class ScreenRecognizer:
             monitor (int): Índice del monitor a capturar (1-indexado).
             threshold (float): Umbral principal para template matching.
             ocr_fallback_threshold (float): Umbral mínimo para considerar OCR fallback.
+            region (dict, optional): Región de captura (left, top, width, height) en lugar del
+                monitor completo, p. ej. la ventana de una instancia del juego.
+            shared (ScreenRecognizer, optional): Reconocedor cuyas plantillas y mappings se
+                reutilizan sin volver a cargarlos. Las regiones OCR de los mappings se desplazan
+                de su vista a la de este reconocedor (ambas deben tener el mismo tamaño).
         """
         self.monitor_index = monitor
+        self.capture_region = dict(region) if region else None
         self.threshold = threshold
         self.ocr_fallback_threshold = ocr_fallback_threshold
+        self.settings = self._load_settings()
         self.templates = {}
+        self._small_templates = {}
+        self._small_templates_scale = None
+        self.signature_matcher = None
+        self._image_cache = {}           # Plantillas cargadas por nombre de archivo (find_image_on_screen)
+        self._scaled_image_cache = {}    # (clave, escala) -> plantilla reducida o None
+        # Última posición de cada elemento por estado: (estado, imagen) -> ((x, y, w, h), índice de plantilla)
+        self._search_windows = {}
+        self.search_window_stats = {'hits': 0, 'misses': 0, 'full_searches': 0}
+        self.current_state = 'unknown'   # Último estado reconocido
+        self._fresh_state = None         # Estado aún no usado por ninguna pulsación (take_state)
         self.template_names_mapping = {}
         self.ocr_regions_mapping = {}
         self.monitors_info = self._detect_monitors() # Detectar y guardar monitores
-        self._load_all_data()
+        # Fuente de fotogramas con buffers preasignados (sin asignaciones grandes por captura)
+        self.frame_pool = FramePool()
+        self.frame_source = FrameSource(region=self._get_monitor_region(), pool=self.frame_pool,
+                                        downscale_width=self.settings['downscale_width'])
+        # Localización de elementos por correlación FFT con espectros de plantilla cacheados
+        self.fft_matcher = FFTMatcher(self.settings['fft_cache_size'])
+        # Lectura de números con el atlas de glifos (regiones OCR con "numeric": true)
+        self.digit_recognizer = DigitRecognizer()
+        # Índices de texto del fotograma actual: (región, perfil) -> TextIndex
+        self._text_indexes = {}
+        self._text_index_seq = None
+        self.text_index_stats = {'builds': 0, 'queries': 0}
+        self._ocr_executor = None        # Pool de hilos del OCR fallback (se crea al primer uso)
+        # Desplazamiento de las regiones de los mappings a la vista de este reconocedor
+        self.region_offset = (0, 0)
+        if shared is None:
+            self._load_all_data()
+        else:
+            self._share_data(shared)
+
+    def _load_settings(self):
+        """Carga la sección 'screen_recognition' de settings.yaml sobre los valores por defecto."""
+        settings = dict(DEFAULT_RECOGNITION_SETTINGS)
+        try:
+            if os.path.exists(SETTINGS_FILE):
+                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f) or {}
+                for key, value in (data.get('screen_recognition') or {}).items():
+                    if key in settings:
+                        settings[key] = value
+        except Exception as e:
+            logging.error(f"Error al cargar {SETTINGS_FILE}: {e}. Usando valores por defecto.")
+        return settings
 
     def _detect_monitors(self):
         """Detecta los monitores existentes usando mss."""
@@ -104,7 +186,9 @@ class ScreenRecognizer:
             return [{}] # Lista con diccionario vacío como fallback
 
     def _get_monitor_region(self):
-        """Obtiene la geometría del monitor seleccionado (1-based index)."""
+        """Obtiene la geometría del monitor seleccionado (1-based index) o la región de captura indicada."""
+        if self.capture_region is not None:
+            return dict(self.capture_region)
         # mss.monitors[0] es 'all screens', los reales empiezan en 1
         monitor_real_index = self.monitor_index
         if monitor_real_index >= 1 and monitor_real_index < len(self.monitors_info):
@@ -122,9 +206,32 @@ class ScreenRecognizer:
         logging.info("Cargando datos de reconocimiento...")
         self.template_names_mapping = load_json_mapping(TEMPLATE_MAPPING_FILE, "plantillas")
         self.ocr_regions_mapping = load_json_mapping(OCR_MAPPING_FILE, "regiones OCR")
+        self.expected_text_index = ExpectedTextIndex.from_ocr_mapping(self.ocr_regions_mapping,
+                                                                      self.settings['ocr_max_edit_ratio'])
         self._load_templates()
         logging.info("Datos cargados.")
 
+    def _share_data(self, shared):
+        """Reutiliza las plantillas, mappings y comparadores ya cargados por otro reconocedor."""
+        self.template_names_mapping = shared.template_names_mapping
+        self.ocr_regions_mapping = shared.ocr_regions_mapping
+        self.expected_text_index = shared.expected_text_index
+        self.templates = shared.templates
+        self.signature_matcher = shared.signature_matcher
+        self.digit_recognizer = shared.digit_recognizer
+        self._image_cache = shared._image_cache
+        own = self.frame_source.region or {}
+        reference = shared.frame_source.region or {}
+        self.region_offset = (own.get('left', 0) - reference.get('left', 0) + shared.region_offset[0],
+                              own.get('top', 0) - reference.get('top', 0) + shared.region_offset[1])
+        logging.info(f"Datos de reconocimiento compartidos (desplazamiento de regiones {self.region_offset}).")
+
+    def _to_view(self, region):
+        """Traslada una región de los mappings (dict mss) a la vista de este reconocedor."""
+        if self.region_offset == (0, 0):
+            return region
+        return dict(region, left=region['left'] + self.region_offset[0], top=region['top'] + self.region_offset[1])
+
     # --- <<< AÑADIR MÉTODO reload_data >>> ---
     def reload_data(self):
         """Recarga los mappings JSON y las plantillas."""
@@ -166,6 +273,25 @@ class ScreenRecognizer:
             if loaded_images:
                 self.templates[state] = loaded_images
 
+        # Las versiones reducidas se regeneran en la próxima captura
+        self._small_templates = {}
+        self._small_templates_scale = None
+        self._image_cache = {}
+        self._scaled_image_cache = {}
+        self._search_windows = {}
+        if hasattr(self, 'fft_matcher'):
+            self.fft_matcher.clear()
+
+        if self.settings['matcher'] == 'signature':
+            try:
+                self.signature_matcher = SignatureMatcher(tuple(self.settings['signature_size']))
+                self.signature_matcher.build(self.templates)
+            except Exception as e:
+                logging.error(f"No se pudo inicializar el comparador por firmas: {e}. Usando template matching.")
+                self.signature_matcher = None
+        else:
+            self.signature_matcher = None
+
         logging.info(f"Carga de plantillas: {loaded_count} cargadas, {error_count} errores/faltantes.")
         if missing_files:
              logging.warning(f"Archivos de plantilla faltantes: {missing_files}")
@@ -174,22 +300,64 @@ class ScreenRecognizer:
 
 
     def capture_screen(self, region=None):
-        """Captura la pantalla o una región específica del monitor configurado."""
-        monitor_region = self._get_monitor_region()
-        if monitor_region is None: return None
+        """
+        Captura la pantalla o una región específica del monitor configurado.
 
-        capture_area = region if region is not None else monitor_region
+        El array devuelto pertenece al pool de fotogramas y se reutiliza en capturas
+        posteriores del mismo tamaño; cópielo si necesita conservarlo.
+        """
+        frame = self.capture_frame(region)
+        return frame.bgr if frame is not None else None
 
-        try:
-            with mss.mss() as sct:
-                sct_img = sct.grab(capture_area)
-                img = np.array(sct_img)
-                img_bgr = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                return img_bgr
-        except Exception as e:
-            logging.error(f"Error durante la captura de pantalla: {e}")
-            return None
+    def capture_frame(self, region=None):
+        """Captura un Frame (BGR + gris) de la pantalla o de una región del monitor configurado."""
+        if self.frame_source.region is None:
+            self.frame_source.region = self._get_monitor_region()
+            if self.frame_source.region is None: return None
+        return self.frame_source.grab(region)
+
+
+    def _get_small_templates(self, scale):
+        """
+        Devuelve las plantillas reducidas al factor de escala del fotograma pequeño.
+        Las plantillas demasiado pequeñas tras la reducción se guardan como None
+        (se comparan a resolución completa).
+        """
+        scale_key = round(scale, 6)
+        if self._small_templates_scale != scale_key:
+            small_templates = {}
+            for state, template_list in self.templates.items():
+                small_list = []
+                for template_gray in template_list:
+                    height, width = template_gray.shape[:2]
+                    small_w = int(round(width * scale))
+                    small_h = int(round(height * scale))
+                    if min(small_w, small_h) < MIN_SMALL_TEMPLATE_SIDE:
+                        small_list.append(None)
+                    else:
+                        small_list.append(cv2.resize(template_gray, (small_w, small_h), interpolation=cv2.INTER_AREA))
+                small_templates[state] = small_list
+            self._small_templates = small_templates
+            self._small_templates_scale = scale_key
+        return self._small_templates
 
+    def _verify_full_resolution(self, screen_gray, template_gray, small_loc, scale):
+        """
+        Verifica a resolución completa una coincidencia encontrada en el fotograma reducido,
+        buscando sólo en una ventana pequeña alrededor de la posición reescalada.
+        """
+        height, width = template_gray.shape[:2]
+        margin = int(np.ceil(1.0 / scale)) + 2
+        x0 = int(round(small_loc[0] / scale))
+        y0 = int(round(small_loc[1] / scale))
+        left = max(0, x0 - margin)
+        top = max(0, y0 - margin)
+        right = min(screen_gray.shape[1], x0 + width + margin)
+        bottom = min(screen_gray.shape[0], y0 + height + margin)
+        loc, match_val = self.find_template_on_screen(screen_gray[top:bottom, left:right], template_gray)
+        if loc is None:
+            return None, 0.0
+        return (loc[0] + left, loc[1] + top), match_val
 
     def find_template_on_screen(self, screen_gray, template_gray):
         """Busca una única plantilla en la pantalla."""
@@ -205,6 +373,274 @@ class ScreenRecognizer:
              return None, 0.0
 
 
+    def _resolve_image_templates(self, image_name):
+        """
+        Devuelve las plantillas [(clave, plantilla_gris)] asociadas a un nombre: un estado
+        de templates_mapping.json o un archivo de imagen (ruta absoluta o relativa a IMAGES_DIR).
+        """
+        if image_name in self.templates:
+            return [((image_name, i), template) for i, template in enumerate(self.templates[image_name])]
+
+        image = self._image_cache.get(image_name)
+        if image is None:
+            image_path = image_name if os.path.isabs(image_name) else os.path.join(IMAGES_DIR, image_name)
+            if not os.path.exists(image_path):
+                logging.warning(f"No se encontró la imagen a buscar: {image_path}")
+                return []
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                logging.error(f"No se pudo cargar la imagen (posiblemente corrupta): {image_path}")
+                return []
+            self._image_cache[image_name] = image
+        return [((image_name, 0), image)]
+
+    def _get_scaled_template(self, key, template_gray, scale):
+        """Devuelve (cacheada) la plantilla reducida a la escala de trabajo, o None si queda demasiado pequeña."""
+        cache_key = (key, round(scale, 6))
+        if cache_key not in self._scaled_image_cache:
+            height, width = template_gray.shape[:2]
+            small_w = int(round(width * scale))
+            small_h = int(round(height * scale))
+            if min(small_w, small_h) < MIN_SMALL_TEMPLATE_SIDE:
+                self._scaled_image_cache[cache_key] = None
+            else:
+                self._scaled_image_cache[cache_key] = cv2.resize(template_gray, (small_w, small_h),
+                                                                 interpolation=cv2.INTER_AREA)
+        return self._scaled_image_cache[cache_key]
+
+    def find_image_on_screen(self, image_name, confidence=None, frame=None, state=None):
+        """
+        Localiza una imagen en la pantalla.
+
+        Primero se busca en una ventana pequeña alrededor de la última posición donde se
+        encontró la imagen en el mismo estado; sólo si falla se hace la búsqueda completa
+        por correlación FFT sobre el fotograma reducido (reutilizando su transformada para
+        todas las plantillas buscadas en el mismo fotograma) con verificación a resolución
+        completa.
+
+        Args:
+            image_name (str): Estado de templates_mapping.json o nombre de archivo en IMAGES_DIR
+            confidence (float, optional): Umbral de confianza (por defecto, el umbral del reconocedor)
+            frame (Frame, optional): Fotograma sobre el que buscar (por defecto se captura uno nuevo)
+            state (str, optional): Estado de pantalla al que asociar la posición (por defecto, el último reconocido)
+
+        Returns:
+            tuple: (x, y, ancho, alto) en coordenadas de pantalla (las mismas que
+            find_text_on_screen y las regiones OCR), o None si no se encuentra
+        """
+        if confidence is None:
+            confidence = self.threshold
+        templates = self._resolve_image_templates(image_name)
+        if not templates:
+            return None
+        if frame is None:
+            frame = self.capture_frame()
+            if frame is None:
+                logging.error("No se pudo capturar la pantalla para localizar la imagen.")
+                return None
+
+        window_key = (state if state is not None else self.current_state, image_name)
+        last_hit = self._search_windows.get(window_key)
+        if last_hit is not None:
+            box = self._search_in_window(frame.gray, templates, last_hit, confidence)
+            if box is not None:
+                self.search_window_stats['hits'] += 1
+                logging.debug(f"Imagen '{image_name}' encontrada en su ventana de búsqueda: {box[0]}")
+                self._search_windows[window_key] = box
+                return self._to_screen(frame, box[0])
+            self.search_window_stats['misses'] += 1
+
+        self.search_window_stats['full_searches'] += 1
+        box = self._full_image_search(frame, templates, confidence, image_name)
+        if box is None:
+            return None
+        self._search_windows[window_key] = box
+        return self._to_screen(frame, box[0])
+
+    @staticmethod
+    def _to_screen(frame, box):
+        """Convierte una caja (x, y, ancho, alto) del fotograma a coordenadas de pantalla."""
+        x, y, width, height = box
+        return (x + frame.region.get('left', 0), y + frame.region.get('top', 0), width, height)
+
+    def _search_in_window(self, screen_gray, templates, last_hit, confidence):
+        """
+        Busca a resolución completa la plantilla que coincidió la última vez, sólo en una
+        ventana alrededor de su posición anterior.
+
+        Returns:
+            tuple: ((x, y, ancho, alto), índice de plantilla) o None
+        """
+        (x, y, width, height), template_idx = last_hit
+        if template_idx >= len(templates):
+            return None
+        template_gray = templates[template_idx][1]
+        margin = int(self.settings['search_window_margin'])
+        left = max(0, x - margin)
+        top = max(0, y - margin)
+        right = min(screen_gray.shape[1], x + width + margin)
+        bottom = min(screen_gray.shape[0], y + height + margin)
+        loc, match_val = self.find_template_on_screen(screen_gray[top:bottom, left:right], template_gray)
+        if loc is None or match_val < confidence:
+            return None
+        return (loc[0] + left, loc[1] + top, width, height), template_idx
+
+    def _full_image_search(self, frame, templates, confidence, image_name):
+        """
+        Búsqueda completa de un conjunto de plantillas en el fotograma.
+
+        Returns:
+            tuple: ((x, y, ancho, alto), índice de plantilla) o None
+        """
+        use_small = frame.small_gray is not None
+        scale = frame.scale if use_small else 1.0
+        work_gray = frame.small_gray if use_small else frame.gray
+        first_pass_threshold = confidence - SMALL_PASS_SLACK if use_small else confidence
+
+        best_val, best_loc, best_idx, best_is_small = 0.0, None, None, False
+        for template_idx, (key, template_gray) in enumerate(templates):
+            work_template = self._get_scaled_template(key, template_gray, scale) if use_small else template_gray
+            if work_template is None:
+                loc, match_val = self.find_template_on_screen(frame.gray, template_gray)
+                is_small = False
+            else:
+                loc, match_val = self.fft_matcher.match(work_gray, work_template, (key, scale),
+                                                        frame_key=(frame.seq, scale))
+                is_small = use_small
+            if loc is not None and match_val > best_val:
+                best_val, best_loc, best_idx, best_is_small = match_val, loc, template_idx, is_small
+
+        if best_loc is None or best_val < (first_pass_threshold if best_is_small else confidence):
+            logging.debug(f"Imagen '{image_name}' no encontrada (mejor confianza: {best_val:.3f})")
+            return None
+
+        best_template = templates[best_idx][1]
+        if best_is_small:
+            best_loc, best_val = self._verify_full_resolution(frame.gray, best_template, best_loc, scale)
+            if best_loc is None or best_val < confidence:
+                logging.debug(f"Imagen '{image_name}' descartada en la verificación ({best_val:.3f})")
+                return None
+
+        height, width = best_template.shape[:2]
+        logging.debug(f"Imagen '{image_name}' encontrada en {best_loc} (confianza: {best_val:.3f})")
+        return (best_loc[0], best_loc[1], width, height), best_idx
+
+    def get_search_window_stats(self):
+        """
+        Devuelve las estadísticas de la caché de ventanas de búsqueda.
+
+        Returns:
+            dict: aciertos y fallos de ventana, búsquedas completas, tasa de acierto y ventanas guardadas
+        """
+        stats = dict(self.search_window_stats)
+        window_lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / window_lookups if window_lookups else 0.0
+        stats['windows'] = len(self._search_windows)
+        return stats
+
+    def clear_search_windows(self):
+        """Olvida las posiciones recordadas de todos los elementos."""
+        self._search_windows = {}
+
+    def _normalize_region(self, region):
+        """Convierte una región (x, y, ancho, alto) o dict mss en tupla; None si no hay región."""
+        if region is None:
+            return None
+        if isinstance(region, dict):
+            return (region['left'], region['top'], region['width'], region['height'])
+        return tuple(int(v) for v in region)
+
+    def get_text_index(self, region=None, frame=None):
+        """
+        Devuelve el índice de palabras de una región del fotograma, construyéndolo con una
+        sola pasada de OCR la primera vez. Los índices se descartan cuando la fuente de
+        fotogramas avanza.
+
+        Args:
+            region (tuple | dict, optional): Región (x, y, ancho, alto) a indexar; None para toda la pantalla.
+            frame (Frame, optional): Fotograma a usar. Si no se indica, se reutiliza el fotograma
+                actual si es reciente o se captura uno nuevo.
+
+        Returns:
+            TextIndex | None: Índice de palabras o None si no se pudo capturar.
+        """
+        if frame is None:
+            frame = self.frame_source.current
+            if frame is None or frame.age > self.settings['text_index_max_age']:
+                frame = self.capture_frame()
+            if frame is None:
+                return None
+
+        if frame.seq != self._text_index_seq:
+            self._text_indexes = {}
+            self._text_index_seq = frame.seq
+
+        region_key = self._normalize_region(region)
+        profile_spec = self.settings['text_index_profile']
+        cache_key = (region_key, json.dumps(profile_spec, sort_keys=True))
+        index = self._text_indexes.get(cache_key)
+        if index is not None:
+            return index
+        # Un índice de pantalla completa del mismo fotograma también sirve para cualquier región
+        full_index = self._text_indexes.get((None, cache_key[1]))
+        if full_index is not None:
+            return full_index
+
+        if region_key is None:
+            image = frame.gray
+            offset = (frame.region.get('left', 0), frame.region.get('top', 0))
+        else:
+            region_dict = {'left': region_key[0], 'top': region_key[1], 'width': region_key[2], 'height': region_key[3]}
+            image = frame.crop(region_dict)
+            offset = region_key[:2]
+            if image is None:
+                logging.warning(f"La región {region_key} no está contenida en el fotograma. Capturándola.")
+                region_frame = self.capture_frame(region=region_dict)
+                image = region_frame.gray if region_frame else None
+        if image is None:
+            return None
+
+        data = get_profile(profile_spec).read_data(image)
+        index = TextIndex.from_tesseract_data(data, offset, self.settings['text_index_min_conf'])
+        self._text_indexes[cache_key] = index
+        self.text_index_stats['builds'] += 1
+        logging.debug(f"Índice de texto construido para región {region_key}: {len(index)} palabras")
+        return index
+
+    def find_text_on_screen(self, text, region=None, frame=None, prefix=False):
+        """
+        Busca un texto en pantalla usando el índice de palabras del fotograma.
+
+        Args:
+            text (str): Texto a buscar (sin distinguir mayúsculas, tildes ni signos).
+            region (tuple | dict, optional): Región (x, y, ancho, alto) donde buscar.
+            frame (Frame, optional): Fotograma a usar (ver get_text_index).
+            prefix (bool): Si True, la última palabra puede aparecer como prefijo.
+
+        Returns:
+            tuple | None: Caja (x, y, ancho, alto) en coordenadas de pantalla o None.
+        """
+        index = self.get_text_index(region, frame)
+        self.text_index_stats['queries'] += 1
+        if index is None:
+            return None
+        return index.find(text, self._normalize_region(region), prefix)
+
+    def take_state(self):
+        """
+        Devuelve el estado del último reconocimiento sólo la primera vez que se pide.
+
+        Es el `state_provider` de GamepadController (ver EFootballAutomation). Los retardos
+        calibrados de GamepadController.tap dependen de la pantalla: tras la primera pulsación
+        la pantalla puede haber cambiado, así que las siguientes pulsaciones reciben None (y
+        usan la espera fija) hasta el próximo reconocimiento.
+
+        Returns:
+            str | None: Estado reconocido o None si ya se usó.
+        """
+        state, self._fresh_state = self._fresh_state, None
+        return state
+
     def recognize_screen_for_test(self):
         """
         Intenta reconocer la pantalla actual y devuelve información detallada para testeo,
@@ -216,119 +652,331 @@ class ScreenRecognizer:
             'confidence': None,
             'ocr_results': None # {idx: {'region': dict, 'text': str, 'expected': list, 'match_expected': bool}}
         }
-        screen_bgr = self.capture_screen()
-        if screen_bgr is None:
+        frame = self.capture_frame()
+        if frame is None:
             logging.error("No se pudo capturar la pantalla para reconocimiento.")
             return result
-        screen_gray = cv2.cvtColor(screen_bgr, cv2.COLOR_BGR2GRAY)
+        screen_gray = frame.gray
 
         # --- 1. Template Matching ---
+        # Primera pasada sobre el fotograma reducido; la resolución completa sólo se usa
+        # para verificar los candidatos que superan el umbral.
         best_match_state = "unknown"
         best_match_val = 0.0
         potential_ocr_states = []
+        template_candidates = [] # (state, score, template_idx, loc, tipo: 'full' | 'small' | 'signature')
+
+        small_gray = frame.small_gray
+        small_templates = self._get_small_templates(frame.scale) if small_gray is not None else {}
+        signature_matcher = self.signature_matcher
 
         logging.debug("Iniciando Template Matching...")
         for state, template_list in self.templates.items():
             state_best_val = 0.0
+            state_best = (None, None, 'full')
+            small_list = small_templates.get(state, [])
             for i, template_gray in enumerate(template_list):
-                loc, match_val = self.find_template_on_screen(screen_gray, template_gray)
+                if signature_matcher is not None and signature_matcher.covers(state, i):
+                    continue # Se evalúa más abajo mediante firmas
+                small_template = small_list[i] if i < len(small_list) else None
+                if small_template is not None:
+                    loc, match_val = self.find_template_on_screen(small_gray, small_template)
+                else:
+                    loc, match_val = self.find_template_on_screen(screen_gray, template_gray)
                 logging.debug(f"  Comparando con {state} (plantilla {i+1}/{len(template_list)}): Confianza={match_val:.3f}")
-                state_best_val = max(state_best_val, match_val)
-
-            if state_best_val >= self.threshold:
-                if state_best_val > best_match_val:
-                    best_match_val = state_best_val
-                    best_match_state = state
-                    logging.debug(f"  Nuevo mejor match encontrado: {state} con {best_match_val:.3f}")
+                if match_val > state_best_val:
+                    state_best_val = match_val
+                    state_best = (i, loc, 'small' if small_template is not None else 'full')
+
+            # La puntuación reducida sólo preselecciona si después se verifica a resolución completa
+            candidate_threshold = self.threshold
+            if state_best[2] == 'small' and self.settings['verify_full_resolution']:
+                candidate_threshold -= SMALL_PASS_SLACK
+            if state_best_val >= candidate_threshold:
+                template_candidates.append((state, state_best_val) + state_best)
             elif state_best_val >= self.ocr_fallback_threshold:
                 potential_ocr_states.append((state, state_best_val))
                 logging.debug(f"  Candidato OCR: {state} con {state_best_val:.3f}")
 
+        if signature_matcher is not None:
+            signature_results = signature_matcher.match(small_gray if small_gray is not None else screen_gray)
+            for state, (similarity, template_idx) in signature_results.items():
+                logging.debug(f"  Firma {state}: similitud={similarity:.3f}")
+                if similarity >= self.settings['signature_threshold']:
+                    template_candidates.append((state, similarity, template_idx, (0, 0), 'signature'))
+                elif similarity >= self.settings['signature_ocr_threshold']:
+                    potential_ocr_states.append((state, similarity))
+
+        template_candidates.sort(key=lambda item: item[1], reverse=True)
+        for state, match_val, template_idx, loc, kind in template_candidates:
+            if kind != 'full' and self.settings['verify_full_resolution']:
+                template_gray = self.templates[state][template_idx]
+                if kind == 'signature':
+                    # Plantilla de pantalla completa: una única posición a comparar
+                    if template_gray.shape[:2] == screen_gray.shape[:2]:
+                        _, match_val = self.find_template_on_screen(screen_gray, template_gray)
+                    else:
+                        small_list = small_templates.get(state, [])
+                        small_template = small_list[template_idx] if template_idx < len(small_list) else None
+                        if small_template is None or small_gray is None:
+                            continue
+                        _, match_val = self.find_template_on_screen(small_gray, small_template)
+                else:
+                    _, match_val = self._verify_full_resolution(screen_gray, template_gray, loc, frame.scale)
+                logging.debug(f"  Verificación a resolución completa de {state}: {match_val:.3f}")
+                if match_val < self.threshold:
+                    if match_val >= self.ocr_fallback_threshold:
+                        potential_ocr_states.append((state, match_val))
+                    continue
+            best_match_val = match_val
+            best_match_state = state
+            logging.debug(f"  Nuevo mejor match encontrado: {state} con {best_match_val:.3f}")
+            break
+
         if best_match_state != "unknown":
             result['method'] = 'template'
             result['state'] = best_match_state
             result['confidence'] = best_match_val
             logging.info(f"Estado detectado (Template): {result['state']} (Confianza: {result['confidence']:.3f})")
+            self.current_state = result['state']
+            self._fresh_state = result['state']
             return result
 
         # --- 2. OCR Fallback con Verificación de Texto Esperado ---
         logging.info("No se encontró coincidencia clara de plantilla. Intentando OCR fallback con verificación...")
         potential_ocr_states.sort(key=lambda item: item[1], reverse=True)
-
+        # Un estado puede aparecer varias veces (plantilla y firma): se conserva su mejor puntuación
+        candidates = []
         for state_candidate, match_score in potential_ocr_states:
-            if state_candidate in self.ocr_regions_mapping:
-                regions_data_list = self.ocr_regions_mapping[state_candidate]
-                if isinstance(regions_data_list, list):
-                    ocr_results_for_state = {}
-                    found_match_in_state = False # Flag si *alguna* región coincide con su texto esperado
-                    logging.info(f"  Probando OCR para candidato: {state_candidate} (Score: {match_score:.3f}) con {len(regions_data_list)} regiones...")
-
-                    for idx, region_data in enumerate(regions_data_list):
-                        # --- Validar estructura y extraer datos ---
-                        if not (isinstance(region_data, dict) and 'region' in region_data and
-                                isinstance(region_data['region'], dict) and # Asegurar que 'region' sea dict
-                                all(k in region_data['region'] for k in ('left', 'top', 'width', 'height'))):
-                            logging.warning(f"    Formato de datos de región inválido para '{state_candidate}', índice {idx}. Saltando: {region_data}")
-                            continue
-
-                        region_coords = region_data['region']
-                        expected_texts = region_data.get('expected_text', [])
-                        if not isinstance(expected_texts, list):
-                             logging.warning(f"    'expected_text' para '{state_candidate}' región {idx} no es una lista. Tratando como vacía.")
-                             expected_texts = []
-
-                        # --- Realizar OCR ---
-                        region_img = self.capture_screen(region=region_coords)
-                        extracted_text = self._extract_and_clean_text(region_img)
-
-                        # --- Verificar si coincide con texto esperado ---
-                        match_expected = False
-                        if extracted_text and expected_texts:
-                            for expected in expected_texts:
-                                if expected.lower() == extracted_text.lower():
-                                    match_expected = True
-                                    break
-
-                        logging.info(f"    Región {idx}: Texto='{extracted_text}', Esperado={expected_texts}, Coincide={match_expected}")
-
-                        ocr_results_for_state[idx] = {
-                            'region': region_coords,
-                            'text': extracted_text,
-                            'expected': expected_texts,
-                            'match_expected': match_expected
-                        }
-
-                        if match_expected:
-                            found_match_in_state = True # Marcar si esta región coincidió
-
-                    # --- Decisión Final ---
-                    if found_match_in_state:
-                        result['method'] = 'ocr'
-                        result['state'] = state_candidate
-                        result['ocr_results'] = ocr_results_for_state
-                        logging.info(f"Estado detectado (OCR Fallback Verificado): {result['state']}")
-                        return result
-                else:
-                    logging.warning(f"Las regiones OCR para '{state_candidate}' en {OCR_MAPPING_FILE} no son una lista.")
+            if state_candidate in self.ocr_regions_mapping and state_candidate not in (c[0] for c in candidates):
+                candidates.append((state_candidate, match_score))
+        candidates = candidates[:self.settings['ocr_max_candidates']]
+
+        state_candidate, ocr_results_for_state = self._run_ocr_fallback(candidates, frame)
+        if state_candidate is not None:
+            result['method'] = 'ocr'
+            result['state'] = state_candidate
+            result['ocr_results'] = ocr_results_for_state
+            logging.info(f"Estado detectado (OCR Fallback Verificado): {result['state']}")
+            self.current_state = result['state']
+            self._fresh_state = result['state']
+            return result
 
         logging.warning("No se pudo detectar el estado mediante OCR fallback verificado.")
+        self.current_state = result['state']
+        self._fresh_state = result['state']
         return result
 
-    def _extract_and_clean_text(self, image_bgr):
-        """Extrae texto de una imagen y lo limpia."""
-        if image_bgr is None: return ""
+    def close(self):
+        """Detiene el pool de hilos del OCR fallback (se vuelve a crear si se usa otra vez)."""
+        executor, self._ocr_executor = getattr(self, '_ocr_executor', None), None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __del__(self):
+        self.close()
+
+    def _get_ocr_executor(self):
+        """Devuelve (creándolo la primera vez) el pool de hilos del OCR fallback."""
+        if self._ocr_executor is None:
+            # tesseract se ejecuta como subproceso: los hilos esperan sin retener el GIL
+            self._ocr_executor = ThreadPoolExecutor(max_workers=self.settings['ocr_workers'],
+                                                    thread_name_prefix='ocr_fallback')
+        return self._ocr_executor
+
+    def _run_ocr_fallback(self, candidates, frame):
+        """
+        Lee en paralelo las regiones OCR con texto esperado de los estados candidatos y devuelve
+        el candidato de mayor puntuación cuya región coincide con su texto esperado. Un candidato
+        verificado sólo se acepta cuando todos los de mayor puntuación se han descartado; las
+        lecturas pendientes se cancelan.
+
+        Args:
+            candidates (list): Lista de (estado, puntuación) ordenada de mayor a menor.
+            frame (Frame): Fotograma sobre el que se recortan las regiones.
+
+        Returns:
+            tuple: (estado, resultados OCR por índice de región) o (None, None) si no hay coincidencia.
+        """
+        tasks = [] # (estado, índice, región, textos esperados, datos de región, imagen)
+        for state_candidate, match_score in candidates:
+            regions_data_list = self.ocr_regions_mapping[state_candidate]
+            if not isinstance(regions_data_list, list):
+                logging.warning(f"Las regiones OCR para '{state_candidate}' en {OCR_MAPPING_FILE} no son una lista.")
+                continue
+            logging.info(f"  Probando OCR para candidato: {state_candidate} (Score: {match_score:.3f}) con {len(regions_data_list)} regiones...")
+
+            for idx, region_data in enumerate(regions_data_list):
+                # --- Validar estructura y extraer datos ---
+                if not (isinstance(region_data, dict) and 'region' in region_data and
+                        isinstance(region_data['region'], dict) and # Asegurar que 'region' sea dict
+                        all(k in region_data['region'] for k in ('left', 'top', 'width', 'height'))):
+                    logging.warning(f"    Formato de datos de región inválido para '{state_candidate}', índice {idx}. Saltando: {region_data}")
+                    continue
+
+                region_coords = self._to_view(region_data['region'])
+                expected_texts = region_data.get('expected_text', [])
+                if not isinstance(expected_texts, list):
+                     logging.warning(f"    'expected_text' para '{state_candidate}' región {idx} no es una lista. Tratando como vacía.")
+                     expected_texts = []
+                if not expected_texts:
+                    continue # Sin texto esperado la región no puede verificar el estado
+
+                # Copia del recorte: los buffers del fotograma se reutilizan en la siguiente captura
+                image = frame.crop(region_coords)
+                if image is not None:
+                    image = image.copy()
+                else:
+                    region_frame = self.capture_frame(region=region_coords)
+                    image = region_frame.gray.copy() if region_frame else None
+                tasks.append((state_candidate, idx, region_coords, expected_texts, region_data, image))
+
+        if not tasks:
+            return None, None
+
+        # Las regiones se envían en el orden de los candidatos (de mayor a menor puntuación)
+        executor = self._get_ocr_executor()
+        futures = {executor.submit(self._read_region_text, task[5], task[4]): task for task in tasks}
+        pending = {}
+        for task in tasks:
+            pending[task[0]] = pending.get(task[0], 0) + 1
+        verified = set()
+        text_matches = {}
+        results_by_state = {}
         try:
-            gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-            # Considerar aplicar umbralización aquí si ayuda al OCR
-            # _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            text = pytesseract.image_to_string(gray, lang="spa+eng") # Español primero si es más común
-            text = text.replace('\n', ' ').replace('\r', '')
-            text = re.sub(r'[^a-zA-Z0-9ñÑáéíóúÁÉÍÓÚüÜ\s]', '', text) # Añadir Ü si es necesario
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
-        except Exception as e:
-            logging.error(f"Error durante OCR: {e}")
+            for future in as_completed(futures):
+                state_candidate, idx, region_coords, expected_texts, _, _ = futures[future]
+                try:
+                    extracted_text = future.result()
+                except Exception as e:
+                    logging.error(f"    Error en OCR de '{state_candidate}' región {idx}: {e}")
+                    extracted_text = ""
+
+                # --- Verificar si coincide con texto esperado (tolerando pequeños errores) ---
+                distance = self._match_expected_text(extracted_text, state_candidate, idx, expected_texts,
+                                                     text_matches)
+                match_expected = distance is not None
+                logging.info(f"    {state_candidate} región {idx}: Texto='{extracted_text}', Esperado={expected_texts}, "
+                             f"Coincide={match_expected}" + (f" (distancia {distance})" if match_expected else ""))
+
+                results_by_state.setdefault(state_candidate, {})[idx] = {
+                    'region': region_coords,
+                    'text': extracted_text,
+                    'expected': expected_texts,
+                    'match_expected': match_expected,
+                    'distance': distance
+                }
+                pending[state_candidate] -= 1
+                if match_expected:
+                    verified.add(state_candidate)
+                # Primer candidato (por puntuación) verificado o todavía por resolver
+                for candidate in pending:
+                    if candidate in verified:
+                        return candidate, dict(sorted(results_by_state[candidate].items()))
+                    if pending[candidate]:
+                        break
+        finally:
+            # Las lecturas que aún no han empezado se cancelan; las que están en curso terminan solas
+            for future in futures:
+                future.cancel()
+        return None, None
+
+    def _match_expected_text(self, extracted_text, state, region_idx, expected_texts, matches=None):
+        """
+        Compara una lectura con los textos esperados de su región usando el índice tolerante.
+
+        Args:
+            matches (dict, optional): Búsquedas ya hechas en el índice (texto -> coincidencias de
+                ExpectedTextIndex.matches); el árbol se consulta una sola vez por texto leído.
+
+        Returns:
+            int | None: Distancia de edición al texto esperado más cercano o None si ninguno está
+            dentro de la tolerancia (ocr_max_edit_ratio).
+        """
+        if not extracted_text or not expected_texts:
+            return None
+        if matches is None:
+            matches = {}
+        if extracted_text not in matches:
+            matches[extracted_text] = self.expected_text_index.matches(extracted_text)
+        match = matches[extracted_text].get((state, region_idx))
+        return match[0] if match is not None else None
+
+    def _read_region_text(self, gray, region_data):
+        """
+        Lee el texto de una región OCR. Las regiones marcadas con "numeric": true se leen
+        con el atlas de glifos y sólo se recurre a tesseract si no hay atlas o la lectura
+        no es fiable.
+        """
+        if gray is None:
             return ""
+        if region_data.get('numeric') and self.digit_recognizer.available:
+            text, confidence = self.digit_recognizer.recognize(gray)
+            if text and '?' not in text and confidence >= self.settings['digit_min_confidence']:
+                return text
+            logging.debug(f"    Lectura de glifos poco fiable ('{text}', {confidence:.2f}). Usando tesseract.")
+        profile = region_data.get('ocr', 'digits' if region_data.get('numeric') else None)
+        return self._extract_and_clean_text(gray, profile)
+
+    def read_number(self, region, frame=None):
+        """
+        Lee un número (valoración, precio, saldo, cronómetro sin separadores) de una región.
+
+        Args:
+            region (dict): Región en coordenadas de pantalla (left, top, width, height).
+            frame (Frame, optional): Fotograma ya capturado que contiene la región.
+
+        Returns:
+            int | None: Número leído o None si no se pudo leer.
+        """
+        gray = frame.crop(region) if frame is not None else None
+        if gray is None:
+            region_frame = self.capture_frame(region=region)
+            gray = region_frame.gray if region_frame else None
+        if gray is None:
+            return None
+        if self.digit_recognizer.available:
+            value = self.digit_recognizer.read_number(gray)
+            if value is not None:
+                return value
+        digits = re.sub(r'\D', '', self._extract_and_clean_text(gray, 'digits'))
+        return int(digits) if digits else None
+
+    def read_numeric_regions(self, state=None, frame=None):
+        """
+        Lee todas las regiones "numeric" de un estado de ocr_regions.json (valoración, nivel,
+        precio, saldo de GP...).
+
+        Args:
+            state (str, optional): Estado cuyas regiones se leen (por defecto, el último reconocido).
+            frame (Frame, optional): Fotograma ya capturado (por defecto se captura uno nuevo).
+
+        Returns:
+            dict: {campo ('field' de la región o su índice): número leído o None}
+        """
+        regions_data_list = self.ocr_regions_mapping.get(state or self.current_state)
+        if not isinstance(regions_data_list, list):
+            return {}
+        numeric = [(idx, region_data) for idx, region_data in enumerate(regions_data_list)
+                   if isinstance(region_data, dict) and region_data.get('numeric') and
+                   isinstance(region_data.get('region'), dict)]
+        if not numeric:
+            return {}
+        if frame is None:
+            frame = self.capture_frame()
+        return {region_data.get('field', idx): self.read_number(self._to_view(region_data['region']), frame)
+                for idx, region_data in numeric}
+
+    def _extract_and_clean_text(self, image, profile=None):
+        """
+        Extrae texto de una imagen (BGR o escala de grises) y lo limpia.
+
+        Args:
+            image (np.ndarray): Región a leer.
+            profile (str | dict, optional): Perfil OCR (nombre predefinido u opciones, ver ocr_profiles).
+        """
+        if image is None: return ""
+        return get_profile(profile).read_text(image)
 
 # --- Ejemplo de Uso (opcional, el tester es ahora la forma principal de probar) ---
 if __name__ == "__main__":
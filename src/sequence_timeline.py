@@ -0,0 +1,147 @@
+"""
+Compilación de secuencias de comandos del gamepad en líneas de tiempo inmutables.
+
+Una secuencia (lista de diccionarios {"type": "button" | "joystick" | "trigger" | "wait", ...},
+el formato de GamepadController.execute_sequence) se traduce una sola vez a una
+tupla de eventos (desfase absoluto en segundos, cambio de estado). El
+InputScheduler reproduce esos eventos a partir de un instante de inicio, por lo
+que los errores de un sleep no se acumulan a lo largo de la secuencia. Las
+secuencias compiladas se guardan en una caché indexada por nombre o por
+contenido.
+"""
+
+import logging
+import functools
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger('sequence_timeline')
+
+# Duraciones por defecto de cada tipo de comando (las mismas que execute_sequence)
+DEFAULT_COMMAND_DURATION = 0.1
+DEFAULT_WAIT_DURATION = 0.5
+
+# Número máximo de secuencias compiladas en caché
+MAX_CACHED_SEQUENCES = 256
+
+
+@dataclass(frozen=True)
+class CompiledSequence:
+    """Línea de tiempo inmutable de una secuencia."""
+    name: str
+    events: Tuple[Tuple[float, Mapping[Any, Any]], ...]   # (desfase en segundos, cambio de estado)
+    duration: float                                       # Duración total, esperas finales incluidas
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+_cache: Dict[Any, CompiledSequence] = {}
+_cache_lock = threading.Lock()
+
+
+def _freeze(value: Any) -> Any:
+    """Convierte un valor de comando en algo hashable para la clave de caché."""
+    if isinstance(value, dict):
+        return tuple(sorted(((k, _freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _side(value: str, kind: str) -> str:
+    """Valida "left"/"right" de un joystick o gatillo."""
+    if value.lower() not in ("left", "right"):
+        raise ValueError(f"{kind} no válido: {value}. Debe ser 'left' o 'right'")
+    return value.lower()
+
+
+def _compile(sequence: List[Dict], name: str) -> CompiledSequence:
+    """Traduce una lista de comandos a una línea de tiempo."""
+    events: List[Tuple[float, Mapping[Any, Any]]] = []
+    offset = 0.0
+
+    def add(at: float, delta: Dict) -> None:
+        events.append((round(at, 6), MappingProxyType(delta)))
+
+    for command in sequence:
+        cmd_type = command.get("type", "")
+        if cmd_type == "button":
+            button = command.get("button")
+            duration = command.get("duration", DEFAULT_COMMAND_DURATION)
+            add(offset, {button: True})
+            add(offset + duration, {button: False})
+        elif cmd_type == "joystick":
+            control = f"{_side(command.get('joystick', 'left'), 'Joystick')}_stick"
+            duration = command.get("duration", DEFAULT_COMMAND_DURATION)
+            add(offset, {control: (command.get("x", 0), command.get("y", 0))})
+            if duration > 0:
+                add(offset + duration, {control: (0, 0)})
+        elif cmd_type == "trigger":
+            control = f"{_side(command.get('trigger', 'left'), 'Gatillo')}_trigger"
+            duration = command.get("duration", DEFAULT_COMMAND_DURATION)
+            add(offset, {control: command.get("value", 255)})
+            if duration > 0:
+                add(offset + duration, {control: 0})
+        elif cmd_type == "wait":
+            duration = command.get("duration", DEFAULT_WAIT_DURATION)
+        else:
+            logger.warning(f"Tipo de comando desconocido en la secuencia '{name}': {cmd_type}")
+            continue
+        offset += duration
+
+    # Orden estable: a igual desfase se conserva el orden de la secuencia
+    events.sort(key=lambda event: event[0])
+    return CompiledSequence(name=name, events=tuple(events), duration=round(offset, 6))
+
+
+def compile_sequence(sequence, name: Optional[str] = None) -> CompiledSequence:
+    """
+    Compila una secuencia, reutilizando la compilación anterior si ya está en caché.
+
+    Args:
+        sequence: Lista de comandos (formato de execute_sequence) o una CompiledSequence
+        name: Nombre de la secuencia. Si se indica, es la clave de caché (el llamante
+            garantiza que el mismo nombre corresponde siempre al mismo contenido);
+            si no, la clave es el propio contenido
+
+    Returns:
+        CompiledSequence
+    """
+    if isinstance(sequence, CompiledSequence):
+        return sequence
+    key = ('name', name) if name else ('content', _freeze(sequence))
+    with _cache_lock:
+        compiled = _cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    compiled = _compile(sequence, name or f"secuencia_{len(sequence)}_comandos")
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHED_SEQUENCES:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = compiled
+    logger.debug(f"Secuencia '{compiled.name}' compilada: {len(compiled)} eventos, {compiled.duration:.2f} s")
+    return compiled
+
+
+def clear_cache() -> None:
+    """Vacía la caché de secuencias compiladas."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def compiled_sequence(builder):
+    """
+    Decorador para funciones que construyen secuencias: la lista se construye y
+    compila en la primera llamada con cada combinación de argumentos y después se
+    devuelve la CompiledSequence cacheada.
+    """
+    @functools.lru_cache(maxsize=MAX_CACHED_SEQUENCES)
+    def wrapper(*args, **kwargs):
+        arguments = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in sorted(kwargs.items())]
+        name = f"{builder.__name__}({', '.join(arguments)})" if arguments else builder.__name__
+        return _compile(builder(*args, **kwargs), name)
+    return functools.wraps(builder)(wrapper)
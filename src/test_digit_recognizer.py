@@ -0,0 +1,51 @@
+"""
+Pruebas del reconocedor de dígitos sobre recortes que no forman parte del atlas.
+"""
+
+import json
+import os
+
+import cv2
+import pytest
+
+from digit_recognizer import GLYPH_SAMPLES_FILE, IMAGES_DIR, DigitRecognizer
+
+HELD_OUT = "menu_miequipo_jugadores_raquel_stats_20250403_183117.png"
+# Columnas de estadísticas de la ficha (x, valores de arriba abajo)
+STAT_COLUMNS = [
+    (1434, [53, 60, 67, 52, 48, 52, 54, 45, 48, 50]),
+    (2154, [40, 48, 45, 40, 40, 40, 40, 40, 40]),
+    (2874, [72, 68, 55, 60, 53, 60, 58]),
+]
+
+
+@pytest.fixture(scope="module")
+def recognizer():
+    recognizer = DigitRecognizer()
+    if not recognizer.available:
+        pytest.skip("Atlas de glifos no disponible")
+    return recognizer
+
+
+def test_held_out_capture_is_not_a_sample():
+    with open(GLYPH_SAMPLES_FILE, encoding="utf-8") as f:
+        assert HELD_OUT not in {sample['image'] for sample in json.load(f)}
+
+
+def test_reads_held_out_stats(recognizer):
+    gray = cv2.imread(os.path.join(IMAGES_DIR, HELD_OUT), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        pytest.skip(f"Falta la captura {HELD_OUT}")
+    crops, expected = [], []
+    for x, values in STAT_COLUMNS:
+        for row, value in enumerate(values):
+            top = 948 + 84 * row
+            crops.append(gray[top:top + 66, x:x + 84])
+            expected.append(value)
+    assert [recognizer.read_number(crop) for crop in crops] == expected
+    texts = [text for text, _ in recognizer.recognize_many(crops)]
+    assert texts == [str(value) for value in expected]
+
+
+def test_empty_region(recognizer):
+    assert recognizer.recognize(None) == ("", 0.0)
@@ -0,0 +1,70 @@
+"""
+Pruebas de las firmas de bordes sobre las capturas de pantalla completa del proyecto.
+"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from edge_signature import SignatureMatcher, compute_signature, popcount_rows, signature_similarity
+from screen_recognizer import DEFAULT_RECOGNITION_SETTINGS, IMAGES_DIR, TEMPLATE_MAPPING_FILE
+
+
+@pytest.fixture(scope="module")
+def templates():
+    with open(TEMPLATE_MAPPING_FILE, encoding="utf-8") as f:
+        mapping = json.load(f)
+    matcher = SignatureMatcher()
+    templates = {}
+    for state, files in mapping.items():
+        for file_name in files if isinstance(files, list) else [files]:
+            gray = cv2.imread(os.path.join(IMAGES_DIR, file_name), cv2.IMREAD_GRAYSCALE)
+            if gray is not None and matcher.is_full_frame(gray):
+                templates.setdefault(state, []).append(gray)
+    if len(templates) < 10:
+        pytest.skip("Faltan capturas de pantalla completa")
+    return templates
+
+
+def degrade(gray, rng):
+    """Fotograma reducido como el de la primera pasada, con otro brillo y ruido."""
+    small = cv2.resize(gray, (960, 540), interpolation=cv2.INTER_AREA).astype(np.float32)
+    small = small * 0.85 + 10 + rng.normal(0, 4, small.shape)
+    return np.clip(small, 0, 255).astype(np.uint8)
+
+
+def test_popcount_rows():
+    words = np.array([[0, 1], [np.iinfo(np.uint64).max, 3]], dtype=np.uint64)
+    assert popcount_rows(words).tolist() == [1, 66]
+
+
+def test_similarity_bounds():
+    image = np.zeros((540, 960), np.uint8)
+    image[100:300, 200:600] = 255
+    sig = compute_signature(image)
+    assert popcount_rows(sig[None, :])[0] > 0
+    assert signature_similarity(sig, sig) == 1.0
+    assert signature_similarity(sig, np.zeros_like(sig)) == 0.0
+
+
+def test_matcher_recognizes_degraded_frames(templates):
+    matcher = SignatureMatcher()
+    matcher.build(templates)
+    threshold = DEFAULT_RECOGNITION_SETTINGS['signature_threshold']
+    rng = np.random.default_rng(0)
+    for state, template_list in templates.items():
+        results = matcher.match(degrade(template_list[0], rng))
+        similarity, _ = results[state]
+        assert similarity >= threshold, state
+        # Sólo una pantalla idéntica (capturas repetidas en otro estado) puede superarla
+        assert max(value for value, _ in results.values()) - similarity < 0.02, state
+
+
+def test_distinct_screens_are_separated(templates):
+    signatures = [compute_signature(template_list[0]) for template_list in templates.values()]
+    cross = [signature_similarity(a, b) for i, a in enumerate(signatures) for b in signatures[i + 1:]]
+    assert np.mean(cross) < 0.3
+    assert np.percentile(cross, 90) < DEFAULT_RECOGNITION_SETTINGS['signature_threshold']
@@ -0,0 +1,66 @@
+"""
+Pruebas del buscador FFT frente a cv2.matchTemplate (TM_CCOEFF_NORMED).
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from fft_matcher import FFTMatcher
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCREEN = os.path.join(PROJECT_DIR, "images", "menu_miequipo_jugadores_20250403_182400.png")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    gray = cv2.imread(SCREEN, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        pytest.skip("Falta la captura de Mi Equipo")
+    return cv2.resize(gray, (960, 540), interpolation=cv2.INTER_AREA)
+
+
+def reference(frame, template):
+    scores = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    _, confidence, _, location = cv2.minMaxLoc(scores)
+    return location, confidence
+
+
+@pytest.mark.parametrize("box", [(100, 60, 80, 40), (500, 300, 120, 64), (481, 125, 33, 17)])
+def test_match_agrees_with_match_template(frame, box):
+    x, y, width, height = box
+    template = frame[y:y + height, x:x + width].copy()
+    location, confidence = FFTMatcher().match(frame, template, box, frame_key=1)
+    expected_location, expected_confidence = reference(frame, template)
+    assert location == expected_location == (x, y)
+    assert confidence == pytest.approx(expected_confidence, abs=1e-3)
+
+
+def test_match_scores_agree_on_a_different_frame(frame):
+    template = frame[200:240, 300:380].copy()
+    shifted = np.roll(frame, (7, -11), axis=(0, 1))
+    location, confidence = FFTMatcher().match(shifted, template, 'plantilla')
+    expected_location, expected_confidence = reference(shifted, template)
+    assert location == expected_location == (289, 207)
+    assert confidence == pytest.approx(expected_confidence, abs=1e-3)
+
+
+def test_frame_and_template_spectra_are_reused(frame):
+    matcher = FFTMatcher(cache_size=1)
+    first = frame[10:30, 10:50].copy()
+    second = frame[100:130, 200:260].copy()
+    matcher.match(frame, first, 'a', frame_key=1)
+    matcher.match(frame, second, 'b', frame_key=1)
+    matcher.match(frame, second, 'b', frame_key=1)
+    assert matcher.stats == {'frame_transforms': 1, 'template_transforms': 2, 'searches': 3}
+    matcher.match(frame, first, 'a', frame_key=2)       # Expulsado de la caché (tamaño 1)
+    assert matcher.stats['frame_transforms'] == 2
+    assert matcher.stats['template_transforms'] == 3
+
+
+def test_degenerate_templates(frame):
+    matcher = FFTMatcher()
+    assert matcher.match(frame[:10, :10], frame[:20, :20], 'grande') == (None, 0.0)
+    assert matcher.match(frame, np.full((8, 8), 128, np.uint8), 'plana') == (None, 0.0)
@@ -0,0 +1,66 @@
+"""
+Pruebas del pool de buffers y de la fuente de fotogramas (con una captura falsa en lugar de mss).
+"""
+
+import types
+
+import numpy as np
+
+from frame_source import FramePool, FrameSource
+
+
+class FakeScreenshot:
+    """Sustituye a mss: la pantalla es roja, con amarillo a la izquierda de x = 132."""
+
+    def __init__(self):
+        self.grabs = 0
+
+    def grab(self, region):
+        self.grabs += 1
+        height, width = region['height'], region['width']
+        bgra = np.zeros((height, width, 4), np.uint8)
+        bgra[..., 2] = 255                      # Rojo
+        bgra[:, : max(0, 132 - region['left']), 1] = 255    # Franja amarilla
+        return types.SimpleNamespace(width=width, height=height, raw=bgra.tobytes())
+
+
+def fake_source(**kwargs):
+    source = FrameSource(region={'left': 100, 'top': 50, 'width': 64, 'height': 32}, **kwargs)
+    source._local.sct = FakeScreenshot()
+    return source
+
+
+def test_pool_reuses_buffers_in_a_ring():
+    pool = FramePool(slots=2)
+    first = pool.acquire((4, 4))
+    second = pool.acquire((4, 4))
+    assert first is not second
+    assert pool.acquire((4, 4)) is first
+    assert pool.acquire((4, 4), np.float32) is not first
+    assert pool.allocations == 4
+    assert pool.stats()['rings'] == 2
+
+
+def test_grab_reuses_pool_buffers():
+    source = fake_source(pool=FramePool(slots=2), downscale_width=16)
+    frames = [source.grab() for _ in range(3)]
+    assert [frame.seq for frame in frames] == [1, 2, 3]
+    assert source.current is frames[-1]
+    # Tres capturas con dos buffers por forma: la tercera reutiliza los de la primera
+    assert frames[2].bgr is frames[0].bgr and frames[2].gray is frames[0].gray
+    assert source.pool.allocations == 6   # BGR, gris y gris reducido, dos de cada
+    frame = frames[-1]
+    assert frame.bgr.shape == (32, 64, 3) and frame.gray.shape == (32, 64)
+    assert frame.small_gray.shape == (8, 16) and frame.scale == 0.25
+    assert tuple(frame.bgr[0, 0]) == (0, 255, 255) and tuple(frame.bgr[0, -1]) == (0, 0, 255)
+
+
+def test_region_grab_and_crop():
+    source = fake_source()
+    full = source.grab()
+    part = source.grab(region={'left': 110, 'top': 60, 'width': 8, 'height': 4})
+    assert part.small_gray is None
+    assert source.current is full
+    crop = full.crop({'left': 110, 'top': 60, 'width': 8, 'height': 4})
+    assert crop.shape == (4, 8) and np.array_equal(crop, part.gray)
+    assert full.crop({'left': 90, 'top': 60, 'width': 8, 'height': 4}) is None
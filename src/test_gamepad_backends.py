@@ -0,0 +1,129 @@
+"""
+Pruebas de los backends del gamepad (vgamepad se sustituye por un módulo falso).
+"""
+
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from gamepad_backends import (BUTTON_NAMES, DEFAULT_GAMEPAD_SETTINGS, REPORT_DTYPE, RecorderBackend,
+                              VGamepadBackend, backend_kind, create_backend, ds4_dpad_direction, read_trace)
+
+
+class FakeDS4:
+    def __init__(self):
+        self.directions = []
+
+    def directional_pad(self, direction):
+        self.directions.append(direction)
+
+    def reset(self):
+        pass
+
+    def update(self):
+        pass
+
+
+@pytest.fixture
+def fake_vgamepad(monkeypatch):
+    enum = types.SimpleNamespace
+    directions = ('NONE', 'NORTH', 'NORTHEAST', 'EAST', 'SOUTHEAST', 'SOUTH', 'SOUTHWEST', 'WEST', 'NORTHWEST')
+    module = types.ModuleType('vgamepad')
+    module.VDS4Gamepad = FakeDS4
+    module.DS4_BUTTONS = enum(**{f"DS4_BUTTON_{name}": name for name in (
+        'CROSS', 'CIRCLE', 'SQUARE', 'TRIANGLE', 'OPTIONS', 'SHARE', 'SHOULDER_LEFT',
+        'SHOULDER_RIGHT', 'THUMB_LEFT', 'THUMB_RIGHT')})
+    module.DS4_DPAD_DIRECTIONS = enum(**{f"DS4_BUTTON_DPAD_{name}": name.lower() for name in directions})
+    monkeypatch.setitem(sys.modules, 'vgamepad', module)
+    return module
+
+
+def test_ds4_dpad_direction():
+    assert ds4_dpad_direction(set()) == 'none'
+    assert ds4_dpad_direction({'dpad_up'}) == 'north'
+    assert ds4_dpad_direction({'dpad_up', 'dpad_right'}) == 'northeast'
+    assert ds4_dpad_direction({'dpad_down', 'dpad_left', 'a'}) == 'southwest'
+    assert ds4_dpad_direction({'dpad_up', 'dpad_down'}) == 'none'
+    assert ds4_dpad_direction({'dpad_up', 'dpad_down', 'dpad_left'}) == 'west'
+
+
+def test_ds4_dpad_keeps_other_directions(fake_vgamepad):
+    backend = VGamepadBackend('ds4')
+    backend.set_button('dpad_up', True)
+    backend.set_button('dpad_right', True)
+    backend.set_button('dpad_up', False)
+    backend.set_button('dpad_right', False)
+    assert backend.gamepad.directions == ['north', 'northeast', 'east', 'none']
+
+
+def test_recorder_in_memory():
+    backend = RecorderBackend()
+    backend.set_button('a', True)
+    backend.set_stick('left', 100, -100)
+    backend.set_trigger('right', 255)
+    backend.update()
+    backend.set_button('a', False)
+    backend.update()
+    reports = backend.as_array()
+    assert reports.dtype == REPORT_DTYPE and len(reports) == 2
+    assert reports['buttons'].tolist() == [1 << BUTTON_NAMES.index('a'), 0]
+    assert (reports['lx'][0], reports['ly'][0], reports['rt'][0]) == (100, -100, 255)
+
+
+@pytest.mark.parametrize("trace_format, suffix", [('jsonl', '.jsonl'), ('binary', '.bin')])
+def test_recorder_trace_round_trip(tmp_path, trace_format, suffix):
+    path = str(tmp_path / f"traza{suffix}")
+    backend = RecorderBackend(path, trace_format)
+    backend.set_button('dpad_down', True)
+    backend.set_stick('right', -32768, 32767)
+    backend.update()
+    backend.set_button('dpad_down', False)
+    backend.update()
+    backend.close()
+    trace = read_trace(path)
+    assert len(trace) == 2
+    if trace_format == 'jsonl':
+        assert trace[0]['buttons'] == ['dpad_down'] and trace[1]['buttons'] == []
+        assert trace[0]['right_stick'] == [-32768, 32767]
+    else:
+        assert trace['buttons'].tolist() == [1 << BUTTON_NAMES.index('dpad_down'), 0]
+        assert (trace['rx'][0], trace['ry'][0]) == (-32768, 32767)
+        assert np.all(np.diff(trace['t']) >= 0)
+
+
+@pytest.mark.parametrize("gamepad_type, configured, kind", [
+    (None, 'ds4', 'ds4'), (None, 'recorder', 'recorder'), ('xbox360', 'ds4', 'xbox'),
+    ('dualshock4', 'xbox', 'ds4'), (None, 'volante', 'xbox'),
+])
+def test_backend_kind(gamepad_type, configured, kind):
+    assert backend_kind(gamepad_type, {'type': configured}) == kind
+
+
+def test_controller_type_comes_from_settings(fake_vgamepad, monkeypatch):
+    import gamepad_controller
+    from gamepad_controller import GamepadController, GamepadType
+
+    settings = dict(DEFAULT_GAMEPAD_SETTINGS, type='ds4', trace_file=None)
+    monkeypatch.setattr(gamepad_controller, 'load_gamepad_settings', lambda: settings)
+    gamepad = GamepadController()
+    assert gamepad.gamepad_type == GamepadType.DS4
+    assert isinstance(gamepad.backend, VGamepadBackend) and gamepad.backend.pad == 'ds4'
+    # Un tipo explícito (p. ej. --gamepad) tiene prioridad sobre settings.yaml
+    gamepad = GamepadController(GamepadType.RECORDER)
+    assert gamepad.gamepad_type == GamepadType.RECORDER
+    assert isinstance(gamepad.backend, RecorderBackend)
+    gamepad.close()
+
+
+@pytest.mark.parametrize("trace_format, suffix", [('jsonl', '.jsonl'), ('binary', '.bin')])
+def test_recorder_trace_per_instance(tmp_path, trace_format, suffix):
+    settings = dict(DEFAULT_GAMEPAD_SETTINGS, trace_file=str(tmp_path / "traza.jsonl"), trace_format=trace_format)
+    backends = [create_backend('recorder', settings, name) for name in ("izquierda", "derecha")]
+    for backend in backends:
+        backend.update()
+        backend.close()
+    assert sorted(os.listdir(tmp_path)) == [f"traza_derecha{suffix}", f"traza_izquierda{suffix}"]
+    assert all(len(read_trace(str(tmp_path / name))) == 1 for name in os.listdir(tmp_path))
@@ -0,0 +1,84 @@
+"""
+Pruebas del GamepadController sobre el backend de grabación (sin vgamepad).
+"""
+
+import pytest
+
+from gamepad_backends import RecorderBackend
+from gamepad_controller import GamepadButton, GamepadController
+
+
+@pytest.fixture
+def controller():
+    backend = RecorderBackend()
+    gamepad = GamepadController(backend=backend)
+    yield gamepad
+    gamepad.close()
+
+
+def test_press_button_sends_press_and_release(controller):
+    controller.press_button(GamepadButton.A, duration=0.01)
+    reports = controller.backend.as_array()
+    assert len(reports) == 2
+    assert reports['buttons'][0] == 1       # Bit 0 = 'a'
+    assert reports['buttons'][1] == 0
+
+
+def test_move_joystick(controller):
+    controller.move_joystick("left", 1000, -2000, duration=0.01)
+    reports = controller.backend.as_array()
+    assert (reports['lx'][0], reports['ly'][0]) == (1000, -2000)
+    assert (reports['lx'][-1], reports['ly'][-1]) == (0, 0)
+    controller.set_joystick("right", 5, 6)
+    assert controller.backend.sticks['right'] == (5, 6)
+
+
+def test_trigger_press(controller):
+    controller.trigger_press("right", 200, duration=0.01)
+    reports = controller.backend.as_array()
+    assert reports['rt'][0] == 200
+    assert reports['rt'][-1] == 0
+
+
+def test_invalid_stick_and_trigger(controller):
+    with pytest.raises(ValueError):
+        controller.set_joystick("middle", 0, 0)
+    with pytest.raises(ValueError):
+        controller.set_trigger("middle", 0)
+
+
+def test_async_stick_and_trigger(controller):
+    controller.move_joystick_async("left", 100, 100, duration=0.01).result(timeout=1)
+    controller.trigger_press_async("left", 255, duration=0.01).result(timeout=1)
+    reports = controller.backend.as_array()
+    assert (reports['lx'] == 100).any()
+    assert (reports['lt'] == 255).any()
+    assert controller.backend.sticks['left'] == (0, 0)
+    assert controller.backend.triggers['left'] == 0
+
+
+def test_transaction_sends_one_report(controller):
+    with controller.transaction():
+        controller.hold_button(GamepadButton.RB)
+        controller.set_joystick("left", 32767, 0)
+        controller.set_trigger("right", 128)
+    assert controller.backend.report_count == 1
+
+
+def test_tap_asks_the_state_provider(controller):
+    states = iter(['menu_miequipo_jugadores', None])
+    controller.state_provider = lambda: next(states)
+    controller.input_delays = {'menu_miequipo_jugadores': {'A': 0.0}}
+    looked_up = []
+    original = controller.input_delay
+    controller.input_delay = lambda button, state=None: looked_up.append(state) or original(button, state)
+    controller.tap(GamepadButton.A, wait=0.01, duration=0.01)
+    controller.tap(GamepadButton.A, wait=0.01, duration=0.01)
+    controller.tap(GamepadButton.A, wait=0.01, duration=0.01, state='partido')
+    assert looked_up == ['menu_miequipo_jugadores', None, 'partido']
+
+
+def test_check_delta(controller):
+    controller.check_delta({GamepadButton.A: True, 'left_stick': (0, 0), 'right_trigger': 255})
+    with pytest.raises(ValueError):
+        controller.check_delta({'volante': 1})
@@ -0,0 +1,89 @@
+"""
+Pruebas del calibrador de retardos con una pantalla simulada y el backend de grabación.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from frame_source import Frame
+from gamepad_backends import RecorderBackend
+from gamepad_controller import GamepadButton, GamepadController
+from input_calibration import InputDelayCalibrator
+
+# La lista simulada ignora las pulsaciones que llegan antes de este tiempo desde la anterior aceptada
+GAME_DELAY = 0.08
+
+
+class FakeList(RecorderBackend):
+    """Lista que se mueve con la cruceta; la captura es una imagen uniforme con el brillo de la posición."""
+
+    def __init__(self):
+        super().__init__()
+        self.position = 2
+        self.accepted_at = float('-inf')
+        self.seq = 0
+        self._previous = set()
+
+    def update(self):
+        timestamp = time.perf_counter()
+        for name in self.pressed - self._previous:
+            step = {'dpad_down': 1, 'dpad_up': -1}.get(name)
+            if step and timestamp - self.accepted_at >= GAME_DELAY:
+                self.accepted_at = timestamp
+                self.position += step
+        self._previous = set(self.pressed)
+        super().update()
+
+    def capture_frame(self, region=None):
+        self.seq += 1
+        return Frame(self.seq, time.perf_counter(), {}, None, np.full((9, 16), self.position * 30, np.uint8))
+
+
+class FakeConfig:
+    def __init__(self):
+        self.saved = {}
+
+    def set_input_delay(self, state, button_name, delay):
+        self.saved[(state, button_name)] = delay
+
+
+@pytest.fixture
+def calibrator():
+    screen = FakeList()
+    gamepad = GamepadController(backend=screen)
+    gamepad.input_delays = {}
+    calibrator = InputDelayCalibrator(gamepad, screen, FakeConfig(), settings={
+        'start_delay': 0.3, 'min_delay': 0.05, 'factor': 0.5, 'trials': 1,
+        'tap_duration': 0.01, 'settle_time': 0.1, 'settle_timeout': 1.0})
+    yield calibrator
+    gamepad.close()
+
+
+def test_probe(calibrator):
+    screen = calibrator.recognizer
+    calibrator.gamepad.press_button(GamepadButton.DPAD_DOWN, duration=0.01)
+    reference = calibrator._settled_frame()
+    calibrator._undo([GamepadButton.DPAD_UP])
+    assert screen.position == 2
+    undo = [GamepadButton.DPAD_UP, GamepadButton.DPAD_UP]
+    assert calibrator.probe(GamepadButton.DPAD_DOWN, GamepadButton.DPAD_DOWN, 0.2, reference, undo)
+    assert screen.position == 2
+    assert not calibrator.probe(GamepadButton.DPAD_DOWN, GamepadButton.DPAD_DOWN, 0.02, reference, undo)
+    assert screen.position == 2
+
+
+def test_calibrate_finds_the_shortest_accepted_delay(calibrator):
+    delay = calibrator.calibrate('menu_miequipo_jugadores', GamepadButton.DPAD_DOWN)
+    # Se aceptan 0,3 y 0,15 s; 0,075 s es menor que GAME_DELAY. Resultado: 0,15 s con el margen de 1,2
+    assert delay == pytest.approx(0.18)
+    assert calibrator.gamepad.input_delays == {'menu_miequipo_jugadores': {'DPAD_DOWN': delay}}
+    assert calibrator.config_system.saved == {('menu_miequipo_jugadores', 'DPAD_DOWN'): delay}
+    assert calibrator.recognizer.position == 2
+
+
+def test_calibrate_rejects_buttons_without_effect(calibrator):
+    assert calibrator.calibrate('menu', GamepadButton.A, undo=[GamepadButton.B]) is None
+    assert calibrator.calibrate('menu', GamepadButton.A) is None      # Sin botones por defecto para deshacer
+    assert calibrator.config_system.saved == {}
@@ -0,0 +1,82 @@
+"""
+Pruebas de la compilación de comportamientos y de los carriles de entrada.
+"""
+
+import pytest
+
+from gamepad_backends import BUTTON_NAMES, RecorderBackend
+from gamepad_controller import GamepadButton, GamepadController
+from input_lanes import OTHER_LANE, Behavior, InputLanes, lane_of
+
+
+def test_lane_of():
+    assert lane_of(GamepadButton.A) == 'face'
+    assert lane_of(GamepadButton.RB) == 'shoulders'
+    assert lane_of("left_stick") == 'left_stick'
+    assert lane_of("right_trigger") == 'triggers'
+    assert lane_of(GamepadButton.START) == OTHER_LANE
+    with pytest.raises(ValueError):
+        lane_of("volante")
+
+
+def test_compile_quantizes_to_the_control_grid():
+    behavior = (Behavior()
+                .hold(GamepadButton.RB, 0.0, 0.5)
+                .tap(GamepadButton.A, 0.21)
+                .trigger("right", 0.1, 0.1, value=128))
+    lanes = behavior.compile(rate=10)
+    assert lanes == {
+        'shoulders': [(0.0, {GamepadButton.RB: True}), (0.5, {GamepadButton.RB: False})],
+        'face': [(0.2, {GamepadButton.A: True}), (0.4, {GamepadButton.A: False})],
+        'triggers': [(0.1, {'right_trigger': 128}), (0.2, {'right_trigger': 0})],
+    }
+    assert behavior.duration == pytest.approx(0.5)
+
+
+def test_compile_samples_stick_paths_once_per_change():
+    behavior = Behavior().steer("left", 0.0, 0.4, lambda t: (40000 if t >= 0.2 else 0, -1000))
+    events = behavior.compile(rate=10)['left_stick']
+    assert events == [(0.0, {'left_stick': (0, -1000)}),
+                      (0.2, {'left_stick': (32767, -1000)}),
+                      (0.4, {'left_stick': (0, 0)})]
+
+
+@pytest.mark.parametrize("second_at", [0.3, 0.5])
+def test_compile_rejects_overlapping_uses(second_at):
+    # La segunda pulsación no puede empezar antes ni en el mismo tick que la suelta de la primera
+    behavior = Behavior("doble").hold(GamepadButton.A, 0.0, 0.5).tap(GamepadButton.A, second_at)
+    with pytest.raises(ValueError, match="doble"):
+        behavior.compile(rate=10)
+    assert Behavior().hold(GamepadButton.A, 0.0, 0.5).tap(GamepadButton.A, 0.6).compile(rate=10)
+
+
+def test_invalid_stick_and_trigger():
+    with pytest.raises(ValueError):
+        Behavior().steer("middle", 0.0, 0.1, (0, 0))
+    with pytest.raises(ValueError):
+        Behavior().trigger("middle", 0.0, 0.1)
+
+
+def button_bit(button):
+    return 1 << BUTTON_NAMES.index(button.value)
+
+
+def test_lanes_play_in_parallel_and_queue_on_busy_lanes():
+    gamepad = GamepadController(backend=RecorderBackend())
+    lanes = InputLanes(gamepad, rate=100)
+    try:
+        shoulders = lanes.play(Behavior().hold(GamepadButton.RB, 0.0, 0.05))
+        face = lanes.play(Behavior().tap(GamepadButton.A))
+        queued = lanes.play(Behavior().tap(GamepadButton.LB))
+        assert lanes.busy_until('shoulders') > lanes.busy_until('face')
+        for future in (shoulders, face, queued):
+            future.result(timeout=1)
+    finally:
+        gamepad.close()
+    reports = [int(bits) for bits in gamepad.backend.as_array()['buttons']]
+    rb, a, lb = (button_bit(button) for button in (GamepadButton.RB, GamepadButton.A, GamepadButton.LB))
+    # Los carriles libres empiezan en el mismo tick: RB y A salen en el mismo informe
+    assert reports[0] == rb | a
+    # LB espera a que el carril de RB quede libre
+    assert reports.index(lb) > reports.index(0)
+    assert reports[-1] == 0
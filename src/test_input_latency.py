@@ -0,0 +1,98 @@
+"""
+Pruebas de los histogramas y del monitor de latencia con imágenes sintéticas (sin captura real).
+"""
+
+import threading
+import types
+
+import numpy as np
+import pytest
+
+from gamepad_controller import GamepadButton
+from input_latency import LatencyHistogram, LatencyMonitor
+
+
+def test_histogram_bins_and_percentiles():
+    histogram = LatencyHistogram(bin_width=0.01, max_latency=0.1)
+    for latency in (0.012, 0.015, 0.031, 0.5):
+        histogram.add(latency)
+    assert histogram.count == 4
+    assert histogram.counts[1] == 2 and histogram.counts[3] == 1
+    assert histogram.counts[-1] == 1          # Las muestras mayores que max_latency van a la última clase
+    assert histogram.percentile(50) == pytest.approx(0.023)
+    assert histogram.percentile(50, last=2) == pytest.approx(0.2655)
+    data = histogram.to_dict()
+    assert (data['count'], data['max_ms'], data['bin_width_ms']) == (4, 500.0, 10.0)
+    assert "+ ms" in histogram.format()
+    assert LatencyHistogram().percentile(50) is None
+    assert LatencyHistogram().format() == "  (sin muestras)"
+
+
+@pytest.fixture
+def monitor():
+    gamepad = types.SimpleNamespace(report_listeners=[])
+    monitor = LatencyMonitor(gamepad, state_provider=lambda: monitor.screen,
+                             settings={'timeout': 0.5, 'recent_window': 2, 'degradation_factor': 1.5})
+    monitor.screen = 'menu'
+    return monitor
+
+
+def image(value):
+    return np.full((9, 16), value, np.uint8)
+
+
+def press(monitor, timestamp, button=GamepadButton.A):
+    monitor._on_report(timestamp, {button: True})
+
+
+def test_observe_measures_first_change(monitor):
+    press(monitor, 0.0)                                 # Sin fotograma de referencia: se ignora
+    assert monitor.observe(image(0), 1.0) is None
+    press(monitor, 1.0)
+    assert monitor.observe(image(0), 1.02) is None      # Sin cambios todavía
+    assert monitor.observe(image(50), 1.05) == pytest.approx(0.05)
+    assert monitor.observe(image(100), 1.06) is None    # Ya no hay pulsación pendiente
+    press(monitor, 2.0)
+    assert monitor.observe(image(100), 2.6) is None     # Sin reacción tras `timeout`
+    summary = monitor.summary()
+    assert summary['overall']['count'] == 1 and summary['overall']['timeouts'] == 1
+    assert summary['by_button']['A']['count'] == 1
+    assert summary['frames'] == 5
+    assert "Botón A" in monitor.format_report()
+
+
+def test_observe_tracks_states_superseded_presses_and_degradation(monitor):
+    monitor.observe(image(0), 0.0)
+    for index, latency in enumerate((0.02, 0.02, 0.02, 0.02, 0.2, 0.2)):
+        start = 1.0 + index
+        if index == 1:
+            press(monitor, start - 0.5, GamepadButton.B)    # Se solapa con la siguiente
+        monitor.screen = 'partido' if index == 4 else 'menu'
+        press(monitor, start)
+        monitor.observe(image(0 if index % 2 else 60), start + latency)
+    summary = monitor.summary()
+    assert summary['superseded'] == 1
+    assert set(summary['by_state']) == {'menu', 'partido'}
+    assert 'B' not in summary['by_button']
+    assert monitor._degraded
+
+
+def test_summary_while_recording(monitor):
+    monitor.observe(image(0), 0.0)
+    errors = []
+
+    def read():
+        try:
+            for _ in range(200):
+                monitor.summary()
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for index in range(2000):
+        press(monitor, index * 1.0)
+        monitor.observe(image(0 if index % 2 else 60), index * 1.0 + 0.01)
+    reader.join()
+    assert not errors
+    assert monitor.summary()['overall']['count'] == 2000
@@ -0,0 +1,62 @@
+"""
+Pruebas del planificador de entradas: fusión de eventos por tick y cancelación.
+"""
+
+import time
+
+import pytest
+
+from input_scheduler import InputScheduler
+
+
+@pytest.fixture
+def scheduler():
+    reports = []
+    scheduler = InputScheduler(reports.append)
+    scheduler.reports_sent = reports
+    yield scheduler
+    scheduler.stop()
+
+
+def test_events_in_the_same_tick_share_a_report(scheduler):
+    future = scheduler.submit([(0.0, {'a': True}), (0.0005, {'lx': 100}), (0.02, {'a': False})],
+                              start=time.perf_counter() + 0.02)
+    future.result(timeout=1)
+    assert scheduler.reports_sent == [{'a': True, 'lx': 100}, {'a': False}]
+    assert scheduler.executed == 3 and scheduler.reports == 2
+
+
+def test_same_control_is_never_merged(scheduler):
+    # Pulsación y suelta dentro del mismo tick: dos informes, en orden
+    future = scheduler.submit([(0.0, {'a': True}), (0.0002, {'a': False, 'b': True})],
+                              start=time.perf_counter() + 0.02)
+    future.result(timeout=1)
+    assert scheduler.reports_sent == [{'a': True}, {'a': False, 'b': True}]
+
+
+def test_actions_submitted_separately_merge(scheduler):
+    start = time.perf_counter() + 0.02
+    first = scheduler.submit([(0.0, {'a': True})], start=start)
+    second = scheduler.submit([(0.0, {'rt': 255})], start=start)
+    assert first.result(timeout=1) == second.result(timeout=1)
+    assert scheduler.reports_sent == [{'a': True, 'rt': 255}]
+
+
+def test_cancel_before_start_and_stop_finishes_started_actions(scheduler):
+    cancelled = scheduler.submit([(0.0, {'x': True})], start=time.perf_counter() + 0.05)
+    assert cancelled.cancel()
+    started = scheduler.submit([(0.0, {'a': True}), (10.0, {'a': False})])
+    pending = scheduler.submit([(0.0, {'b': True})], start=time.perf_counter() + 10.0)
+    deadline = time.perf_counter() + 1
+    while not scheduler.reports_sent and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    scheduler.stop()
+    # La acción empezada suelta su botón al detenerse; la no empezada se cancela
+    assert scheduler.reports_sent == [{'a': True}, {'a': False}]
+    assert started.done() and not started.cancelled()
+    assert pending.cancelled()
+
+
+def test_empty_action_completes_immediately(scheduler):
+    assert scheduler.submit([]).done()
+    assert not scheduler.running
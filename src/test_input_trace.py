@@ -0,0 +1,78 @@
+"""
+Pruebas de la grabación y reproducción de sesiones del gamepad (sin vgamepad).
+"""
+
+import numpy as np
+import pytest
+
+import input_trace
+from gamepad_backends import RecorderBackend
+from gamepad_controller import GamepadButton, GamepadController
+from input_trace import (SESSION_DTYPE, TraceRecorder, format_report, load_trace, replay_trace, timing_report,
+                         trace_events)
+
+
+@pytest.fixture
+def recorded_session(monkeypatch):
+    monkeypatch.setattr(input_trace, 'INITIAL_CAPACITY', 2)    # Obliga a ampliar el buffer
+    frames = iter(range(100, 200))
+    recorder = TraceRecorder(RecorderBackend(), frame_seq=lambda: next(frames))
+    gamepad = GamepadController(backend=recorder)
+    try:
+        with gamepad.transaction():
+            gamepad.hold_button(GamepadButton.A)
+            gamepad.set_joystick("left", 1000, -1000)
+        gamepad.set_trigger("right", 200)
+        gamepad.release_button(GamepadButton.A)
+        gamepad.set_joystick("left", 0, 0)
+        gamepad.set_trigger("right", 0)
+    finally:
+        gamepad.close()
+    return recorder
+
+
+def test_recorder_forwards_and_records(recorded_session):
+    records = recorded_session.as_array()
+    assert records.dtype == SESSION_DTYPE and len(records) == 5
+    assert recorded_session.backend.report_count == 5
+    assert list(records['frame_seq']) == [100, 101, 102, 103, 104]
+    assert (records['buttons'][0], records['lx'][0], records['ly'][0]) == (1, 1000, -1000)
+    assert records['rt'][1] == 200
+    assert (records['buttons'][-1], records['lx'][-1], records['rt'][-1]) == (0, 0, 0)
+    assert (np.diff(records['t']) >= 0).all()
+
+
+def test_save_and_load_round_trip(recorded_session, tmp_path):
+    path = recorded_session.save(str(tmp_path / "sesion"))
+    assert path.endswith(".npz")
+    records, meta = load_trace(path)
+    assert np.array_equal(records, recorded_session.as_array())
+    assert meta['backend'] == "RecorderBackend" and meta['clock'] == "perf_counter"
+
+
+def test_trace_events_only_carry_changes(recorded_session):
+    records = recorded_session.as_array()
+    events = trace_events(records, speed=2.0)
+    assert events[0][0] == 0.0
+    assert events[-1][0] == pytest.approx((records['t'][-1] - records['t'][0]) / 2.0)
+    assert events[0][1][GamepadButton.A] is True and events[0][1]['left_stick'] == (1000, -1000)
+    assert events[1][1] == {'right_trigger': 200}
+    assert events[2][1] == {GamepadButton.A: False}
+
+
+def test_replay_reproduces_reports(recorded_session):
+    records = recorded_session.as_array()
+    gamepad = GamepadController(backend=RecorderBackend())
+    try:
+        replayed, start = replay_trace(gamepad, records, lead_time=0.01)
+    finally:
+        gamepad.close()
+    sent = gamepad.backend.as_array()
+    assert len(sent) == len(records)
+    for name in ('buttons', 'lx', 'ly', 'rt'):
+        assert np.array_equal(sent[name], records[name])
+    report = timing_report(records, replayed, replay_start=start)
+    assert report['reports'] == len(records)
+    assert report['error_ms']['max_abs'] < 50
+    assert "FIDELIDAD" in format_report(report)
+    assert timing_report(records[:1], replayed[:1]) == {'reports': 1}
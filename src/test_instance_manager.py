@@ -0,0 +1,48 @@
+"""
+Pruebas del gestor de instancias con una fábrica falsa (sin juego ni gamepad).
+"""
+
+from instance_manager import InstanceManager
+from player_catalog import CATALOG_FILE, instance_catalog_file
+
+
+class FakeRecognizer:
+    def close(self):
+        pass
+
+
+class FakeApp:
+    def __init__(self, gamepad_type, monitor, region, shared_recognizer, instance_name):
+        self.monitor = monitor
+        self.instance_name = instance_name
+        self.recognizer = shared_recognizer or FakeRecognizer()
+        self.gamepad = self
+        self.closed = False
+
+    def stop_latency_monitor(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def double(self, value):
+        return (self.instance_name, value * 2)
+
+
+def test_instances_get_names_and_share_recognizer():
+    manager = InstanceManager(3, instances=[{'name': 'izquierda'}], factory=FakeApp)
+    try:
+        assert manager.names == ['izquierda', 'instancia_2', 'instancia_3']
+        assert [app.monitor for app in manager.instances] == [1, 2, 3]
+        assert len({id(app.recognizer) for app in manager.instances}) == 1
+        results = manager.run('double', value=4)
+        assert results == {name: (name, 8) for name in manager.names}
+    finally:
+        manager.close()
+    assert all(app.closed for app in manager.instances)
+
+
+def test_instance_catalog_files_are_separate():
+    assert instance_catalog_file(None) == CATALOG_FILE
+    files = {instance_catalog_file(name) for name in ('izquierda', 'derecha')}
+    assert len(files) == 2 and CATALOG_FILE not in files
@@ -0,0 +1,47 @@
+"""
+Pruebas de los perfiles OCR por región (sin ejecutar tesseract).
+"""
+
+import json
+
+import numpy as np
+
+from ocr_profiles import PRESET_PROFILES, get_profile
+from screen_recognizer import OCR_MAPPING_FILE
+
+
+def region_entries():
+    with open(OCR_MAPPING_FILE, encoding="utf-8") as f:
+        mapping = json.load(f)
+    for state, regions in mapping.items():
+        if isinstance(regions, list):
+            for idx, region_data in enumerate(regions):
+                if isinstance(region_data, dict) and 'region' in region_data:
+                    yield state, idx, region_data
+
+
+def test_mapping_regions_have_known_profiles():
+    entries = list(region_entries())
+    assert entries
+    for state, idx, region_data in entries:
+        assert region_data.get('ocr') in PRESET_PROFILES, (state, idx)
+        if region_data.get('numeric'):
+            assert region_data['ocr'] == 'digits', (state, idx)
+
+
+def test_profiles_are_compiled_once():
+    assert get_profile('line') is get_profile('line')
+    assert get_profile({'preset': 'line', 'scale': 2.0}) is get_profile({'scale': 2.0, 'preset': 'line'})
+    assert get_profile('no_existe') is get_profile('default')
+
+
+def test_digits_profile():
+    profile = get_profile('digits')
+    assert profile.config == "--psm 7 -c tessedit_char_whitelist=0123456789.,"
+    assert profile.clean("23.386.520 G\n") == "23.386.520"
+    # Texto claro sobre fondo oscuro: se binariza y se invierte
+    image = np.zeros((20, 40), np.uint8)
+    image[5:15, 10:30] = 200
+    processed = profile.preprocess(image)
+    assert set(np.unique(processed)) == {0, 255}
+    assert processed[0, 0] == 255 and processed[10, 20] == 0
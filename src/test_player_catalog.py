@@ -0,0 +1,72 @@
+"""
+Pruebas del catálogo SQLite de jugadores (en memoria).
+"""
+
+import os
+
+import pytest
+
+from player_catalog import (CATALOG_FILE, LIST_MY_TEAM, LIST_NORMAL_PLAYERS, PlayerCatalog, PlayerRecord,
+                            instance_catalog_file, matches_filters)
+
+
+@pytest.fixture
+def catalog():
+    catalog = PlayerCatalog(":memory:")
+    yield catalog
+    catalog.close()
+
+
+def test_record_seen_keeps_details_of_the_same_player(catalog):
+    assert catalog.record_seen(LIST_MY_TEAM, 0, "Raquel Lombardi", box=(10, 20, 30, 40), position="SD", rating=85)
+    assert not catalog.record_seen(LIST_MY_TEAM, 0, "raquel lombardi", box=(10, 20, 30, 40))
+    record, = catalog.get_list(LIST_MY_TEAM)
+    assert (record.position, record.rating, record.box) == ("SD", 85, (10, 20, 30, 40))
+    # Otro jugador en la misma posición reemplaza la entrada y sus datos
+    assert catalog.record_seen(LIST_MY_TEAM, 0, "Otra Jugadora")
+    record, = catalog.get_list(LIST_MY_TEAM)
+    assert (record.name, record.position, record.rating) == ("Otra Jugadora", None, None)
+    with pytest.raises(ValueError):
+        catalog.record_seen(LIST_MY_TEAM, 1, "Raquel Lombardi", altura=180)
+
+
+def test_update_details_and_find(catalog):
+    catalog.record_seen(LIST_MY_TEAM, 0, "Raquel Lombardi")
+    catalog.record_seen(LIST_NORMAL_PLAYERS, 3, "Raquel Lombardi", price=5000)
+    assert catalog.update_details("Raquel Lombardi", rating=90, skills=["Regate"], stats={'Velocidad': 88}) == 2
+    assert catalog.update_details("Raquel Lombardi", list_name=LIST_MY_TEAM, club="Atlético") == 1
+    assert catalog.update_details("Raquel Lombardi") == 0
+    exact = catalog.find("Raquel Lombardi", list_name=LIST_MY_TEAM)
+    assert [(r.rating, r.skills, r.stats, r.club) for r in exact] == [(90, ["Regate"], {'Velocidad': 88}, "Atlético")]
+    # Lectura OCR con un carácter erróneo
+    fuzzy = catalog.find("Raquel Lombard1")
+    assert {r.list_name for r in fuzzy} == {LIST_MY_TEAM, LIST_NORMAL_PLAYERS}
+    assert catalog.find("Otra Jugadora") == []
+
+
+def test_truncate_and_clear_list(catalog):
+    for index, name in enumerate(["Ana", "Berta", "Carla"]):
+        catalog.record_seen(LIST_MY_TEAM, index, name)
+    catalog.record_seen(LIST_NORMAL_PLAYERS, 0, "Diana")
+    assert catalog.truncate_list(LIST_MY_TEAM, 2) == 1
+    assert [r.name for r in catalog.get_list(LIST_MY_TEAM)] == ["Ana", "Berta"]
+    assert catalog.clear_list(LIST_MY_TEAM) == 2
+    assert [r.name for r in catalog.get_list(LIST_NORMAL_PLAYERS)] == ["Diana"]
+
+
+def test_matches_filters():
+    record = PlayerRecord("Raquel Lombardi", position="SD", club="Atlético de Madrid", price=4000)
+    assert matches_filters(record, {})
+    assert matches_filters(record, {'position': "Delantero", 'club': "atletico", 'price_max': 4000})
+    assert matches_filters(record, {'position': ["PT", "sd"]})
+    assert matches_filters(record, {'club': "Atletico de Madri"})
+    assert not matches_filters(record, {'position': "Defensas"})
+    assert not matches_filters(record, {'price_max': 3999})
+    assert not matches_filters(PlayerRecord("Sin leer"), {'club': "Atlético"})
+
+
+def test_instance_catalog_file():
+    assert instance_catalog_file() == CATALOG_FILE
+    path = instance_catalog_file("izquierda")
+    assert os.path.dirname(path) == os.path.dirname(CATALOG_FILE)
+    assert os.path.basename(path) == "player_catalog_izquierda.db"
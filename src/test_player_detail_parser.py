@@ -0,0 +1,93 @@
+"""
+Pruebas de la lectura de fichas de jugador sobre las capturas guardadas. Los números se
+leen con el atlas de glifos; el OCR de texto se sustituye para no depender de tesseract.
+"""
+
+import os
+
+import cv2
+import pytest
+
+from frame_source import Frame
+from player_detail_parser import PlayerDetailParser
+from screen_recognizer import IMAGES_DIR, ScreenRecognizer
+
+STATS_SCREEN = ("menu_raquel_stats_20250403_181521.png", "menu_raquel_stats")
+SKILLS_SCREEN = ("menu_raquel_habilidades_20250403_181544.png", "menu_raquel_habilidades")
+
+RAQUEL_STATS = {
+    'actitud_ofensiva': 53, 'control_de_balon': 60, 'regate': 67, 'conservacion_del_balon': 52,
+    'pase_raso': 48, 'pase_bombeado': 52, 'finalizacion': 57, 'cabeceo': 45, 'balon_parado': 48,
+    'efecto': 50, 'actitud_defensiva': 40, 'entrada': 48, 'agresividad': 45, 'compromiso_defensivo': 40,
+    'actitud_de_portero': 40, 'atajar': 40, 'desviar': 40, 'reflejos': 40, 'cobertura': 40,
+    'velocidad': 71, 'aceleracion': 64, 'potencia_de_tiro': 55, 'salto': 60, 'contacto_fisico': 53,
+    'equilibrio': 60, 'resistencia': 58,
+}
+
+
+@pytest.fixture(scope="module")
+def recognizer():
+    recognizer = ScreenRecognizer()
+    yield recognizer
+    recognizer.close()
+
+
+@pytest.fixture
+def ocr(recognizer, monkeypatch):
+    """OCR falso: devuelve el texto de `ocr.text` y anota el perfil de cada región leída."""
+    def read(image, profile=None):
+        ocr.calls.append(profile)
+        return ocr.text
+
+    ocr.calls = []
+    ocr.text = "Raquel Lombardi"
+    monkeypatch.setattr(recognizer, '_extract_and_clean_text', read)
+    return ocr
+
+
+def screen_frame(file_name):
+    gray = cv2.imread(os.path.join(IMAGES_DIR, file_name), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        pytest.skip(f"Falta la captura {file_name}")
+    region = {'left': 0, 'top': 0, 'width': gray.shape[1], 'height': gray.shape[0]}
+    return Frame(0, 0.0, region, None, gray)
+
+
+def test_parse_stats_page(recognizer, ocr):
+    file_name, state = STATS_SCREEN
+    detail = PlayerDetailParser(recognizer).parse(frame=screen_frame(file_name), state=state)
+    assert detail.page == 'stats'
+    assert (detail.rating, detail.level) == (56, 1)
+    assert detail.stats == RAQUEL_STATS
+    assert detail.name == "Raquel Lombardi"
+    assert set(detail.attributes) == {'uso_de_pierna_mala', 'precision_de_pierna_mala',
+                                      'regularidad', 'resistencia_a_lesiones'}
+    # Nombre, posición, club y las cuatro características: ninguna estadística pasa por tesseract
+    assert sorted(ocr.calls) == ['line'] * 6 + ['word']
+
+
+def test_parse_skills_page_skips_empty_rows(recognizer, ocr):
+    file_name, state = SKILLS_SCREEN
+    ocr.text = "No aplicable"
+    detail = PlayerDetailParser(recognizer).parse(frame=screen_frame(file_name), state=state)
+    assert detail.page == 'skills'
+    assert (detail.rating, detail.level) == (56, 1)
+    assert detail.stats == {}
+    assert (detail.skills, detail.additional_skills, detail.additional_positions, detail.ai_styles) == ([], [], [], [])
+    # Las filas con guion no llegan al OCR: sólo la cabecera y la primera fila de habilidades y de estilos
+    assert len(ocr.calls) == 5
+
+
+def test_parse_unknown_state(recognizer, ocr):
+    assert PlayerDetailParser(recognizer).parse(frame=screen_frame(STATS_SCREEN[0]), state='menu_home') is None
+    assert ocr.calls == []
+
+
+def test_parse_current_reuses_the_recognition_frame(recognizer, ocr, monkeypatch):
+    file_name, state = STATS_SCREEN
+    frame = screen_frame(file_name)
+    monkeypatch.setattr(recognizer, 'recognize_screen_for_test', lambda: {'state': state})
+    monkeypatch.setattr(recognizer.frame_source, 'current', frame)
+    monkeypatch.setattr(recognizer, 'capture_frame', lambda region=None: pytest.fail("segunda captura"))
+    detail = PlayerDetailParser(recognizer).parse_current()
+    assert detail.stats == RAQUEL_STATS
@@ -0,0 +1,238 @@
+"""
+Pruebas del escáner de listas sobre capturas reales de la lista de Mi Equipo.
+"""
+
+import os
+
+import cv2
+import pytest
+
+from frame_source import Frame
+from player_list_scanner import (PLAYER_LIST_LAYOUT, PROJECT_DIR, PlayerListScanner, cache_lookup,
+                                 hash_distance, name_hash, rows_match, same_text)
+
+IMAGES_DIR = os.path.join(PROJECT_DIR, "images")
+SORTED_LIST = "menu_miequipo_jugadores_ordenados_ascen_{}.png"
+POSITIONS = {
+    'pos1': "pos1_20250403_182945",   # Cursor en (0, 0)
+    'pos2': "pos2_20250403_182955",   # Cursor en (0, 1)
+    'pos3': "pos3_20250403_183007",   # Cursor en (1, 0)
+    'pos4': "pos4_20250403_183017",   # Cursor en (1, 1)
+}
+LIST_SCREEN = "menu_miequipo_jugadores_20250403_182400.png"
+
+
+def load_frame(file_name):
+    path = os.path.join(IMAGES_DIR, file_name)
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        pytest.skip(f"Falta la captura {file_name}")
+    return Frame(0, 0.0, {}, None, gray, None)
+
+
+@pytest.fixture
+def scanner():
+    return PlayerListScanner(None, None, PLAYER_LIST_LAYOUT)
+
+
+def name_hashes(scanner, frame):
+    height, width = frame.gray.shape
+    return {(row, col): name_hash(frame.gray[y0:y1, x0:x1])
+            for row, col, _, (x0, y0, x1, y1) in scanner._cell_boxes(width, height)}
+
+
+def test_hash_tolerates_selection(scanner):
+    unselected = name_hashes(scanner, load_frame(SORTED_LIST.format(POSITIONS['pos1'])))[(0, 1)]
+    selected = name_hashes(scanner, load_frame(SORTED_LIST.format(POSITIONS['pos2'])))[(0, 1)]
+    assert unselected != selected
+    assert same_text(unselected, selected)
+
+
+def test_hash_separates_names(scanner):
+    hashes = [key for key in name_hashes(scanner, load_frame(LIST_SCREEN)).values() if key]
+    assert len(hashes) > 4
+    for i, a in enumerate(hashes):
+        for b in hashes[i + 1:]:
+            assert not same_text(a, b)
+
+
+def test_hash_distance_and_rows_match():
+    a = bytes([0b10101010, 0])
+    b = bytes([0b10101011, 0])
+    assert hash_distance(a, a) == 0
+    assert hash_distance(a, b) == 1
+    assert hash_distance(a, b"") == 16
+    assert rows_match([(a,), (a, b)], [(b,), (b, a)])
+    assert not rows_match([(a,)], [(a, b)])
+
+
+def test_cache_lookup_accepts_close_hashes():
+    a = bytes(72)
+    close = bytes([0xFF]) + bytes(71)
+    far = bytes([0xFF] * 72)
+    cache = {a: "Raquel Lombardi"}
+    assert cache_lookup(cache, close) == "Raquel Lombardi"
+    assert close in cache
+    assert cache_lookup(cache, far) is None
+
+
+def test_estimate_shift_with_selection_change(scanner):
+    pos1, _ = scanner._visible_rows(load_frame(SORTED_LIST.format(POSITIONS['pos1'])))
+    pos2, _ = scanner._visible_rows(load_frame(SORTED_LIST.format(POSITIONS['pos2'])))
+    assert scanner._estimate_shift(pos1, pos2, 0) == 0
+
+
+def test_track_rows_follows_selection(scanner):
+    state = None
+    positions = []
+    for name in ('pos1', 'pos2', 'pos3', 'pos4'):
+        state = scanner._track_rows(load_frame(SORTED_LIST.format(POSITIONS[name])), state)
+        assert state['verified']
+        positions.append((state['top_row'], state['position']))
+    assert positions == [(0, 0), (0, 0), (0, 1), (0, 1)]
+
+
+class FakeRecognizer:
+    """Devuelve las capturas indicadas en orden (la última se repite)."""
+
+    current_state = 'menu_miequipo_jugadores'
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def capture_frame(self, region=None):
+        return self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+
+
+@pytest.mark.parametrize("start, end", [('pos1', 'pos3'), ('pos2', 'pos4')])
+def test_scroll_verified_without_corrections(start, end):
+    from gamepad_backends import RecorderBackend
+    from gamepad_controller import GamepadController
+
+    gamepad = GamepadController(backend=RecorderBackend())
+    recognizer = FakeRecognizer([load_frame(SORTED_LIST.format(POSITIONS[start])),
+                                 load_frame(SORTED_LIST.format(POSITIONS[end]))])
+    scanner = PlayerListScanner(gamepad, recognizer, PLAYER_LIST_LAYOUT)
+    scanner.settings['settle_time'] = 0.0
+    try:
+        assert scanner.scroll('down', 1) == 1
+    finally:
+        gamepad.close()
+    presses = [report for report in gamepad.backend.as_array() if report['buttons']]
+    # Una única pulsación mantenida de la cruceta, sin pulsaciones de corrección
+    assert len(presses) == 1
+
+
+def test_find_player_falls_back_to_the_top(scanner):
+    from player_catalog import PlayerCatalog
+
+    scanner.catalog = PlayerCatalog(":memory:")
+    scanner.catalog.record_seen(scanner.list_name, 41, "Raquel Lombardi")
+    columns = len(PLAYER_LIST_LAYOUT['columns'])
+    scans, moves = [], []
+
+    def fake_scan(match_page, description, start_row=None, **kwargs):
+        # La jugadora ya no está donde la vio el catálogo, sino más arriba
+        scans.append(start_row)
+        scanner.cursor_row = (start_row or 0) + 12
+        return start_row is None
+
+    scanner._scan = fake_scan
+    scanner.move_rows = moves.append
+    assert scanner.find_player("Raquel Lombardi")
+    assert scans == [41 // columns, None]
+    assert moves == [-(41 // columns + 12)]
+
+
+def load_color_frame(file_name):
+    bgr = cv2.imread(os.path.join(IMAGES_DIR, file_name))
+    if bgr is None:
+        pytest.skip(f"Falta la captura {file_name}")
+    return Frame(0, 0.0, {}, bgr, cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY), None)
+
+
+@pytest.mark.parametrize("file_name, descending", [
+    ("menu_miequipo_jugadores_accion_ordenar_valor_ascen_20250403_182809.png", False),
+    ("menu_miequipo_jugadores_accion_ordenar_valor_desc_20250403_182653.png", True),
+    ("menu_miequipo_jugadores_accion_ordenar_nombre_desc_20250403_182610.png", True),
+    ("menu_jugadores_normales_ordenar_precio_desc_20250403_181851.png", False),   # Flecha hacia arriba
+    # Panel cerrado: en la zona de la flecha está el contador "Tienes: 327/500"
+    ("menu_miequipo_jugadores_ordenados_ascen_20250403_182857.png", None),
+    (SORTED_LIST.format(POSITIONS['pos1']), None),
+])
+def test_sort_direction(file_name, descending):
+    assert PlayerListScanner.sort_direction(load_color_frame(file_name)) is descending
+
+
+def test_past_bound(scanner):
+    from player_catalog import PlayerRecord
+
+    cheap, expensive = PlayerRecord("Ana", price=900), PlayerRecord("Berta", price=1500)
+    assert not scanner.past_bound(expensive, 'price', upper=1000)    # Orden desconocido
+    scanner.sort_key, scanner.sort_descending = 'precio', False
+    assert scanner.past_bound(expensive, 'price', upper=1000)
+    assert not scanner.past_bound(cheap, 'price', upper=1000)
+    assert not scanner.past_bound(PlayerRecord("Sin precio"), 'price', upper=1000)
+    assert not scanner.past_bound(expensive, 'rating', upper=50)     # No es el campo ordenado
+    scanner.sort_descending = True
+    assert scanner.past_bound(cheap, 'price', lower=1000)
+    assert not scanner.past_bound(expensive, 'price', upper=1000)
+    scanner.sort_key, scanner.sort_descending = 'nombre', False
+    assert scanner.past_bound(PlayerRecord("Óscar"), 'name', upper="lombardi")
+    assert not scanner.past_bound(PlayerRecord("Ángela"), 'name', upper="lombardi")
+
+
+def test_estimate_index(scanner):
+    from player_catalog import LIST_NORMAL_PLAYERS, PlayerCatalog
+
+    scanner.catalog = PlayerCatalog(":memory:")
+    scanner.list_name = LIST_NORMAL_PLAYERS
+    assert scanner.estimate_index(1000) is None                       # Orden desconocido
+    scanner.sort_key, scanner.sort_descending = 'precio', False
+    for index, price in enumerate([100, 400, 800, 1200, 2000]):
+        scanner.catalog.record_seen(LIST_NORMAL_PLAYERS, index, f"Jugador {index}", price=price,
+                                    sort_key=scanner.sort_label)
+    scanner.catalog.record_seen(LIST_NORMAL_PLAYERS, 5, "Otro orden", price=10, sort_key='precio_desc')
+    assert scanner.estimate_index(1000) == 2
+    assert scanner.estimate_index(50) is None
+    scanner.sort_descending = True
+    assert scanner.estimate_index(1000) is None                       # Sin tarjetas vistas con ese orden
+
+
+class ScriptedScanner(PlayerListScanner):
+    """Recorre una lista de precios ya leída, una página por fila, sin capturas."""
+
+    def __init__(self, prices):
+        super().__init__(None, None, PLAYER_LIST_LAYOUT)
+        self.prices = prices
+        self.sort_key, self.sort_descending = 'precio', False
+        self.visited = []
+
+    def _scan(self, match_page, description, start_row=None, max_pages=None, read_details=False, exhausted=None):
+        columns = len(self.layout['columns'])
+        for top_row in range(0, len(self.prices) // columns, 4):
+            cells, details = [], {}
+            for index, price in enumerate(self.prices[top_row * columns:(top_row + 4) * columns]):
+                row, col = divmod(index, columns)
+                cells.append((row, col, f"Jugador {top_row * columns + index}", b""))
+                details[(row, col)] = {'price': price}
+            match = match_page(cells, details, top_row)
+            self.visited.append(top_row)
+            if match is not None:
+                return True
+            if exhausted(cells, details, top_row):
+                return False
+        return False
+
+
+def test_find_first_survives_one_misread_past_the_bound():
+    # 1500 leído como 15000: una sola tarjeta fuera del límite no detiene el recorrido
+    prices = [100, 200, 15000, 400, 600, 700, 800, 900] + [1200] * 8 + [3000] * 8
+    scanner = ScriptedScanner(prices)
+    found = scanner.find_first(lambda r: 500 <= (r.price or 0) <= 1000, skip=3,
+                               stop_when=lambda r: scanner.past_bound(r, 'price', upper=1000))
+    assert found.name == "Jugador 7"
+    scanner = ScriptedScanner(prices)
+    assert scanner.find_first(lambda r: r.price == 3000,
+                              stop_when=lambda r: scanner.past_bound(r, 'price', upper=1000)) is None
+    assert scanner.visited == [0, 4]
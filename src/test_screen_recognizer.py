@@ -0,0 +1,101 @@
+"""
+Pruebas del reconocedor de pantalla sobre capturas guardadas (sin capturar la pantalla).
+"""
+
+import os
+import time
+
+import cv2
+import pytest
+
+from frame_source import Frame
+from screen_recognizer import IMAGES_DIR, ScreenRecognizer
+
+LIST_SCREEN = "menu_miequipo_jugadores_20250403_182400.png"
+
+
+@pytest.fixture(scope="module")
+def recognizer():
+    return ScreenRecognizer()
+
+
+def screen_frame(file_name, left=0, top=0):
+    gray = cv2.imread(os.path.join(IMAGES_DIR, file_name), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        pytest.skip(f"Falta la captura {file_name}")
+    region = {'left': left, 'top': top, 'width': gray.shape[1], 'height': gray.shape[0]}
+    return Frame(0, 0.0, region, None, gray)
+
+
+def test_find_image_returns_screen_coordinates(recognizer, tmp_path):
+    frame = screen_frame(LIST_SCREEN)
+    name = str(tmp_path / "recorte.png")
+    cv2.imwrite(name, frame.gray[200:260, 300:420])
+    assert recognizer.find_image_on_screen(name, frame=frame, state='prueba') == (300, 200, 120, 60)
+    # La misma imagen vista en un segundo monitor: misma caja desplazada por su región
+    shifted = screen_frame(LIST_SCREEN, left=1920, top=0)
+    recognizer.clear_search_windows()
+    assert recognizer.find_image_on_screen(name, frame=shifted, state='prueba') == (2220, 200, 120, 60)
+    # También desde la ventana de búsqueda de la posición anterior
+    assert recognizer.find_image_on_screen(name, frame=shifted, state='prueba') == (2220, 200, 120, 60)
+
+
+def test_ocr_fallback_prefers_best_scored_candidate(recognizer, monkeypatch):
+    region = {'left': 0, 'top': 0, 'width': 50, 'height': 20}
+    mapping = {
+        'mejor': [{'region': region, 'expected_text': ['mejor'], 'delay': 0.2}],
+        'peor': [{'region': region, 'expected_text': ['peor']},
+                 {'region': region}],   # Sin texto esperado: no se lee
+    }
+    read = []
+
+    def read_region_text(image, region_data):
+        read.append(region_data)
+        time.sleep(region_data.get('delay', 0.0))
+        return region_data['expected_text'][0]
+
+    monkeypatch.setattr(recognizer, 'ocr_regions_mapping', mapping)
+    monkeypatch.setattr(recognizer, '_read_region_text', read_region_text)
+    monkeypatch.setattr(recognizer, '_match_expected_text',
+                        lambda text, state, idx, expected, *_: 0 if text in expected else None)
+    state, results = recognizer._run_ocr_fallback([('mejor', 0.8), ('peor', 0.7)], screen_frame(LIST_SCREEN))
+    assert state == 'mejor'
+    assert list(results) == [0]
+    assert all(region_data.get('expected_text') for region_data in read)
+
+
+def test_close_shuts_down_ocr_pool(recognizer):
+    executor = recognizer._get_ocr_executor()
+    recognizer.close()
+    assert recognizer._ocr_executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(int)
+
+
+def test_small_pass_candidates_use_slack(recognizer, monkeypatch):
+    frame = screen_frame(LIST_SCREEN)
+    frame.small_gray = cv2.resize(frame.gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    frame.scale = 0.5
+    template = frame.gray[200:260, 300:420]
+    small_template = frame.small_gray[100:130, 150:210]
+    # La reducción baja la puntuación justo por debajo del umbral; la verificación la recupera
+    scores = {id(frame.small_gray): recognizer.threshold - 0.02}
+
+    monkeypatch.setattr(recognizer, 'capture_frame', lambda region=None: frame)
+    monkeypatch.setattr(recognizer, 'templates', {'estado': [template]})
+    monkeypatch.setattr(recognizer, 'signature_matcher', None)
+    monkeypatch.setattr(recognizer, '_get_small_templates', lambda scale: {'estado': [small_template]})
+    monkeypatch.setattr(recognizer, 'find_template_on_screen',
+                        lambda screen, tpl: ((150, 100), scores.get(id(screen), 0.0)))
+    monkeypatch.setattr(recognizer, '_verify_full_resolution', lambda screen, tpl, loc, scale: ((300, 200), 0.99))
+    result = recognizer.recognize_screen_for_test()
+    assert (result['method'], result['state'], result['confidence']) == ('template', 'estado', 0.99)
+
+
+def test_read_numeric_regions(recognizer):
+    # Regiones que no aportan muestras al atlas de glifos (glyph_samples.json)
+    frame = screen_frame("menu_miequipo_jugadores_raquel_stats_20250403_183117.png")
+    assert recognizer.read_numeric_regions('menu_miequipo_jugadores_raquel_stats', frame) == {'rating': 55, 'level': 1}
+    frame = screen_frame("menu_jugadores_normales_raquel_20250403_181443.png")
+    values = recognizer.read_numeric_regions('menu_jugadores_normales_raquel', frame)
+    assert values == {'gp_balance': 23386520, 'rating': 56, 'price': 0}
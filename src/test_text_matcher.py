@@ -0,0 +1,51 @@
+"""
+Pruebas de la verificación tolerante de textos esperados.
+"""
+
+import random
+
+from text_matcher import BKTree, ExpectedTextIndex, levenshtein
+
+
+def test_levenshtein():
+    assert levenshtein("contrato", "contrato") == 0
+    assert levenshtein("contrato", "c0ntrato") == 1
+    assert levenshtein("mi equipo", "mi equip") == 1
+    assert levenshtein("abcdef", "xyz", max_distance=2) == 3
+
+
+def test_bktree_search_matches_linear_scan():
+    rng = random.Random(0)
+    words = {"".join(rng.choice("abcde") for _ in range(rng.randint(3, 8))) for _ in range(300)}
+    tree = BKTree()
+    for word in words:
+        tree.add(word, word)
+    assert tree.size == len(words)
+    for query in ["abc", "deadbeef", "aaaa", "ecdba"]:
+        for radius in (0, 1, 2):
+            found = {term for _, term, _ in tree.search(query, radius)}
+            assert found == {word for word in words if levenshtein(query, word) <= radius}
+
+
+def test_bktree_keeps_keys_of_repeated_terms():
+    tree = BKTree()
+    tree.add("jugar", ("a", 0))
+    tree.add("jugar", ("b", 1))
+    [(distance, term, keys)] = tree.search("jugar", 0)
+    assert (distance, term, keys) == (0, "jugar", {("a", 0), ("b", 1)})
+
+
+def test_expected_text_index_matches_all_keys_in_one_search():
+    mapping = {
+        'menu_home_mi_equipo': [{'left': 0}, {'region': {}, 'expected_text': ['Mi equipo']}],
+        'menu_home_contrato': [{'region': {}, 'expected_text': ['Contrato']}],
+        'menu_contrato': [{'region': {}, 'expected_text': ['Contratos']}],
+    }
+    index = ExpectedTextIndex.from_ocr_mapping(mapping, 0.2)
+    assert index.matches("Contrat0") == {('menu_home_contrato', 0): (1, 'contrato')}
+    assert index.matches("Contrato") == {('menu_home_contrato', 0): (0, 'contrato'),
+                                         ('menu_contrato', 0): (1, 'contratos')}
+    assert index.matches("Mi equip") == {('menu_home_mi_equipo', 1): (1, 'mi equipo')}
+    assert index.matches("Partido") == {}
+    assert index.best_match("Contrat0") == (('menu_home_contrato', 0), 1, 'contrato')
+    assert index.best_match("Contrato", keys=[('menu_contrato', 0)]) == (('menu_contrato', 0), 1, 'contratos')
@@ -0,0 +1,173 @@
+"""
+Índice de palabras de un fotograma para búsquedas de texto repetidas.
+
+Se ejecuta una única pasada de image_to_data (tesseract) sobre la región pedida
+y las palabras reconocidas se guardan normalizadas (minúsculas, sin tildes ni
+signos) junto a su caja en coordenadas de pantalla. Las consultas posteriores
+sobre el mismo fotograma (CursorNavigator.move_to_text,
+navigate_to_menu_option) se resuelven con búsquedas en diccionario, sin volver
+a lanzar OCR.
+"""
+
+import re
+import bisect
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Caja (x, y, ancho, alto) en coordenadas de pantalla
+Box = Tuple[int, int, int, int]
+
+_NON_WORD_PATTERN = re.compile(r'[^a-z0-9ñ\s]')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para compararlo: minúsculas, sin tildes ni signos y con espacios simples.
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto normalizado
+    """
+    text = text.lower().replace('ñ', '\0')
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).replace('\0', 'ñ')
+    text = _NON_WORD_PATTERN.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def union_box(boxes: List[Box]) -> Box:
+    """Caja mínima que contiene todas las cajas dadas."""
+    left = min(b[0] for b in boxes)
+    top = min(b[1] for b in boxes)
+    right = max(b[0] + b[2] for b in boxes)
+    bottom = max(b[1] + b[3] for b in boxes)
+    return left, top, right - left, bottom - top
+
+
+def box_inside(box: Box, region: Box) -> bool:
+    """Indica si una caja está contenida en una región (x, y, ancho, alto)."""
+    return (box[0] >= region[0] and box[1] >= region[1] and
+            box[0] + box[2] <= region[0] + region[2] and box[1] + box[3] <= region[1] + region[3])
+
+
+class TextIndex:
+    """
+    Palabras de un fotograma indexadas por su forma normalizada.
+    """
+
+    def __init__(self):
+        # Palabra normalizada -> lista de (línea, posición en la línea)
+        self._words: Dict[str, List[Tuple[int, int]]] = {}
+        # Cada línea es la lista de (palabra normalizada, caja)
+        self.lines: List[List[Tuple[str, Box]]] = []
+        self._sorted_words: Optional[List[str]] = None
+
+    def __len__(self):
+        return sum(len(line) for line in self.lines)
+
+    @classmethod
+    def from_tesseract_data(cls, data: Dict[str, List], offset: Tuple[int, int] = (0, 0),
+                            min_confidence: float = 0.0) -> "TextIndex":
+        """
+        Construye el índice a partir del resultado de pytesseract.image_to_data (Output.DICT).
+
+        Args:
+            data: Diccionario devuelto por image_to_data
+            offset: Desplazamiento (x, y) de la región leída respecto a la pantalla
+            min_confidence: Confianza mínima de tesseract (0-100) para indexar una palabra
+
+        Returns:
+            TextIndex con las palabras reconocidas
+        """
+        index = cls()
+        line_ids: Dict[Tuple[int, int, int], int] = {}
+        for i, raw in enumerate(data.get('text', [])):
+            try:
+                confidence = float(data['conf'][i])
+            except (KeyError, ValueError, TypeError):
+                confidence = -1.0
+            if not raw or not raw.strip() or confidence < min_confidence:
+                continue
+            box = (int(data['left'][i]) + offset[0], int(data['top'][i]) + offset[1],
+                   int(data['width'][i]), int(data['height'][i]))
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            if line_key not in line_ids:
+                line_ids[line_key] = len(line_ids)
+                index.lines.append([])
+            # Una "palabra" de tesseract puede contener signos que la normalización separa
+            for word in normalize_text(raw).split():
+                index.add(line_ids[line_key], word, box)
+        return index
+
+    def add(self, line_id: int, word: str, box: Box) -> None:
+        """Añade una palabra normalizada a una línea del índice."""
+        line = self.lines[line_id]
+        self._words.setdefault(word, []).append((line_id, len(line)))
+        line.append((word, box))
+        self._sorted_words = None
+
+    def find_all(self, text: str, region: Box = None, prefix: bool = False) -> List[Box]:
+        """
+        Busca todas las apariciones de un texto (una o varias palabras consecutivas de una línea).
+
+        Args:
+            text: Texto a buscar (se normaliza igual que las palabras indexadas)
+            region: Si se indica, sólo se devuelven coincidencias contenidas en la región
+            prefix: Si True, la última palabra de la consulta puede ser un prefijo
+
+        Returns:
+            Lista de cajas (x, y, ancho, alto) de las coincidencias
+        """
+        tokens = normalize_text(text).split()
+        if not tokens:
+            return []
+
+        if len(tokens) == 1 and prefix:
+            starts = [pos for word in self._words_with_prefix(tokens[0]) for pos in self._words[word]]
+        else:
+            starts = self._words.get(tokens[0], [])
+
+        results = []
+        for line_id, position in starts:
+            line = self.lines[line_id]
+            if position + len(tokens) > len(line):
+                continue
+            matched = True
+            for offset, token in enumerate(tokens[1:], start=1):
+                word = line[position + offset][0]
+                is_last = offset == len(tokens) - 1
+                if word != token and not (prefix and is_last and word.startswith(token)):
+                    matched = False
+                    break
+            if not matched:
+                continue
+            box = union_box([box for _, box in line[position:position + len(tokens)]])
+            if region is None or box_inside(box, region):
+                results.append(box)
+        return results
+
+    def find(self, text: str, region: Box = None, prefix: bool = False) -> Optional[Box]:
+        """
+        Busca la primera aparición (de arriba abajo) de un texto.
+
+        Returns:
+            Caja (x, y, ancho, alto) o None si no aparece
+        """
+        matches = self.find_all(text, region, prefix)
+        if not matches:
+            return None
+        return min(matches, key=lambda b: (b[1], b[0]))
+
+    def _words_with_prefix(self, prefix: str) -> List[str]:
+        """Palabras indexadas que empiezan por el prefijo (búsqueda binaria sobre las claves ordenadas)."""
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._words)
+        start = bisect.bisect_left(self._sorted_words, prefix)
+        end = bisect.bisect_left(self._sorted_words, prefix + '￿')
+        return self._sorted_words[start:end]
+
+    def words(self) -> List[str]:
+        """Devuelve todas las palabras normalizadas del índice, por líneas."""
+        return [word for line in self.lines for word, _ in line]
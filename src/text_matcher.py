@@ -0,0 +1,204 @@
+"""
+Verificación tolerante de textos esperados del OCR.
+
+Todos los textos esperados de ocr_regions.json se normalizan y se insertan en un
+BK-tree (árbol métrico por distancia de Levenshtein). Una lectura OCR se compara
+con todos ellos en una sola búsqueda acotada, que devuelve el mejor estado y su
+distancia; así una lectura con un carácter mal reconocido sigue verificando el
+estado en lugar de forzar otro ciclo de captura y reconocimiento.
+"""
+
+import logging
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from text_index import normalize_text
+
+logger = logging.getLogger('text_matcher')
+
+# Fracción de caracteres del texto esperado que pueden diferir (0.2 = 1 error cada 5 caracteres)
+DEFAULT_MAX_EDIT_RATIO = 0.2
+
+
+def levenshtein(a: str, b: str, max_distance: int = None) -> int:
+    """
+    Distancia de edición entre dos cadenas.
+
+    Args:
+        a: Primera cadena
+        b: Segunda cadena
+        max_distance: Si se indica, el cálculo se abandona en cuanto se supera y devuelve max_distance + 1
+
+    Returns:
+        Número mínimo de inserciones, borrados y sustituciones
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """
+    Árbol BK sobre la distancia de Levenshtein. Cada término guarda un conjunto de claves asociadas.
+    """
+
+    def __init__(self):
+        # Nodo: [término, claves, {distancia: hijo}]
+        self._root = None
+        self.size = 0
+
+    def add(self, term: str, key: Hashable) -> None:
+        """Inserta un término (o añade una clave a un término existente)."""
+        if self._root is None:
+            self._root = [term, {key}, {}]
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(term, node[0])
+            if distance == 0:
+                node[1].add(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [term, {key}, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, query: str, radius: int) -> List[Tuple[int, str, Set[Hashable]]]:
+        """
+        Busca todos los términos a distancia <= radius.
+
+        Returns:
+            Lista de (distancia, término, claves)
+        """
+        results = []
+        if self._root is None:
+            return results
+        pending = [self._root]
+        while pending:
+            term, keys, children = pending.pop()
+            distance = levenshtein(query, term)
+            if distance <= radius:
+                results.append((distance, term, keys))
+            # Desigualdad triangular: sólo los hijos en [d - r, d + r] pueden contener coincidencias
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    pending.append(child)
+        return results
+
+
+class ExpectedTextIndex:
+    """
+    Índice de los textos esperados de todas las regiones OCR.
+
+    Las claves son tuplas (estado, índice de región).
+    """
+
+    def __init__(self, max_edit_ratio: float = DEFAULT_MAX_EDIT_RATIO):
+        """
+        Inicializa el índice.
+
+        Args:
+            max_edit_ratio: Fracción máxima de caracteres distintos respecto al texto esperado
+        """
+        self.max_edit_ratio = max(0.0, min(float(max_edit_ratio), 0.5))
+        self.tree = BKTree()
+        self.expected: Dict[str, List[Hashable]] = {}
+
+    @classmethod
+    def from_ocr_mapping(cls, ocr_mapping: Dict, max_edit_ratio: float = DEFAULT_MAX_EDIT_RATIO) -> "ExpectedTextIndex":
+        """
+        Construye el índice a partir del contenido de ocr_regions.json.
+
+        Sólo se indexan las entradas con formato {"region": ..., "expected_text": [...]}.
+        """
+        index = cls(max_edit_ratio)
+        for state, regions in ocr_mapping.items():
+            if not isinstance(regions, list):
+                continue
+            for idx, region_data in enumerate(regions):
+                if isinstance(region_data, dict) and isinstance(region_data.get('expected_text'), list):
+                    index.add_all(region_data['expected_text'], (state, idx))
+        logger.debug(f"Índice de textos esperados: {index.tree.size} términos")
+        return index
+
+    def add_all(self, texts: Iterable[str], key: Hashable) -> None:
+        """Añade varios textos esperados asociados a una misma clave."""
+        for text in texts:
+            normalized = normalize_text(str(text))
+            if normalized:
+                self.tree.add(normalized, key)
+                self.expected.setdefault(normalized, []).append(key)
+
+    def allowed_distance(self, term: str) -> int:
+        """Distancia máxima tolerada para un texto esperado (normalizado)."""
+        return int(len(term) * self.max_edit_ratio)
+
+    def matches(self, text: str) -> Dict[Hashable, Tuple[int, str]]:
+        """
+        Busca en una sola pasada del árbol todos los textos esperados cercanos a una lectura OCR.
+
+        Args:
+            text: Texto leído
+
+        Returns:
+            {clave: (distancia, texto esperado normalizado)} con la menor distancia de cada clave
+            dentro de la tolerancia
+        """
+        query = normalize_text(text or "")
+        if not query:
+            return {}
+        found: Dict[Hashable, Tuple[int, str]] = {}
+        # Un término t sólo puede coincidir si |q| - |t| <= ratio * |t|, luego d <= ratio * |q| / (1 - ratio)
+        radius = int(len(query) * self.max_edit_ratio / (1.0 - self.max_edit_ratio))
+        if radius == 0:
+            return {key: (0, query) for key in self.expected.get(query, [])}
+        for distance, term, term_keys in self.tree.search(query, radius):
+            if distance > self.allowed_distance(term):
+                continue
+            for key in term_keys:
+                if key not in found or distance < found[key][0]:
+                    found[key] = (distance, term)
+        return found
+
+    def best_match(self, text: str, keys: Iterable[Hashable] = None) -> Optional[Tuple[Hashable, int, str]]:
+        """
+        Busca el texto esperado más cercano a una lectura OCR.
+
+        Args:
+            text: Texto leído
+            keys: Si se indica, sólo se consideran estas claves (estado, índice de región)
+
+        Returns:
+            Tupla (clave, distancia, texto esperado normalizado) o None si nada está dentro de la tolerancia
+        """
+        query = normalize_text(text or "")
+        if not query:
+            return None
+        allowed_keys = set(keys) if keys is not None else None
+
+        # Búsqueda exacta directa antes de recorrer el árbol
+        exact = self.expected.get(query)
+        if exact:
+            for key in exact:
+                if allowed_keys is None or key in allowed_keys:
+                    return key, 0, query
+
+        best = None
+        for key, (distance, term) in self.matches(query).items():
+            if allowed_keys is not None and key not in allowed_keys:
+                continue
+            if best is None or (distance, key) < (best[1], best[0]):
+                best = (key, distance, term)
+        return best